@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Swingman - Offline Swing Analysis
+Re-scores a folder of recorded swing videos headlessly, one swing per video
+
+    python analyze.py recordings/ --output-dir output --session-name rescore
+"""
+
+import os
+import sys
+import argparse
+
+from core.batch_analyzer import find_videos, run_batch_analysis
+from core.swing_data_manager import SwingDataManager
+
+
+def main():
+    """Entry point for batch analysis"""
+    parser = argparse.ArgumentParser(description="Swingman - Offline batch swing analysis")
+    parser.add_argument("inputs", nargs="+", help="Video files or directories of swing videos")
+    parser.add_argument("--output-dir", type=str, default="output", help="Directory for output files")
+    parser.add_argument("--session-name", type=str, help="Optional name for the session")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="Frames per YOLO forward pass (1 = per-frame detection with keyframe scheduling)")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not search sub-directories")
+    parser.add_argument("--no-pose", action="store_true", help="Skip MediaPipe pose analysis")
+    parser.add_argument("--fused-model", type=str, default=None,
+                        help="Single bat+ball+person model to use instead of the bat and COCO models "
+                             "('auto' to search the model folders)")
+    parser.add_argument("--keyframe-interval", type=int, default=1,
+                        help="Run YOLO every Nth frame and track boxes with optical flow in between")
+    parser.add_argument("--roi-inference", action="store_true",
+                        help="Detect the bat in a crop around the last batter/bat box")
+    parser.add_argument("--backend", choices=["ultralytics", "onnx"], default="ultralytics",
+                        help="YOLO inference backend")
+    parser.add_argument("--pose-crop", action="store_true",
+                        help="Run pose on a crop around the detected batter instead of the full frame")
+    parser.add_argument("--multi-person-pose", action="store_true",
+                        help="Track pose for every detected person and follow the batter holding the bat")
+    parser.add_argument("--pose-complexity", type=int, choices=[0, 1, 2], default=1,
+                        help="MediaPipe pose model (0 lite, 1 full, 2 heavy)")
+    parser.add_argument("--verbose", action="store_true", help="Show the tracker's per-frame output")
+
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs, recursive=not args.no_recursive)
+    if not videos:
+        print("No videos found", file=sys.stderr)
+        return 1
+
+    tracker_kwargs = {
+        'enable_pose': not args.no_pose,
+        'fused_model_path': args.fused_model,
+        'keyframe_interval': args.keyframe_interval,
+        'roi_inference': args.roi_inference,
+        'inference_backend': args.backend,
+        'pose_person_crop': args.pose_crop,
+        'multi_person_pose': args.multi_person_pose,
+        'pose_options': {'model_complexity': args.pose_complexity}
+    }
+
+    data_manager = SwingDataManager(base_dir=args.output_dir)
+    session_id = data_manager.start_new_session(args.session_name)
+    print(f"Analyzing {len(videos)} videos with {args.workers or os.cpu_count()} workers")
+
+    try:
+        summary = run_batch_analysis(videos, data_manager, tracker_kwargs,
+                                     num_workers=args.workers, batch_size=args.batch_size,
+                                     verbose=args.verbose)
+    finally:
+        # Keep whatever was analyzed, even on Ctrl+C
+        session_dir = data_manager.save_current_session()
+        if data_manager.current_session["swings"]:
+            data_manager.export_data(session_id, "csv")
+
+    print("\nBatch Analysis Results:")
+    print("----------------------")
+    print(f"Videos: {summary['videos']}")
+    print(f"Swings saved: {summary['swings']}")
+    print(f"No swing detected: {len(summary['no_swing'])}")
+    print(f"Errors: {len(summary['errors'])}")
+    print(f"Throughput: {summary['fps']:.1f} frames/s over {summary['elapsed_s']:.0f}s")
+    print(f"Session saved to: {session_dir}")
+
+    return 1 if summary['errors'] and not summary['swings'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
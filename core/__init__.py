@@ -1,34 +1,62 @@
 """
 Swingman Core Module - Enhanced with YOLO and Pose Integration
-"""
 
-# Import existing core components
-from .bat_tracker import BatTracker
-from .bat_grid import BatGrid
-from .impact_detector import ImpactDetector
-from .swing_analyzer import SwingAnalyzer
-from .bat_visualizer import BatVisualizer
-from .heatmap_generator import HeatmapGenerator
-from .swing_data_manager import SwingDataManager
+Components are imported on first attribute access, so `from core import
+SwingDataManager` does not pull in torch, ultralytics or MediaPipe.
+"""
 
-# NEW: Import YOLO and Pose integration
-from .yolo_detector import YoloDetector
-from .pose_analyzer import PoseAnalyzer
-from .enhanced_swing_tracker import EnhancedSwingTracker
+import importlib
 
 # Version info
 __version__ = "0.3.0"
 
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    # Existing core components
+    'BatTracker': '.bat_tracker',
+    'BatGrid': '.bat_grid',
+    'ImpactDetector': '.impact_detector',
+    'SwingAnalyzer': '.swing_analyzer',
+    'BatVisualizer': '.bat_visualizer',
+    'HeatmapGenerator': '.heatmap_generator',
+    'SwingDataManager': '.swing_data_manager',
+
+    # YOLO and Pose integration
+    'YoloDetector': '.yolo_detector',
+    'PoseAnalyzer': '.pose_analyzer',
+    'EnhancedSwingTracker': '.enhanced_swing_tracker',
+    'ModelRegistry': '.model_registry',
+    'LaneServer': '.lane_server',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES) + ['create_enhanced_tracker']
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
+
+
 # Convenience function
 def create_enhanced_tracker(custom_bat_model_path=None, enable_pose=True):
     """
     Create an enhanced swing tracker with YOLO and pose analysis
-    
+
     Args:
         custom_bat_model_path: Path to your trained bat detection model
         enable_pose: Whether to enable pose analysis
-    
+
     Returns:
         EnhancedSwingTracker instance
     """
-    return EnhancedSwingTracker(custom_bat_model_path, enable_pose)
\ No newline at end of file
+    from .enhanced_swing_tracker import EnhancedSwingTracker
+    return EnhancedSwingTracker(custom_bat_model_path, enable_pose)
@@ -0,0 +1,220 @@
+"""
+Bat detection cascade
+
+When the YOLO bat model misses, the tracker should not jump straight to the
+mouse position or a bare wrist landmark. The cascade tries, in order:
+
+    yolo - the YOLO bat box, if it clears a confidence gate
+    cv   - Hough / morphology line detection (AdvancedBatDetector), only in
+           a region around the batter's wrists
+    weak - a YOLO box below the gate (what the tracker used before)
+    pose - the bat extrapolated from the wrists along the forearms
+
+Every stage has a time budget and hit counters, so the hit rate and cost of
+each fallback can be read from get_stats().
+"""
+
+import time
+
+import numpy as np
+
+from .frame_context import FrameContext
+
+STAGES = ('yolo', 'cv', 'weak', 'pose')
+
+# MediaPipe pose landmark indices
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+
+
+class BatDetectionCascade:
+    """Confidence-gated bat detection: YOLO -> CV in a wrist ROI -> pose extrapolation"""
+
+    def __init__(self, detector, cv_detector=None, yolo_min_confidence=0.25, weak_min_confidence=0.01,
+                 cv_min_confidence=0.4, cv_methods=('hough', 'morphology'), bat_forearm_ratio=3.0,
+                 min_roi_margin=100, max_hand_distance=40, pose_confidence=0.2, budgets_ms=None):
+        """
+        Args:
+            detector: YoloDetector whose detections are passed to detect()
+            cv_detector: AdvancedBatDetector (created on first use when None)
+            yolo_min_confidence: YOLO bats at or above this are taken without a fallback
+            weak_min_confidence: YOLO bats below the gate but above this are used
+                when the CV stage finds nothing
+            cv_min_confidence: CV detections below this are ignored
+            cv_methods: AdvancedBatDetector methods run in the wrist ROI
+            bat_forearm_ratio: Bat length as a multiple of the forearm length
+            min_roi_margin: Smallest ROI half-size around the hands (px)
+            max_hand_distance: A CV line must pass this close to the hands (px)
+            pose_confidence: Confidence given to the pose-extrapolated bat
+            budgets_ms: Time budget per stage, e.g. {'cv': 8.0}; the CV stage stops
+                between methods once its budget is spent
+        """
+        self.detector = detector
+        self.cv_detector = cv_detector
+        self.yolo_min_confidence = yolo_min_confidence
+        self.weak_min_confidence = weak_min_confidence
+        self.cv_min_confidence = cv_min_confidence
+        self.cv_methods = cv_methods
+        self.bat_forearm_ratio = bat_forearm_ratio
+        self.min_roi_margin = min_roi_margin
+        self.max_hand_distance = max_hand_distance
+        self.pose_confidence = pose_confidence
+        self.budgets_ms = dict({'yolo': 1.0, 'cv': 8.0, 'weak': 1.0, 'pose': 1.0}, **(budgets_ms or {}))
+
+        self.last_stage = None
+        self.last_roi = None
+        self.frames = 0
+        self.misses = 0
+        self.stats = {stage: {'runs': 0, 'hits': 0, 'time_ms': 0.0, 'over_budget': 0} for stage in STAGES}
+
+    def detect(self, frame, detections, pose_data=None):
+        """
+        Best bat for this frame from the first stage that finds one
+
+        Args:
+            frame: BGR frame (or FrameContext) without overlays drawn on it
+            detections: YOLO detections of the frame
+            pose_data: PoseAnalyzer result of the frame (wrists for the CV ROI and extrapolation)
+
+        Returns:
+            Bat detection dict or None; last_stage names the stage that found it
+        """
+        self.frames += 1
+        self.last_stage = None
+        self.last_roi = None
+        arm = self._arm_geometry(pose_data)
+
+        for stage in STAGES:
+            if stage in ('cv', 'pose') and arm is None:
+                continue
+
+            start_time = time.perf_counter()
+            if stage == 'yolo':
+                bat = self.detector.get_best_bat_detection(detections, min_confidence=self.yolo_min_confidence)
+            elif stage == 'cv':
+                bat = self._detect_cv(frame, arm, self._batter_height(detections, arm[0]))
+            elif stage == 'weak':
+                bat = self.detector.get_best_bat_detection(detections, min_confidence=self.weak_min_confidence)
+            else:
+                bat = self._extrapolate_from_pose(arm, frame.shape)
+            self._record(stage, (time.perf_counter() - start_time) * 1000, bat is not None)
+
+            if bat is not None:
+                self.last_stage = stage
+                return bat
+
+        self.misses += 1
+        return None
+
+    def _record(self, stage, elapsed_ms, hit):
+        stats = self.stats[stage]
+        stats['runs'] += 1
+        stats['hits'] += int(hit)
+        stats['time_ms'] += elapsed_ms
+        if elapsed_ms > self.budgets_ms[stage]:
+            stats['over_budget'] += 1
+
+    def _arm_geometry(self, pose_data):
+        """Hands midpoint, unit forearm direction and forearm length, or None without wrists"""
+        if not pose_data or not pose_data['is_detected'] or len(pose_data['landmarks']) <= RIGHT_WRIST:
+            return None
+
+        landmarks = np.asarray(pose_data['landmarks'], dtype=np.float64)
+        wrists = landmarks[[LEFT_WRIST, RIGHT_WRIST]]
+        forearms = wrists - landmarks[[LEFT_ELBOW, RIGHT_ELBOW]]
+
+        hands = wrists.mean(axis=0)
+        direction = forearms.sum(axis=0)
+        norm = np.linalg.norm(direction)
+        forearm_length = np.linalg.norm(forearms, axis=1).mean()
+        if norm < 1e-6 or forearm_length < 1:
+            return None
+        return hands, direction / norm, forearm_length
+
+    @staticmethod
+    def _batter_height(detections, hands):
+        """Height of the largest YOLO person box that contains the hands, or None"""
+        heights = [y2 - y1 for x1, y1, x2, y2 in (p['bbox'] for p in detections.get('persons', []))
+                   if x1 <= hands[0] <= x2 and y1 <= hands[1] <= y2]
+        return max(heights) if heights else None
+
+    def _detect_cv(self, frame, arm, person_height=None):
+        """
+        AdvancedBatDetector on an ROI around the hands; lines must pass near the hands.
+        With the batter's person height the line length limits follow the batter's size.
+        """
+        if self.cv_detector is None:
+            from .hybrid_bat_detector import AdvancedBatDetector
+            self.cv_detector = AdvancedBatDetector()
+
+        hands, _, forearm_length = arm
+        h, w = frame.shape[:2]
+        margin = max(self.min_roi_margin, 1.1 * self.bat_forearm_ratio * forearm_length)
+        x1, y1 = max(0, int(hands[0] - margin)), max(0, int(hands[1] - margin))
+        x2, y2 = min(w, int(hands[0] + margin)), min(h, int(hands[1] + margin))
+        if x2 - x1 < self.cv_detector.min_bat_length and y2 - y1 < self.cv_detector.min_bat_length:
+            return None
+        self.last_roi = (x1, y1, x2, y2)
+
+        roi = FrameContext.of(frame).crop(x1, y1, x2, y2)
+        candidates = self.cv_detector.detect_bat_advanced_cv(roi, methods=self.cv_methods,
+                                                             time_budget_ms=self.budgets_ms['cv'],
+                                                             person_height=person_height)
+
+        hand_x, hand_y = hands[0] - x1, hands[1] - y1
+        for candidate in candidates:  # Ranked by confidence
+            if candidate['confidence'] < self.cv_min_confidence:
+                break
+            bx1, by1, bx2, by2 = candidate['bbox']
+            dx = max(bx1 - hand_x, 0, hand_x - bx2)
+            dy = max(by1 - hand_y, 0, hand_y - by2)
+            if dx * dx + dy * dy <= self.max_hand_distance ** 2:
+                return self._offset_detection(candidate, x1, y1)
+        return None
+
+    @staticmethod
+    def _offset_detection(detection, dx, dy):
+        """ROI detection in frame coordinates"""
+        bx1, by1, bx2, by2 = map(int, detection['bbox'])
+        cx, cy = map(int, detection['center'])
+        detection = dict(detection, bbox=(bx1 + dx, by1 + dy, bx2 + dx, by2 + dy), center=(cx + dx, cy + dy))
+        if 'line_points' in detection:
+            lx1, ly1, lx2, ly2 = map(int, detection['line_points'])
+            detection['line_points'] = (lx1 + dx, ly1 + dy, lx2 + dx, ly2 + dy)
+        return detection
+
+    def _extrapolate_from_pose(self, arm, frame_shape):
+        """Bat from the hands along the forearm direction, bat_forearm_ratio forearms long"""
+        hands, direction, forearm_length = arm
+        tip = hands + direction * self.bat_forearm_ratio * forearm_length
+        center = (hands + tip) / 2
+
+        h, w = frame_shape[:2]
+        margin = 10
+        x_min = max(0, int(min(hands[0], tip[0])) - margin)
+        y_min = max(0, int(min(hands[1], tip[1])) - margin)
+        x_max = min(w, int(max(hands[0], tip[0])) + margin)
+        y_max = min(h, int(max(hands[1], tip[1])) + margin)
+        return {
+            'bbox': (x_min, y_min, x_max, y_max),
+            'center': (int(center[0]), int(center[1])),
+            'confidence': self.pose_confidence,
+            'source': 'pose_wrist',
+            'line_points': (int(hands[0]), int(hands[1]), int(tip[0]), int(tip[1]))
+        }
+
+    def reset_stats(self):
+        self.frames = 0
+        self.misses = 0
+        for stats in self.stats.values():
+            stats.update(runs=0, hits=0, time_ms=0.0, over_budget=0)
+
+    def get_stats(self):
+        """Per stage: runs, hits, hit rate (of all frames), average time and budget overruns"""
+        stages = {}
+        for stage, stats in self.stats.items():
+            stages[stage] = dict(stats,
+                                 hit_rate=stats['hits'] / self.frames if self.frames else 0.0,
+                                 avg_ms=stats['time_ms'] / stats['runs'] if stats['runs'] else 0.0,
+                                 budget_ms=self.budgets_ms[stage])
+        return {'frames': self.frames, 'misses': self.misses, 'stages': stages}
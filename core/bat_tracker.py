@@ -8,6 +8,8 @@ from collections import deque
 import sys
 import traceback
 
+from .frame_context import FrameContext
+
 class BatTracker:
     """Tracks a baseball bat using OpenCV"""
     
@@ -157,7 +159,7 @@ class BatTracker:
             return False
     
     def update_tracking(self, frame):
-        """Update tracking with new frame"""
+        """Update tracking with new frame (or a FrameContext shared with other detectors)"""
         if not self.is_tracking:
             return False, None
         
@@ -165,6 +167,9 @@ class BatTracker:
             print("Cannot update tracking with None frame")
             return False, None
         
+        context = FrameContext.of(frame)
+        frame = context.frame
+        
         try:
             if self.tracker is not None:
                 # Update using OpenCV tracker
@@ -177,7 +182,7 @@ class BatTracker:
                     box = self.track_box
             else:
                 # Manual tracking fallback
-                success, box = self._manual_tracking_update(frame)
+                success, box = self._manual_tracking_update(context)
             
             if success:
                 try:
@@ -218,6 +223,9 @@ class BatTracker:
         if len(self.path_points) < 1:
             return False, None
         
+        context = FrameContext.of(frame)
+        frame = context.frame
+        
         try:
             # Get last known position
             last_x, last_y = self.path_points[-1]
@@ -237,7 +245,7 @@ class BatTracker:
                 return False, last_box
             
             # Get search region
-            roi = frame[y1:y2, x1:x2]
+            roi = context.crop(x1, y1, x2, y2)
             
             # Detect motion in the ROI
             motion_regions = []
@@ -305,16 +313,14 @@ class BatTracker:
             return False, None
     
     def detect_motion_areas(self, frame, threshold=20):
-        """Detect areas with motion"""
+        """Detect areas with motion (frame may be a FrameContext)"""
         try:
-            if frame is None or frame.size == 0:
+            if frame is None:
+                return []
+            context = FrameContext.of(frame)
+            frame = context.frame
+            if frame.size == 0:
                 return []
-                
-            # Convert to grayscale if needed
-            if len(frame.shape) == 3:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = frame
             
             # Apply background subtraction if available
             if self.object_detector is not None:
@@ -336,6 +342,8 @@ class BatTracker:
                 return motion_areas
             else:
                 # Simple frame differencing if no background subtractor
+                # Grayscale only needed here (shared if already computed for this frame)
+                gray = context.gray
                 if hasattr(self, 'prev_gray') and self.prev_gray is not None:
                     frame_diff = cv2.absdiff(gray, self.prev_gray)
                     _, thresh = cv2.threshold(frame_diff, threshold, 255, cv2.THRESH_BINARY)
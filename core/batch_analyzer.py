@@ -0,0 +1,220 @@
+"""
+Offline batch analysis - re-scores recorded swing videos without a camera or window
+
+Videos are decoded with PyAV and fanned out over a process pool, one worker
+per core, each with its own EnhancedSwingTracker (models are loaded once per
+worker, not once per video). Every video is treated as one swing; results
+come back to the parent process, which is the only writer to SwingDataManager.
+YOLO runs on batches of frames (YoloDetector.detect_batch) rather than one
+frame per call.
+"""
+
+import contextlib
+import io
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.m4v')
+
+# Per-process tracker, created by _init_worker
+_worker_tracker = None
+_worker_verbose = False
+_worker_batch_size = 1
+
+
+def find_videos(paths, recursive=True):
+    """Collect video files from files and directories, sorted for a stable swing order"""
+    videos = []
+    for path in paths:
+        if os.path.isfile(path):
+            if path.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(path)
+            continue
+
+        if recursive:
+            for root, _, filenames in os.walk(path):
+                videos.extend(os.path.join(root, f) for f in filenames if f.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isdir(path):
+            videos.extend(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(VIDEO_EXTENSIONS))
+
+    return sorted(videos)
+
+
+def iter_video_frames(video_path):
+    """
+    Decode a video with PyAV
+
+    Yields:
+        (av.VideoFrame, timestamp in seconds) - frames are converted by the caller so
+        only the ones that are actually used pay for the BGR conversion
+    """
+    import av
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'  # Frame + slice threaded decoding
+        fps = float(stream.average_rate) if stream.average_rate else 30.0
+
+        for index, frame in enumerate(container.decode(stream)):
+            timestamp = frame.time if frame.time is not None else index / fps
+            yield frame, timestamp
+
+
+def iter_batches(items, batch_size):
+    """Group an iterator into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(tracker_kwargs, verbose, batch_size):
+    """Process pool initializer - one tracker with single-threaded models per worker"""
+    global _worker_tracker, _worker_verbose, _worker_batch_size
+
+    # One worker per core, so keep every library to one thread
+    cv2.setNumThreads(1)
+    tracker_kwargs = dict(tracker_kwargs, inference_threads=1)
+
+    from .enhanced_swing_tracker import EnhancedSwingTracker
+
+    _worker_verbose = verbose
+    _worker_batch_size = max(1, batch_size)
+    with _quiet(not verbose):
+        _worker_tracker = EnhancedSwingTracker(**tracker_kwargs)
+
+
+@contextlib.contextmanager
+def _quiet(enabled):
+    """Swallow the tracker's per-frame progress prints in workers"""
+    if enabled:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    else:
+        yield
+
+
+def analyze_video(video_path):
+    """
+    Run one video through the worker's tracker as a single swing
+
+    Returns:
+        Dict with the swing data, path points and summary frame (swing_data is
+        None when the video did not contain a valid swing)
+    """
+    from .swing_data_manager import SwingDataManager
+
+    tracker = _worker_tracker
+    start_time = time.time()
+    result = {
+        'video': video_path,
+        'frames': 0,
+        'swing_data': None,
+        'path_points': [],
+        'frame': None,
+        'error': None,
+        'processing_time_s': 0.0
+    }
+
+    try:
+        with _quiet(not _worker_verbose):
+            # Fresh state for every video
+            tracker.clear_current_swing()
+            if tracker.keyframe_scheduler:
+                tracker.keyframe_scheduler.reset()
+
+            last_frame = None
+            for batch in iter_batches(iter_video_frames(video_path), _worker_batch_size):
+                frames = [av_frame.to_ndarray(format='bgr24') for av_frame, _ in batch]
+
+                # One forward pass per model for the whole batch (batch size 1 keeps
+                # per-frame detection, including keyframe scheduling)
+                if _worker_batch_size > 1:
+                    batch_detections = tracker.yolo_detector.detect_batch(frames)
+                else:
+                    batch_detections = [None] * len(frames)
+
+                for frame, (av_frame, timestamp), detections in zip(frames, batch, batch_detections):
+                    if last_frame is None:
+                        tracker.start_tracking_session(timestamp=timestamp)
+
+                    tracker.process_frame(frame, timestamp=timestamp, detections=detections)
+                    last_frame = av_frame
+                    result['frames'] += 1
+
+            points = list(tracker.swing_path_points)
+            if last_frame is not None and tracker.stop_tracking_session():
+                swing_data = SwingDataManager.swing_data_from_metrics(tracker.get_current_metrics())
+                path_points = [tuple(map(int, point)) for point in points]
+
+                from utils.drawing import draw_swing_summary
+                result['swing_data'] = swing_data
+                result['path_points'] = path_points
+                result['frame'] = draw_swing_summary(
+                    last_frame.to_ndarray(format='bgr24'), swing_data, path_points, os.path.basename(video_path)
+                )
+
+            tracker.clear_current_swing()
+
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['processing_time_s'] = time.time() - start_time
+    return result
+
+
+def run_batch_analysis(video_paths, data_manager, tracker_kwargs=None, num_workers=None, batch_size=8,
+                       verbose=False):
+    """
+    Analyze every video in a process pool and store the swings through data_manager
+
+    Args:
+        video_paths: Video files, one swing each
+        data_manager: SwingDataManager that receives the swings (written from this process only)
+        tracker_kwargs: EnhancedSwingTracker keyword arguments for the workers
+        num_workers: Worker processes (default: one per CPU core)
+        batch_size: Frames per YOLO forward pass
+        verbose: Let the tracker's per-frame output through
+
+    Returns:
+        Summary dict with counts and the videos that failed or had no swing
+    """
+    num_workers = max(1, min(num_workers or os.cpu_count() or 1, len(video_paths) or 1))
+    summary = {'videos': len(video_paths), 'swings': 0, 'no_swing': [], 'errors': {}, 'frames': 0}
+    start_time = time.time()
+
+    # spawn - forked copies of an initialized torch / MediaPipe runtime are not safe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context,
+                             initializer=_init_worker, initargs=(tracker_kwargs or {}, verbose, batch_size)) as executor:
+        # map keeps the input order, so swing ids follow the sorted video list
+        for index, result in enumerate(executor.map(analyze_video, video_paths), 1):
+            summary['frames'] += result['frames']
+            name = os.path.basename(result['video'])
+
+            if result['error']:
+                summary['errors'][result['video']] = result['error']
+                print(f"[{index}/{len(video_paths)}] {name}: error - {result['error']}")
+            elif result['swing_data'] is None:
+                summary['no_swing'].append(result['video'])
+                print(f"[{index}/{len(video_paths)}] {name}: no swing detected")
+            else:
+                data_manager.add_swing_to_session(result['swing_data'], result['frame'],
+                                                  result['path_points'], source=result['video'])
+                summary['swings'] += 1
+                print(f"[{index}/{len(video_paths)}] {name}: efficiency "
+                      f"{result['swing_data']['efficiency_score']}% "
+                      f"({result['frames']} frames, {result['processing_time_s']:.1f}s)")
+
+    elapsed = time.time() - start_time
+    summary['elapsed_s'] = elapsed
+    summary['fps'] = summary['frames'] / elapsed if elapsed > 0 else 0
+    return summary
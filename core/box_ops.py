@@ -0,0 +1,183 @@
+"""
+Vectorized bounding-box operations on (N, 4) xyxy arrays
+
+IoU matrices, greedy and soft NMS and weighted box fusion, shared by the
+CV bat detector, the YOLO detector (merging results of several models or
+ROI passes), the ONNX backend and multi-person tracking. Every loop runs
+once per kept box or cluster, never once per pair of candidates.
+"""
+
+import numpy as np
+
+
+def as_boxes(boxes):
+    """(N, 4) float64 array from boxes given as an array or a list of 4-tuples"""
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def box_area(boxes):
+    boxes = as_boxes(boxes)
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """(len(a), len(b)) IoU of two xyxy box sets (0 where the union is empty)"""
+    a = as_boxes(boxes_a)
+    b = as_boxes(boxes_b)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    union = box_area(a)[:, None] + box_area(b)[None, :] - intersection
+    return np.where(union > 0, intersection / np.where(union > 0, union, 1.0), 0.0)
+
+
+def _iou_one(columns, areas, i, others):
+    """IoU of box i against the boxes at indices others (for the per-kept-box loops)"""
+    x1, y1, x2, y2 = columns
+    w = np.clip(np.minimum(x2[i], x2[others]) - np.maximum(x1[i], x1[others]), 0, None)
+    h = np.clip(np.minimum(y2[i], y2[others]) - np.maximum(y1[i], y1[others]), 0, None)
+    intersection = w * h
+
+    # Non-empty intersection implies union >= intersection > 0; empty unions give 0
+    return intersection / np.maximum(areas[i] + areas[others] - intersection, 1e-12)
+
+
+def _score_order(scores):
+    """Indices by descending score; equal scores keep their input order"""
+    return np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+
+
+def _offset_by_class(boxes, class_ids):
+    """Shift each class into its own coordinate range so boxes of different classes never overlap"""
+    if class_ids is None or len(boxes) == 0:
+        return boxes
+    span = boxes.max() - min(boxes.min(), 0) + 1
+    return boxes + (np.asarray(class_ids, dtype=np.float64) * span)[:, None]
+
+
+def nms(boxes, scores, iou_threshold=0.5, max_detections=None, class_ids=None):
+    """
+    Greedy non-maximum suppression
+
+    A box is dropped when its IoU with an already kept, higher-scoring box is
+    above iou_threshold.
+
+    Args:
+        class_ids: Per-box class ids - boxes only suppress boxes of the same class
+        max_detections: Stop once this many boxes are kept
+
+    Returns:
+        Kept indices, highest score first
+    """
+    boxes = _offset_by_class(as_boxes(boxes), class_ids)
+    columns = tuple(boxes.T.copy())
+    areas = box_area(boxes)
+    order = _score_order(scores)
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+        order = order[1:][_iou_one(columns, areas, i, order[1:]) <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def soft_nms(boxes, scores, iou_threshold=0.3, sigma=0.5, method='gaussian', score_threshold=0.001,
+             max_detections=None, class_ids=None):
+    """
+    Soft-NMS - overlapping boxes are down-weighted instead of dropped
+
+    Args:
+        iou_threshold: Overlap above which 'linear' decay applies
+        sigma: Gaussian decay width ('gaussian' decays every overlap)
+        method: 'gaussian' or 'linear'
+        score_threshold: Boxes whose decayed score falls below this are dropped
+
+    Returns:
+        (kept indices, their decayed scores), highest decayed score first
+    """
+    boxes = _offset_by_class(as_boxes(boxes), class_ids)
+    columns = tuple(boxes.T.copy())
+    areas = box_area(boxes)
+    remaining = np.arange(len(boxes))
+    current = np.asarray(scores, dtype=np.float64).copy()
+
+    keep = []
+    kept_scores = []
+    while remaining.size > 0:
+        best = int(np.argmax(current[remaining]))
+        i = remaining[best]
+        if current[i] < score_threshold:
+            break
+        keep.append(i)
+        kept_scores.append(current[i])
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+
+        remaining = np.delete(remaining, best)
+        iou = _iou_one(columns, areas, i, remaining)
+        if method == 'linear':
+            decay = np.where(iou > iou_threshold, 1.0 - iou, 1.0)
+        else:
+            decay = np.exp(-(iou * iou) / sigma)
+        current[remaining] *= decay
+
+    return np.array(keep, dtype=np.int64), np.array(kept_scores, dtype=np.float64)
+
+
+def weighted_box_fusion(boxes, scores, iou_threshold=0.55, score_threshold=0.0, num_sources=1, class_ids=None):
+    """
+    Weighted box fusion - overlapping boxes (e.g. from several models or ROI
+    passes) are averaged, weighted by score, instead of keeping only the best
+
+    Args:
+        iou_threshold: IoU with a cluster's fused box needed to join the cluster
+        score_threshold: Boxes at or below this score are ignored
+        num_sources: Number of models / passes the boxes came from; clusters
+            found by fewer sources get a proportionally lower score
+        class_ids: Per-box class ids - only boxes of the same class are fused
+
+    Returns:
+        (fused boxes (M, 4), fused scores (M,), member indices of each cluster),
+        highest fused score first
+    """
+    boxes = as_boxes(boxes)
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.zeros(len(boxes), dtype=np.int64) if class_ids is None else np.asarray(class_ids)
+
+    clusters = []
+    fused = np.empty((0, 4))
+    fused_labels = []
+    for i in _score_order(scores):
+        if scores[i] <= score_threshold:
+            break
+
+        match = -1
+        if len(clusters):
+            iou = iou_matrix(boxes[i], fused)[0]
+            iou[np.asarray(fused_labels) != labels[i]] = 0.0
+            best = int(np.argmax(iou))
+            if iou[best] > iou_threshold:
+                match = best
+
+        if match < 0:
+            clusters.append([i])
+            fused = np.vstack([fused, boxes[i]])
+            fused_labels.append(labels[i])
+        else:
+            members = clusters[match]
+            members.append(i)
+            weights = scores[members]
+            fused[match] = (boxes[members] * weights[:, None]).sum(axis=0) / weights.sum()
+
+    fused_scores = np.array([scores[members].mean() * min(len(members), num_sources) / num_sources
+                             for members in clusters], dtype=np.float64)
+    order = _score_order(fused_scores)
+    return fused[order], fused_scores[order], [np.array(clusters[i], dtype=np.int64) for i in order]
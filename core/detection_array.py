@@ -0,0 +1,168 @@
+"""
+Compact detection storage - one structured NumPy array per detection group,
+with the usual per-detection dicts created lazily only when accessed
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+DETECTION_DTYPE = np.dtype([
+    ('x1', np.int32),
+    ('y1', np.int32),
+    ('x2', np.int32),
+    ('y2', np.int32),
+    ('confidence', np.float32),
+    ('class_id', np.int32),
+    ('group', np.int16)
+])
+
+
+def to_numpy(values):
+    """Convert a torch tensor or array-like to a NumPy array (one device->host copy)"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+class DetectionArray(Sequence):
+    """
+    Sequence of detection dicts backed by a structured array
+
+    Each record points at a group - a metadata dict shared by every
+    detection that came out of the same model pass:
+        class_name: fixed class name (e.g. 'bat'), or None to look it up in class_names
+        class_names: model id -> name mapping
+        detection_type / model_source: copied into each dict
+        frame_area: if set, 'frame_area' and 'area_ratio' are added to each dict
+    """
+
+    def __init__(self, records=None, groups=None):
+        self.records = records if records is not None else np.empty(0, dtype=DETECTION_DTYPE)
+        self.groups = groups if groups is not None else []
+        self._dicts = {}
+
+    @classmethod
+    def from_arrays(cls, xyxy, confidence, class_ids, group):
+        """Build from (N, 4) int boxes, (N,) confidences and (N,) class ids with one metadata group"""
+        records = np.empty(len(confidence), dtype=DETECTION_DTYPE)
+        records['x1'] = xyxy[:, 0]
+        records['y1'] = xyxy[:, 1]
+        records['x2'] = xyxy[:, 2]
+        records['y2'] = xyxy[:, 3]
+        records['confidence'] = confidence
+        records['class_id'] = class_ids
+        records['group'] = 0
+        return cls(records, [group])
+
+    @classmethod
+    def concatenate(cls, arrays):
+        """Join several DetectionArrays, keeping each one's metadata"""
+        records = []
+        groups = []
+        for array in arrays:
+            if len(array) == 0:
+                continue
+            shifted = array.records.copy()
+            shifted['group'] += len(groups)
+            records.append(shifted)
+            groups.extend(array.groups)
+
+        if not records:
+            return cls()
+        return cls(np.concatenate(records), groups)
+
+    # Array views
+    @property
+    def xyxy(self):
+        return np.stack([self.records['x1'], self.records['y1'],
+                         self.records['x2'], self.records['y2']], axis=1)
+
+    @property
+    def confidence(self):
+        return self.records['confidence']
+
+    @property
+    def class_ids(self):
+        return self.records['class_id']
+
+    # Sequence API - dicts are built on first access and cached
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DetectionArray(self.records[index], self.groups)
+
+        if index < 0:
+            index += len(self.records)
+        if not 0 <= index < len(self.records):
+            raise IndexError("detection index out of range")
+
+        detection = self._dicts.get(index)
+        if detection is None:
+            detection = self._build_dict(self.records[index])
+            self._dicts[index] = detection
+        return detection
+
+    def __iter__(self):
+        for i in range(len(self.records)):
+            yield self[i]
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"DetectionArray({len(self)} detections)"
+
+    def _build_dict(self, record):
+        group = self.groups[int(record['group'])]
+
+        x1, y1, x2, y2 = int(record['x1']), int(record['y1']), int(record['x2']), int(record['y2'])
+        class_id = int(record['class_id'])
+        width = x2 - x1
+        height = y2 - y1
+        area = width * height
+
+        class_name = group.get('class_name')
+        if class_name is None:
+            class_name = group.get('class_names', {}).get(class_id, f'class_{class_id}')
+
+        detection = {
+            'class_id': class_id,
+            'class_name': class_name,
+            'confidence': float(record['confidence']),
+            'bbox': (x1, y1, x2, y2),
+            'center': ((x1 + x2) // 2, (y1 + y2) // 2),
+            'width': width,
+            'height': height,
+            'area': area,
+            'aspect_ratio': height / width if width > 0 else 0,
+            'detection_type': group.get('detection_type'),
+            'model_source': group.get('model_source')
+        }
+
+        frame_area = group.get('frame_area')
+        if frame_area:
+            detection['frame_area'] = frame_area
+            detection['area_ratio'] = area / frame_area
+
+        return detection
+
+    def best(self, min_confidence=0.0):
+        """Highest-confidence detection at or above min_confidence, or None"""
+        if len(self.records) == 0:
+            return None
+
+        confidence = self.records['confidence'].astype(np.float64)
+        valid = np.flatnonzero(confidence >= min_confidence)
+        if len(valid) == 0:
+            return None
+        return self[int(valid[np.argmax(confidence[valid])])]
+
+    def to_list(self):
+        """Materialize every detection as a dict"""
+        return list(self)
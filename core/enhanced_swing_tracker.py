@@ -11,12 +11,14 @@ from dataclasses import dataclass
 from typing import Optional, List, Tuple, Dict
 
 # Import your modules
-from .yolo_detector import YoloDetector
-from .pose_analyzer import PoseAnalyzer
+from .model_registry import acquire_pose_analyzer, acquire_yolo_detector, release
 from .swing_analyzer import SwingAnalyzer
 from .impact_detector import ImpactDetector
 from .heatmap_generator import HeatmapGenerator
 from .bat_visualizer import BatVisualizer
+from .keyframe_scheduler import KeyframeScheduler
+from .inference_arbiter import InferenceArbiter
+from .bat_detection_cascade import BatDetectionCascade
 
 @dataclass
 class SwingMetrics:
@@ -31,18 +33,86 @@ class SwingMetrics:
     power_score: int = 0
     follow_through: int = 0
     pose_stability: int = 0
+    swing_phase: str = "stance"
+    hip_shoulder_separation: float = 0.0   # Max separation angle (deg) during the swing
+    hip_lead_ms: Optional[float] = None    # Peak hip rotation speed ahead of the shoulders
 
 class EnhancedSwingTracker:
-    def __init__(self, custom_bat_model_path=None, enable_pose=True):
-        """Initialize the Enhanced Swing Tracker"""
+    def __init__(self, custom_bat_model_path=None, enable_pose=True, yolo_execution_mode='sequential',
+                 fused_model_path=None, keyframe_interval=1, roi_inference=False,
+                 inference_backend='ultralytics', inference_threads=None, pose_person_crop=False,
+                 pose_options=None, model_key=None, multi_person_pose=False, max_pose_people=4,
+                 warmup=True, inference_gating=False, bat_cascade=True, cascade_options=None):
+        """
+        Initialize the Enhanced Swing Tracker
+        
+        Args:
+            keyframe_interval: Run YOLO every Nth frame and propagate boxes with
+                optical flow in between (1 = detect on every frame)
+            roi_inference: Run the bat model on a crop around the last batter/bat box
+            inference_backend: 'ultralytics' (PyTorch) or 'onnx' (ONNX Runtime CPU)
+            inference_threads: Intra-op threads per YOLO model (None = backend default)
+            pose_person_crop: Run pose on a crop around the best person detection
+                instead of the full frame
+            pose_options: PoseAnalyzer keyword arguments (model complexity, strides,
+                smoothing); full quality is only used while a swing is tracked
+            model_key: Model registry key for this tracker's stream (e.g. a camera id).
+                Models come from the process-wide registry, so trackers with the same
+                settings share one detector; the pose analyzer and an ROI detector keep
+                per-stream state and are only shared between trackers with the same key
+            multi_person_pose: Track every YOLO person with its own pose stream and use
+                the batter's (the person holding the bat, else the largest) for the swing
+            max_pose_people: People that get pose in multi-person mode
+            warmup: Warm up the models now; with False call warmup() before the
+                first frame (e.g. from a background thread while the camera opens)
+            inference_gating: Between swings, run only a motion gate (idle) or person
+                detection (armed); full YOLO + pose only while a batter is swinging
+            bat_cascade: While a swing is tracked and the YOLO bat is weak or missing,
+                fall back to CV line detection around the wrists, then to the bat
+                extrapolated from the pose
+            cascade_options: BatDetectionCascade keyword arguments
+        """
         print("🚀 Initializing Enhanced Swing Tracker...")
         
-        # Initialize all detection systems
-        self.yolo_detector = YoloDetector(custom_bat_model_path)
-        self.pose_analyzer = PoseAnalyzer() if enable_pose else None
+        # Initialize all detection systems (shared through the model registry)
+        self.yolo_detector = acquire_yolo_detector(
+            key=model_key if roi_inference else None,
+            custom_bat_model_path=custom_bat_model_path,
+            execution_mode=yolo_execution_mode,
+            fused_model_path=fused_model_path,
+            roi_inference=roi_inference,
+            backend=inference_backend,
+            num_threads=inference_threads,
+            warmup=warmup
+        )
+        self.pose_analyzer = None
+        self.multi_pose = None
+        if enable_pose and multi_person_pose:
+            from .multi_pose import MultiPersonPoseTracker
+            self.multi_pose = MultiPersonPoseTracker(pose_options, max_people=max_pose_people)
+        elif enable_pose:
+            self.pose_analyzer = acquire_pose_analyzer(key=model_key, **(pose_options or {}))
+        self.pose_person_crop = pose_person_crop
         self.swing_analyzer = SwingAnalyzer()
         self.impact_detector = ImpactDetector()
         
+        # YOLO -> CV in a wrist ROI -> pose extrapolation, while a swing is tracked
+        self.bat_cascade = BatDetectionCascade(self.yolo_detector, **(cascade_options or {})) if bat_cascade else None
+        
+        # Keyframe scheduling - YOLO on keyframes, optical flow in between
+        self.keyframe_scheduler = None
+        if keyframe_interval > 1:
+            self.keyframe_scheduler = KeyframeScheduler(self.yolo_detector, max_interval=keyframe_interval)
+        
+        # Idle / armed / active inference state machine
+        self.arbiter = None
+        if inference_gating:
+            self.arbiter = InferenceArbiter(
+                self.yolo_detector,
+                full_detect=self.keyframe_scheduler.detect if self.keyframe_scheduler else None,
+                on_activate=self.keyframe_scheduler.reset if self.keyframe_scheduler else None
+            )
+        
         # Tracking state
         self.is_tracking = False
         self.swing_in_progress = False
@@ -59,44 +129,103 @@ class EnhancedSwingTracker:
         self.best_bat_detection = None
         self.best_ball_detection = None
         self.last_impact_point = None
+        self.current_position = None  # Mouse position (main.py), the last tracking fallback
+        
+        if warmup and self.pose_analyzer:
+            self.pose_analyzer.warmup()
         
         print("✅ Enhanced Swing Tracker initialized!")
 
-    def process_frame(self, frame):
-        """Process a single frame and return detection results"""
-        current_time = time.time()
+    def warmup(self):
+        """Warm up the detector and pose graphs (for trackers created with warmup=False)"""
+        self.yolo_detector.warmup()
+        if self.pose_analyzer:
+            self.pose_analyzer.warmup()
+
+    def process_frame(self, frame, timestamp=None, detections=None):
+        """
+        Process a single frame and return detection results
+        
+        Args:
+            timestamp: Frame time in seconds (e.g. from a video file), defaults to now
+            detections: Precomputed detections for this frame (e.g. from
+                YoloDetector.detect_batch); YOLO is not run again
+        """
+        current_time = time.time() if timestamp is None else timestamp
         frame_analyzed = False
         
-        # Run YOLO detection
-        detections = self.yolo_detector.detect_objects(frame)
-        
-        # Run pose analysis
-        pose_data = None
-        if self.pose_analyzer:
-            pose_data = self.pose_analyzer.analyze_pose(frame)
-            if pose_data['is_detected']:
-                self.pose_history.append(pose_data)
-                frame = self.pose_analyzer.draw_pose(frame, pose_data)
+        # Run YOLO detection (or optical-flow propagation between keyframes)
+        run_pose = True
+        if detections is None:
+            if self.arbiter:
+                # Only as much inference as the lane's state needs; a tracked swing keeps it active
+                self.arbiter.set_tracking(self.is_tracking)
+                detections = self.arbiter.detect(frame)
+                run_pose = self.arbiter.run_pose
+            elif self.keyframe_scheduler:
+                detections = self.keyframe_scheduler.detect(frame)
+            else:
+                detections = self.yolo_detector.detect_objects(frame)
+        elif self.arbiter:
+            # Precomputed detections follow the arbiter's decision for this frame (see gate_frame)
+            run_pose = self.arbiter.run_pose
         
         # Get best bat and ball detections
         best_bat = self.yolo_detector.get_best_bat_detection(detections, min_confidence=0.01)
         best_ball = self.yolo_detector.get_best_ball_detection(detections, min_confidence=0.01)
         
+        # Run pose analysis
+        pose_data = None
+        poses = None
+        if self.multi_pose and run_pose:
+            # Pose per person; the batter's stream drives the swing
+            poses = self.multi_pose.update(frame, detections['persons'], current_time, active=self.is_tracking)
+            if best_bat and not self.is_tracking:
+                # Only re-pick the batter between swings so the swing keeps one pose history
+                self.multi_pose.set_primary_at(best_bat['center'])
+            pose_data = poses.get(self.multi_pose.primary_id)
+        elif self.pose_analyzer and run_pose:
+            # Full pose rate / quality only while a swing is being tracked
+            self.pose_analyzer.set_active(self.is_tracking)
+            
+            person_bbox = None
+            if self.pose_person_crop:
+                best_person = self.yolo_detector.get_best_person_detection(detections)
+                person_bbox = best_person['bbox'] if best_person else None
+            pose_data = self.pose_analyzer.analyze_pose(frame, person_bbox, timestamp=current_time)
+        
+        # Bat fallbacks while tracking - before anything is drawn on the frame
+        bat_stage = 'yolo' if best_bat else None
+        if self.bat_cascade and self.is_tracking:
+            best_bat = self.bat_cascade.detect(frame, detections, pose_data)
+            bat_stage = self.bat_cascade.last_stage
+        
+        # Draw pose
+        if poses is not None:
+            frame = self.multi_pose.draw_poses(frame, poses)
+        elif pose_data and pose_data['is_detected'] and self.pose_analyzer:
+            frame = self.pose_analyzer.draw_pose(frame, pose_data)
+        
+        if pose_data and pose_data['is_detected']:
+            self.pose_history.append(pose_data)
+            if self.is_tracking and pose_data['kinematics']:
+                self._update_pose_kinematics(pose_data['kinematics'])
+        
         # Track movement if tracking is active
         if self.is_tracking:
             tracking_point = None
             
             # Try to get tracking point from different sources
-            if hasattr(self, 'current_position'):
-                # Mouse tracking
-                tracking_point = self.current_position
-            elif best_bat:
-                # Bat detection tracking
+            if best_bat:
+                # Bat detection tracking (YOLO or a cascade fallback)
                 tracking_point = best_bat['center']
             elif pose_data and pose_data['is_detected'] and len(pose_data['landmarks']) > 16:
                 # Use wrist position from pose as fallback
                 right_wrist = pose_data['landmarks'][16]  # Right wrist landmark
                 tracking_point = right_wrist
+            elif self.current_position is not None:
+                # Mouse tracking only when nothing was detected
+                tracking_point = self.current_position
             
             if tracking_point:
                 # Always add first point
@@ -136,6 +265,11 @@ class EnhancedSwingTracker:
         # Draw detections on frame
         if best_bat or best_ball:
             frame = self.yolo_detector.draw_detections(frame.copy(), detections)
+        if best_bat and bat_stage not in ('yolo', 'weak'):
+            # Fallback bats are not among the YOLO detections
+            x1, y1, x2, y2 = map(int, best_bat['bbox'])
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 2)
+            cv2.putText(frame, f"Bat ({bat_stage})", (x1, max(15, y1 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 2)
         
         # Return all detection data for UI to handle
         return {
@@ -145,9 +279,62 @@ class EnhancedSwingTracker:
             'best_ball': best_ball,
             'swing_path': list(self.swing_path_points),
             'metrics': self.get_current_metrics(),
-            'impact_point': self.last_impact_point
+            'impact_point': self.last_impact_point,
+            'inference_state': self.arbiter.state if self.arbiter else 'active',
+            'bat_stage': bat_stage
         }
 
+    def gate_frame(self, frame, defer_persons=False):
+        """
+        Advance the inference arbiter for a frame whose full detection runs elsewhere
+        (e.g. batched across lanes); pass the result to process_frame as detections
+        
+        Args:
+            defer_persons: Return PERSONS_NEEDED for an armed frame due for person
+                detection instead of running it; finish it with gate_persons()
+        
+        Returns:
+            Detections for an idle or armed frame, None when the frame needs full detection
+        """
+        if not self.arbiter:
+            return None
+        self.arbiter.set_tracking(self.is_tracking)
+        return self.arbiter.advance(frame, defer_persons=defer_persons)
+    
+    def gate_persons(self, frame, person_detections):
+        """
+        Finish a frame gate_frame() left at PERSONS_NEEDED with its person
+        detections (YoloDetector.detect_persons_batch at arbiter.person_imgsz)
+        
+        Returns:
+            Same as gate_frame()
+        """
+        return self.arbiter.resume(person_detections, frame.shape[0])
+
+    def _update_pose_kinematics(self, kinematics):
+        """Carry the streaming pose kinematics into the current swing metrics"""
+        self.current_swing.swing_phase = kinematics['phase']
+        
+        # The kinematics reset their peaks when the batter settles, so keep the
+        # swing's own maximum here
+        timing = kinematics['separation_timing']
+        if timing['max_separation'] > self.current_swing.hip_shoulder_separation:
+            self.current_swing.hip_shoulder_separation = timing['max_separation']
+        if timing['hip_lead_ms'] is not None:
+            self.current_swing.hip_lead_ms = timing['hip_lead_ms']
+
+    def close(self):
+        """Hand the shared models back to the registry (closed with their last user)"""
+        if self.yolo_detector is not None:
+            release(self.yolo_detector)
+            self.yolo_detector = None
+        if self.pose_analyzer is not None:
+            release(self.pose_analyzer)
+            self.pose_analyzer = None
+        if self.multi_pose is not None:
+            self.multi_pose.close()
+            self.multi_pose = None
+
     def update_current_position(self, x, y):
         """Update the current tracking position"""
         self.current_position = (x, y)
@@ -285,7 +472,7 @@ class EnhancedSwingTracker:
             frame = self.impact_detector.draw_impact(frame)
         
         # 6. Draw pose analysis in left corner
-        if self.show_pose_overlay and pose_data and self.pose_analyzer:
+        if self.show_pose_overlay and pose_data and (self.pose_analyzer or self.multi_pose):
             # Left corner panel for pose
             panel_height = 150
             panel_width = 200
@@ -312,6 +499,14 @@ class EnhancedSwingTracker:
                 stability = sum(pose['stability_score'] for pose in self.pose_history) / len(self.pose_history)
                 cv2.putText(frame, f"Stability: {stability:.0f}%", (padding + 10, y_pos),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, self._get_score_color(stability), 1)
+                y_pos += 25
+            
+            if pose_data.get('is_detected'):
+                cv2.putText(frame, f"Phase: {pose_data['swing_phase'].replace('_', ' ').title()}",
+                           (padding + 10, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                y_pos += 25
+                cv2.putText(frame, f"Separation: {self.current_swing.hip_shoulder_separation:.0f} deg",
+                           (padding + 10, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
         # 7. Draw swing analysis in right corner
         if self.show_swing_analysis:
@@ -511,7 +706,10 @@ class EnhancedSwingTracker:
             'follow_through': self.current_swing.follow_through,
             'pose_stability': self.current_swing.pose_stability,
             'sweet_spot_contact': self.current_swing.sweet_spot_contact,
-            'impact_point': self.last_impact_point
+            'impact_point': self.last_impact_point,
+            'swing_phase': self.current_swing.swing_phase,
+            'hip_shoulder_separation': self.current_swing.hip_shoulder_separation,
+            'hip_lead_ms': self.current_swing.hip_lead_ms
         }
 
     def _update_metrics_realtime(self):
@@ -565,13 +763,13 @@ class EnhancedSwingTracker:
         # Set sweet spot for significant swings
         self.current_swing.sweet_spot_contact = total_distance > 100
 
-    def start_tracking_session(self):
-        """Start tracking session"""
+    def start_tracking_session(self, timestamp=None):
+        """Start tracking session (timestamp defaults to now)"""
         print("🎯 Starting tracking session...")
         self.is_tracking = True
         self.clear_current_swing()
         # Initialize timestamps with current time
-        self.timestamps.append(time.time())
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
         print("✅ Tracking session started")
 
     def stop_tracking_session(self):
@@ -607,3 +805,4 @@ class EnhancedSwingTracker:
         self.best_bat_detection = None
         self.best_ball_detection = None
         self.last_impact_point = None
+        self.current_position = None
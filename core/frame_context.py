@@ -0,0 +1,91 @@
+"""
+Per-frame preprocessing cache
+
+The classic CV detectors (AdvancedBatDetector, BatTracker, ImpactDetector)
+each started from the same grayscale conversion, blur and Canny pass. A
+FrameContext computes every intermediate once, on first use, and hands the
+same array to everyone who asks for it during that frame.
+
+Results are read-only and only valid for the frame the context was built
+from - build the context before drawing overlays onto the frame, or from an
+untouched copy.
+"""
+
+import cv2
+
+
+class FrameContext:
+    """Lazily computed grayscale, blur, edge, threshold and pyramid images of one frame"""
+
+    def __init__(self, frame, gray=None):
+        """
+        Args:
+            frame: BGR (or already grayscale) frame
+            gray: Grayscale version of frame if the caller already has it
+        """
+        self.frame = frame
+        self._gray = gray
+        self._cache = {}
+
+    @staticmethod
+    def of(frame):
+        """The context itself, or a new context for a plain frame"""
+        return frame if isinstance(frame, FrameContext) else FrameContext(frame)
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = self.frame if self.frame.ndim == 2 else cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def _get(self, key, build):
+        value = self._cache.get(key)
+        if value is None:
+            value = build()
+            self._cache[key] = value
+        return value
+
+    def pyramid(self, level):
+        """Grayscale image halved level times with cv2.pyrDown (level 0 is gray)"""
+        if level <= 0:
+            return self.gray
+        return self._get(('pyramid', level), lambda: cv2.pyrDown(self.pyramid(level - 1)))
+
+    def blurred(self, ksize=5, level=0):
+        """Gaussian-blurred grayscale image"""
+        return self._get(('blurred', ksize, level),
+                         lambda: cv2.GaussianBlur(self.pyramid(level), (ksize, ksize), 0))
+
+    def edges(self, low, high, blur=None, aperture=3, level=0):
+        """
+        Canny edge map
+
+        Args:
+            low, high: Canny hysteresis thresholds
+            blur: Gaussian kernel size applied first (None = edges of the plain gray image)
+            aperture: Sobel aperture size
+            level: Pyramid level to run on
+        """
+        def build():
+            source = self.blurred(blur, level) if blur else self.pyramid(level)
+            return cv2.Canny(source, low, high, apertureSize=aperture)
+
+        return self._get(('edges', low, high, blur, aperture, level), build)
+
+    @property
+    def otsu(self):
+        """Otsu-thresholded binary image of gray"""
+        return self._get('otsu', lambda: cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+
+    def crop(self, x1, y1, x2, y2):
+        """
+        Context for a region of the frame; shares the parent's grayscale image
+        when it has already been computed (filters and thresholds are not local,
+        so the region computes its own)
+        """
+        gray = self._gray[y1:y2, x1:x2] if self._gray is not None else None
+        return FrameContext(self.frame[y1:y2, x1:x2], gray)
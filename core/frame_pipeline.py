@@ -0,0 +1,221 @@
+"""
+Threaded capture -> inference -> render pipeline
+Keeps camera I/O, model inference and overlay drawing off each other's critical path
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded FIFO queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=2):
+        self.maxsize = max(1, maxsize)
+        self._items = deque()
+        self._condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        """Add an item, dropping the oldest one if the queue is full"""
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None on timeout / close"""
+        with self._condition:
+            if not self._items and not self.closed:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        """Wake up any waiting consumer"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class PipelineStage(threading.Thread):
+    """
+    One worker thread of the pipeline
+
+    Pulls from input_queue (or calls work_fn with no argument for a source
+    stage), pushes non-None results to output_queue and keeps its own
+    FPS / latency / queue-depth counters.
+    """
+
+    def __init__(self, name, work_fn, input_queue=None, output_queue=None, fps_window=30):
+        super().__init__(name=name, daemon=True)
+        self.work_fn = work_fn
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = threading.Event()
+
+        # Performance tracking
+        self.processed = 0
+        self.errors = 0
+        self.last_error = None
+        self.timestamps = deque(maxlen=fps_window)
+        self.latencies = deque(maxlen=fps_window)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.input_queue is not None:
+                item = self.input_queue.get(timeout=0.1)
+                if item is None:
+                    continue
+
+            start_time = time.perf_counter()
+            try:
+                if self.input_queue is not None:
+                    result = self.work_fn(item)
+                else:
+                    result = self.work_fn()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                continue
+
+            if result is None:
+                continue
+
+            end_time = time.perf_counter()
+            self.processed += 1
+            self.timestamps.append(end_time)
+            self.latencies.append((end_time - start_time) * 1000)
+
+            if self.output_queue is not None:
+                self.output_queue.put(result)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def get_stats(self):
+        """Get FPS, latency and queue-depth counters for this stage"""
+        timestamps = list(self.timestamps)
+        fps = 0
+        if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+            fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+        latencies = list(self.latencies)
+        return {
+            'fps': fps,
+            'avg_latency_ms': sum(latencies) / len(latencies) if latencies else 0,
+            'processed': self.processed,
+            'errors': self.errors,
+            'queue_depth': len(self.input_queue) if self.input_queue is not None else 0,
+            'dropped': self.input_queue.dropped if self.input_queue is not None else 0
+        }
+
+
+class FramePipeline:
+    """
+    Capture thread -> inference worker -> render worker, connected by
+    bounded drop-oldest queues.
+
+    Display stays on the caller's thread: OpenCV HighGUI (imshow/waitKey)
+    must be driven from the thread that owns the window, so the render
+    stage hands finished frames to get_display_frame().
+    """
+
+    def __init__(self, capture, process_fn, render_fn, queue_size=2):
+        """
+        Args:
+            capture: Object with a cv2.VideoCapture-like read() method
+            process_fn: Called with a frame and its capture timestamp (time.time()),
+                returns inference results
+            render_fn: Called with inference results, returns the frame to display
+            queue_size: Maximum number of items buffered between stages
+        """
+        self.capture = capture
+        self.process_fn = process_fn
+        self.render_fn = render_fn
+
+        self.frame_queue = DropOldestQueue(queue_size)
+        self.results_queue = DropOldestQueue(queue_size)
+        self.display_queue = DropOldestQueue(queue_size)
+
+        # Most recent raw frame, for callers that need a frame outside the pipeline
+        self.latest_frame = None
+        self.frame_id = 0
+        self.read_failures = 0
+
+        self.stages = [
+            PipelineStage("capture", self._capture_step, None, self.frame_queue),
+            PipelineStage("inference", self._inference_step, self.frame_queue, self.results_queue),
+            PipelineStage("render", self._render_step, self.results_queue, self.display_queue),
+        ]
+        self.running = False
+
+    def _capture_step(self):
+        ret, frame = self.capture.read()
+        if not ret:
+            self.read_failures += 1
+            time.sleep(0.005)
+            return None
+
+        self.frame_id += 1
+        self.latest_frame = frame
+        return {
+            'frame_id': self.frame_id,
+            'timestamp': time.time(),
+            'frame': frame
+        }
+
+    def _inference_step(self, packet):
+        # Capture time, not now - the frame may have waited in the queue
+        packet['results'] = self.process_fn(packet['frame'], packet['timestamp'])
+        return packet
+
+    def _render_step(self, packet):
+        packet['display_frame'] = self.render_fn(packet['results'])
+        return packet
+
+    def start(self):
+        """Start all pipeline threads"""
+        if self.running:
+            return
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=1.0):
+        """Stop all pipeline threads"""
+        if not self.running:
+            return
+        self.running = False
+        for stage in self.stages:
+            stage.stop()
+        for queue in (self.frame_queue, self.results_queue, self.display_queue):
+            queue.close()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def get_display_frame(self, timeout=0.05):
+        """Get the next rendered frame, or None if nothing is ready yet"""
+        packet = self.display_queue.get(timeout=timeout)
+        if packet is None:
+            return None
+        return packet['display_frame']
+
+    def get_stats(self):
+        """Get per-stage FPS and queue-depth counters"""
+        stats = {stage.name: stage.get_stats() for stage in self.stages}
+        stats['display'] = {
+            'queue_depth': len(self.display_queue),
+            'dropped': self.display_queue.dropped
+        }
+        stats['capture']['read_failures'] = self.read_failures
+        return stats
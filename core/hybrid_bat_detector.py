@@ -1,6 +1,10 @@
 import cv2
 import numpy as np
 import math
+import time
+
+from .box_ops import nms
+from .frame_context import FrameContext
 
 class AdvancedBatDetector:
     """Advanced CV-based bat detector using line detection and morphology"""
@@ -19,63 +23,94 @@ class AdvancedBatDetector:
         self.min_line_length = 100    # Minimum line length for bat
         self.max_line_gap = 20        # Maximum gap in line
         
-        print("✅ Advanced CV Bat Detector ready!")
-    
-    def detect_bat_advanced_cv(self, frame):
-        """Detect bat using advanced computer vision techniques"""
-        detections = []
+        # Multi-scale Hough search - coarse pass on a downsampled edge pyramid level,
+        # refined at full resolution around the longest coarse lines
+        self.hough_coarse_width = 640       # Downsample until the frame is at most this wide
+        self.hough_max_level = 2            # 1/4 scale at most
+        self.min_coarse_line_length = 30    # Stop downsampling before bats get shorter than this
+        self.hough_refine_lines = 5         # Coarse lines refined at full resolution
+        self.bat_person_ratio = (0.25, 0.8) # Bat length range as a share of the batter's height
         
-        # Method 1: Hough Line Transform (most effective for bats)
-        line_detections = self._detect_with_hough_lines(frame)
-        detections.extend(line_detections)
+        # Elongated kernel for morphological operations (built once)
+        self.morph_kernel_length = 40
+        self.morph_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (self.morph_kernel_length, 3))
         
-        # Method 2: Morphological operations for elongated objects
-        morph_detections = self._detect_with_morphology(frame)
-        detections.extend(morph_detections)
+        # Bresenham offset tables of the edge-line search, keyed by end-point offset
+        self._line_offsets = {}
         
-        # Method 3: Edge density analysis along lines
-        edge_detections = self._detect_with_edge_lines(frame)
-        detections.extend(edge_detections)
+        print("✅ Advanced CV Bat Detector ready!")
+    
+    def detect_bat_advanced_cv(self, frame, methods=None, time_budget_ms=None, person_height=None):
+        """
+        Detect bat using advanced computer vision techniques
+        
+        Args:
+            frame: BGR frame or a FrameContext shared with other detectors
+            methods: Subset of 'hough', 'morphology', 'edge_lines' to run, in
+                that order (default: all three)
+            time_budget_ms: Stop before the next method once this much time is spent
+            person_height: Batter's (YOLO person box) height in pixels - scales the
+                Hough bat length limits to the batter's distance from the camera
+        """
+        detections = []
+        start_time = time.perf_counter()
+        
+        # Grayscale, blur and edge maps are computed once for all methods
+        context = FrameContext.of(frame)
+        
+        stages = (
+            ('hough', lambda context: self._detect_with_hough_lines(context, person_height)),  # Method 1: Hough Line Transform (most effective for bats)
+            ('morphology', self._detect_with_morphology),    # Method 2: Morphological operations for elongated objects
+            ('edge_lines', self._detect_with_edge_lines),    # Method 3: Edge density analysis along lines
+        )
+        for name, method in stages:
+            if methods is not None and name not in methods:
+                continue
+            if time_budget_ms is not None and (time.perf_counter() - start_time) * 1000 >= time_budget_ms:
+                break
+            detections.extend(method(context))
         
         # Filter and combine detections
         filtered_detections = self._filter_and_rank_detections(detections)
         
         return filtered_detections
     
-    def _detect_with_hough_lines(self, frame):
-        """Detect bats using Hough Line Transform - very effective for straight objects"""
+    def _detect_with_hough_lines(self, frame, person_height=None):
+        """
+        Detect bats using Hough Line Transform - very effective for straight objects
+        
+        Large frames are searched on a downsampled edge pyramid level first, and the
+        longest coarse lines are refined by a full-resolution Hough pass in an ROI
+        around each. Line length limits scale with the pyramid level and, when
+        person_height is given, with the batter's size instead of fixed pixels.
+        """
         detections = []
         
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            context = FrameContext.of(frame)
+            h, w = context.shape[:2]
             
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            min_length, max_length = self._bat_length_range(person_height)
+            scale = min_length / self.min_bat_length  # Hough parameters follow the expected bat size
+            level = self._hough_pyramid_level(w, min_length)
             
-            # Edge detection with optimal parameters for bat detection
-            edges = cv2.Canny(blurred, 50, 150, apertureSize=3)
+            # Edge detection on the blurred grayscale image with optimal parameters for bat detection
+            edges = context.edges(50, 150, blur=5, aperture=3, level=level)
             
-            # Hough Line Transform
-            lines = cv2.HoughLinesP(
-                edges,
-                rho=1,                    # Distance resolution
-                theta=np.pi/180,          # Angle resolution
-                threshold=self.line_threshold,
-                minLineLength=self.min_line_length,
-                maxLineGap=self.max_line_gap
-            )
+            # Hough Line Transform, end points back in full-resolution pixels
+            factor = 2 ** level
+            lines = [tuple(v * factor for v in line) for line in self._hough_lines(edges, scale / factor)]
+            if level > 0:
+                lines = self._refine_lines(context, lines, scale)
             
-            if lines is not None:
-                for line in lines:
-                    x1, y1, x2, y2 = line[0]
-                    
+            if lines:
+                for x1, y1, x2, y2 in lines:
                     # Calculate line properties
                     length = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
                     angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
                     
                     # Filter for bat-like lines
-                    if self.min_bat_length <= length <= self.max_bat_length:
+                    if min_length <= length <= max_length:
                         # Create bounding box around line
                         margin = 20
                         x_min = min(x1, x2) - margin
@@ -84,14 +119,13 @@ class AdvancedBatDetector:
                         y_max = max(y1, y2) + margin
                         
                         # Ensure bounds are within frame
-                        h, w = frame.shape[:2]
                         x_min = max(0, x_min)
                         y_min = max(0, y_min)
                         x_max = min(w, x_max)
                         y_max = min(h, y_max)
                         
                         # Calculate confidence based on line quality
-                        confidence = min(0.9, (length / self.max_bat_length) * 0.7 + 0.2)
+                        confidence = min(0.9, (length / max_length) * 0.7 + 0.2)
                         
                         detections.append({
                             'bbox': (x_min, y_min, x_max, y_max),
@@ -100,7 +134,8 @@ class AdvancedBatDetector:
                             'source': 'hough_line',
                             'length': length,
                             'angle': angle,
-                            'line_points': (x1, y1, x2, y2)
+                            'line_points': (x1, y1, x2, y2),
+                            'pyramid_level': level
                         })
         
         except Exception as e:
@@ -108,23 +143,92 @@ class AdvancedBatDetector:
         
         return detections
     
+    def _bat_length_range(self, person_height=None):
+        """(min, max) bat length in pixels, from the batter's height when known"""
+        if person_height:
+            return self.bat_person_ratio[0] * person_height, self.bat_person_ratio[1] * person_height
+        return self.min_bat_length, self.max_bat_length
+    
+    def _hough_pyramid_level(self, width, min_length):
+        """Coarsest pyramid level that is still wider than needed and keeps bats long enough"""
+        level = 0
+        while (level < self.hough_max_level and width / 2 ** level > self.hough_coarse_width and
+               min_length / 2 ** (level + 1) >= self.min_coarse_line_length):
+            level += 1
+        return level
+    
+    def _hough_lines(self, edges, scale=1.0):
+        """HoughLinesP with the bat parameters scaled by scale; list of (x1, y1, x2, y2)"""
+        lines = cv2.HoughLinesP(
+            edges,
+            rho=1,                    # Distance resolution
+            theta=np.pi/180,          # Angle resolution
+            threshold=max(10, int(round(self.line_threshold * scale))),
+            minLineLength=self.min_line_length * scale,
+            maxLineGap=self.max_line_gap * scale
+        )
+        if lines is None:
+            return []
+        # (N, 1, 4) in OpenCV 4, (N, 4) in OpenCV 5
+        return [tuple(int(v) for v in line) for line in lines.reshape(-1, 4)]
+    
+    def _refine_lines(self, context, lines, scale, max_angle_diff=10):
+        """
+        Re-run Hough at full resolution in an ROI around the longest coarse lines and
+        take the longest line of similar angle. Coarse lines along an already refined
+        line (e.g. the other edge of the same bat) are dropped; lines beyond
+        hough_refine_lines keep their coarse end points.
+        """
+        h, w = context.shape[:2]
+        margin = 20
+        
+        lines = sorted(lines, key=lambda l: (l[2] - l[0])**2 + (l[3] - l[1])**2, reverse=True)
+        refined = []
+        refined_rois = []  # (x1, y1, x2, y2, coarse angle)
+        for x1, y1, x2, y2 in lines:
+            coarse_angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+            mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
+            if any(rx1 <= mid_x <= rx2 and ry1 <= mid_y <= ry2 and
+                   self._angle_difference(coarse_angle, angle) <= max_angle_diff
+                   for rx1, ry1, rx2, ry2, angle in refined_rois):
+                continue
+            if len(refined_rois) >= self.hough_refine_lines:
+                refined.append((x1, y1, x2, y2))
+                continue
+            
+            rx1, ry1 = max(0, min(x1, x2) - margin), max(0, min(y1, y2) - margin)
+            rx2, ry2 = min(w, max(x1, x2) + margin), min(h, max(y1, y2) + margin)
+            refined_rois.append((rx1, ry1, rx2, ry2, coarse_angle))
+            
+            best = None
+            best_length = 0
+            roi_edges = context.crop(rx1, ry1, rx2, ry2).edges(50, 150, blur=5, aperture=3)
+            for fx1, fy1, fx2, fy2 in self._hough_lines(roi_edges, scale):
+                length = (fx2 - fx1)**2 + (fy2 - fy1)**2
+                angle = np.degrees(np.arctan2(fy2 - fy1, fx2 - fx1))
+                if self._angle_difference(angle, coarse_angle) <= max_angle_diff and length > best_length:
+                    best = (fx1 + rx1, fy1 + ry1, fx2 + rx1, fy2 + ry1)
+                    best_length = length
+            refined.append(best or (x1, y1, x2, y2))
+        return refined
+    
+    @staticmethod
+    def _angle_difference(a, b):
+        """Difference of two line angles in degrees, ignoring direction (0-90)"""
+        diff = abs(a - b) % 180
+        return min(diff, 180 - diff)
+    
     def _detect_with_morphology(self, frame):
         """Detect elongated objects using morphological operations"""
         detections = []
         
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold to get binary image
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # Create elongated kernel for morphological operations
-            kernel_length = 40
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_length, 3))
+            # Otsu-thresholded binary image
+            binary = FrameContext.of(frame).otsu
             
             # Apply morphological operations to enhance elongated objects
-            morph = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+            morph = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.morph_kernel)
+            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, self.morph_kernel)
             
             # Find contours of elongated objects
             contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -160,14 +264,26 @@ class AdvancedBatDetector:
         return detections
     
     def _detect_with_edge_lines(self, frame):
-        """Detect bats by analyzing edge density along potential bat lines"""
+        """
+        Detect bats by analyzing edge density along potential bat lines
+        
+        Every candidate line (9 angles x a 30 px grid of start points) is scored
+        at once: lines with the same end-point offset share one Bresenham offset
+        table, which is gathered from the edge map for all their start points.
+        """
         detections = []
         
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            edges = cv2.Canny(gray, 80, 160)
+            context = FrameContext.of(frame)
+            edges = context.edges(80, 160)
+            
+            h, w = context.shape[:2]
+            length = 150  # Test length
             
-            h, w = frame.shape[:2]
+            # Candidate start points, row by row
+            y_grid, x_grid = np.meshgrid(np.arange(20, h - 20, 30), np.arange(20, w - 20, 30), indexing='ij')
+            y_starts = y_grid.ravel()
+            x_starts = x_grid.ravel()
             
             # Test different angles that a bat might be at
             test_angles = range(-60, 61, 15)  # -60 to 60 degrees in 15-degree steps
@@ -176,65 +292,72 @@ class AdvancedBatDetector:
                 angle_rad = np.radians(angle_deg)
                 cos_a, sin_a = np.cos(angle_rad), np.sin(angle_rad)
                 
-                # Slide along potential bat positions
-                for y_start in range(20, h - 20, 30):
-                    for x_start in range(20, w - 20, 30):
-                        
-                        # Calculate line of potential bat
-                        length = 150  # Test length
-                        x_end = int(x_start + length * cos_a)
-                        y_end = int(y_start + length * sin_a)
-                        
-                        # Check if end point is within frame
-                        if 0 <= x_end < w and 0 <= y_end < h:
-                            
-                            # Sample points along this line
-                            line_points = self._get_line_points(x_start, y_start, x_end, y_end)
-                            
-                            # Calculate edge density along this line
-                            edge_density = 0
-                            valid_points = 0
-                            
-                            for px, py in line_points:
-                                if 0 <= px < w and 0 <= py < h:
-                                    edge_density += edges[py, px]
-                                    valid_points += 1
-                            
-                            if valid_points > 0:
-                                avg_edge_density = edge_density / (valid_points * 255)
-                                
-                                # If this line has good edge density, it might be a bat
-                                if avg_edge_density > 0.15:  # Threshold for bat-like edge density
-                                    
-                                    # Create bounding box
-                                    margin = 25
-                                    x_min = min(x_start, x_end) - margin
-                                    y_min = min(y_start, y_end) - margin
-                                    x_max = max(x_start, x_end) + margin
-                                    y_max = max(y_start, y_end) + margin
-                                    
-                                    # Clamp to frame
-                                    x_min = max(0, x_min)
-                                    y_min = max(0, y_min)
-                                    x_max = min(w, x_max)
-                                    y_max = min(h, y_max)
-                                    
-                                    confidence = min(0.7, avg_edge_density * 2)
-                                    
-                                    detections.append({
-                                        'bbox': (x_min, y_min, x_max, y_max),
-                                        'center': ((x_min + x_max) // 2, (y_min + y_max) // 2),
-                                        'confidence': confidence,
-                                        'source': 'edge_line',
-                                        'angle': angle_deg,
-                                        'edge_density': avg_edge_density
-                                    })
+                # End points of the potential bats (truncated like int())
+                x_ends = (x_starts + length * cos_a).astype(np.int64)
+                y_ends = (y_starts + length * sin_a).astype(np.int64)
+                
+                # Only lines whose end point is within the frame
+                in_frame = np.flatnonzero((x_ends >= 0) & (x_ends < w) & (y_ends >= 0) & (y_ends < h))
+                if len(in_frame) == 0:
+                    continue
+                
+                # Edge density along each line; both end points are in the frame,
+                # so every point of the line is too
+                densities = np.zeros(len(in_frame))
+                offsets = np.stack([x_ends[in_frame] - x_starts[in_frame], y_ends[in_frame] - y_starts[in_frame]], axis=1)
+                for offset in np.unique(offsets, axis=0):
+                    group = np.flatnonzero((offsets == offset).all(axis=1))
+                    line_x, line_y = self._get_line_offsets(int(offset[0]), int(offset[1]))
+                    
+                    starts = in_frame[group]
+                    samples = edges[y_starts[starts, None] + line_y, x_starts[starts, None] + line_x]
+                    densities[group] = samples.sum(axis=1, dtype=np.int64) / (len(line_x) * 255)
+                
+                # If a line has good edge density, it might be a bat
+                for index in np.flatnonzero(densities > 0.15):  # Threshold for bat-like edge density
+                    candidate = in_frame[index]
+                    x_start, y_start = int(x_starts[candidate]), int(y_starts[candidate])
+                    x_end, y_end = int(x_ends[candidate]), int(y_ends[candidate])
+                    avg_edge_density = float(densities[index])
+                    
+                    # Create bounding box
+                    margin = 25
+                    x_min = min(x_start, x_end) - margin
+                    y_min = min(y_start, y_end) - margin
+                    x_max = max(x_start, x_end) + margin
+                    y_max = max(y_start, y_end) + margin
+                    
+                    # Clamp to frame
+                    x_min = max(0, x_min)
+                    y_min = max(0, y_min)
+                    x_max = min(w, x_max)
+                    y_max = min(h, y_max)
+                    
+                    confidence = min(0.7, avg_edge_density * 2)
+                    
+                    detections.append({
+                        'bbox': (x_min, y_min, x_max, y_max),
+                        'center': ((x_min + x_max) // 2, (y_min + y_max) // 2),
+                        'confidence': confidence,
+                        'source': 'edge_line',
+                        'angle': angle_deg,
+                        'edge_density': avg_edge_density
+                    })
         
         except Exception as e:
             print(f"Edge line detection error: {e}")
         
         return detections
     
+    def _get_line_offsets(self, dx, dy):
+        """Bresenham line from (0, 0) to (dx, dy) as (x offsets, y offsets) arrays, cached per offset"""
+        offsets = self._line_offsets.get((dx, dy))
+        if offsets is None:
+            points = np.array(self._get_line_points(0, 0, dx, dy), dtype=np.int64)
+            offsets = (points[:, 0], points[:, 1])
+            self._line_offsets[(dx, dy)] = offsets
+        return offsets
+    
     def _get_line_points(self, x1, y1, x2, y2):
         """Get points along a line using Bresenham's algorithm"""
         points = []
@@ -270,48 +393,13 @@ class AdvancedBatDetector:
         
         # Remove low-confidence detections
         filtered = [d for d in detections if d['confidence'] > 0.3]
+        if not filtered:
+            return []
         
-        # Sort by confidence
-        filtered.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        # Remove overlapping detections
-        final_detections = []
-        for detection in filtered:
-            is_duplicate = False
-            for existing in final_detections:
-                if self._calculate_overlap(detection['bbox'], existing['bbox']) > 0.4:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                final_detections.append(detection)
-            
-            # Limit to top 3 detections
-            if len(final_detections) >= 3:
-                break
-        
-        return final_detections
-    
-    def _calculate_overlap(self, bbox1, bbox2):
-        """Calculate IoU overlap between bounding boxes"""
-        x1_1, y1_1, x2_1, y2_1 = bbox1
-        x1_2, y1_2, x2_2, y2_2 = bbox2
-        
-        # Calculate intersection
-        x_left = max(x1_1, x1_2)
-        y_top = max(y1_1, y1_2)
-        x_right = min(x2_1, x2_2)
-        y_bottom = min(y2_1, y2_2)
-        
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-        
-        intersection = (x_right - x_left) * (y_bottom - y_top)
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0
+        # Highest confidence first, dropping boxes that overlap a kept one; top 3
+        keep = nms([d['bbox'] for d in filtered], [d['confidence'] for d in filtered],
+                   iou_threshold=0.4, max_detections=3)
+        return [filtered[i] for i in keep]
     
     def draw_detections(self, frame, detections):
         """Draw detection results with line overlays"""
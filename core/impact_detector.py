@@ -6,6 +6,8 @@ import cv2
 import numpy as np
 from collections import deque
 
+from .frame_context import FrameContext
+
 class ImpactDetector:
     """Detects the moment of impact between bat and ball"""
     
@@ -43,17 +45,20 @@ class ImpactDetector:
     
     def detect_impact(self, frame, tracking_point=None):
         """
-        Analyze frame for potential impact
+        Analyze frame (or a FrameContext shared with other detectors) for potential impact
         Returns: (has_impact, impact_point)
         """
         if not self.is_monitoring or self.has_detected_impact:
             return False, None
         
+        context = FrameContext.of(frame)
+        frame = context.frame
+        
         # Store a copy of the frame for visualization if impact is detected
         current_frame = frame.copy()
         
         # Calculate brightness
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = context.gray
         current_brightness = np.mean(gray)
         self.brightness_values.append(current_brightness)
         
@@ -0,0 +1,251 @@
+"""
+Swing-scoped inference arbitration
+
+Between swings a lane does not need YOLO and MediaPipe at full rate. The
+arbiter runs a three-state machine per frame:
+
+    idle   - only a low-resolution motion gate (frame differencing or MOG2)
+    armed  - person detection only, every few frames, at a small input size
+    active - full detection (and pose) on every frame
+
+Motion wakes idle into armed; a batter in the box together with swing-level
+motion (or a tracked swing) makes it active. Quiet frames step back down.
+"""
+
+import time
+
+import cv2
+
+IDLE = 'idle'
+ARMED = 'armed'
+ACTIVE = 'active'
+
+# advance(defer_persons=True): the armed frame waits for person detections (see resume)
+PERSONS_NEEDED = 'persons_needed'
+
+
+class InferenceArbiter:
+    """Decides per frame how much inference a lane runs"""
+
+    def __init__(self, detector, full_detect=None, on_activate=None, motion_method='diff',
+                 motion_width=160, arm_motion=0.01, active_motion=0.03, arm_frames=2,
+                 armed_interval=3, person_imgsz=320, min_batter_confidence=0.4,
+                 min_batter_height=0.25, armed_timeout_frames=90, active_cooldown_frames=45):
+        """
+        Args:
+            detector: YoloDetector (detect_persons is used while armed)
+            full_detect: Callable frame -> detections for the active state
+                (defaults to detector.detect_objects, e.g. a KeyframeScheduler's detect)
+            on_activate: Called when the lane becomes active (e.g. to reset optical-flow state)
+            motion_method: 'diff' (frame differencing) or 'mog2' (background subtraction)
+            motion_width: Width of the motion gate image - the frame is downscaled to this
+            arm_motion: Share of moving pixels that wakes idle into armed
+            active_motion: Share of moving pixels that counts as swing motion
+            arm_frames: Consecutive motion frames needed to arm (ignores single-frame flicker)
+            armed_interval: Run person detection every Nth frame while armed
+            person_imgsz: Model input size for person detection while armed
+            min_batter_confidence: Person confidence needed to count as a batter
+            min_batter_height: Batter box height as a share of the frame height
+            armed_timeout_frames: Quiet frames without a batter before going idle
+            active_cooldown_frames: Quiet frames (and no tracked swing) before leaving active
+        """
+        self.detector = detector
+        self.full_detect = full_detect or detector.detect_objects
+        self.on_activate = on_activate
+        self.motion_method = motion_method
+        self.motion_width = motion_width
+        self.arm_motion = arm_motion
+        self.active_motion = active_motion
+        self.arm_frames = arm_frames
+        self.armed_interval = max(1, armed_interval)
+        self.person_imgsz = person_imgsz
+        self.min_batter_confidence = min_batter_confidence
+        self.min_batter_height = min_batter_height
+        self.armed_timeout_frames = armed_timeout_frames
+        self.active_cooldown_frames = active_cooldown_frames
+
+        # Motion gate state
+        self.prev_gray = None
+        self.background = None
+        if motion_method == 'mog2':
+            self.background = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=32, detectShadows=False)
+        self.blur_kernel = (5, 5)
+        self.diff_threshold = 25
+
+        self.state = IDLE
+        self.tracking = False
+        self.motion_energy = 0.0
+        self.motion_frames = 0       # Consecutive frames above arm_motion
+        self.quiet_frames = 0        # Consecutive frames below the state's motion level
+        self.armed_frame_index = 0
+        self.last_person_detections = None
+        self.batter_present = False
+
+        self.stats = {IDLE: 0, ARMED: 0, ACTIVE: 0, 'transitions': 0, 'person_runs': 0}
+        self.transitions = []        # (time, from state, to state), most recent last
+
+    def set_tracking(self, tracking):
+        """A tracked swing keeps the lane active regardless of motion"""
+        self.tracking = bool(tracking)
+
+    @property
+    def run_pose(self):
+        """Pose only runs while active"""
+        return self.state == ACTIVE
+
+    def detect(self, frame):
+        """
+        Advance the state machine for this frame and return its detections
+        (empty while idle, persons only while armed, full while active)
+        """
+        detections = self.advance(frame)
+        return self.full_detect(frame) if detections is None else detections
+
+    def advance(self, frame, defer_persons=False):
+        """
+        Advance the state machine without running full detection
+
+        Args:
+            defer_persons: When an armed frame is due for person detection, return
+                PERSONS_NEEDED instead of running it; the caller detects persons
+                (e.g. batched across lanes) and finishes the frame with resume()
+
+        Returns:
+            Detections for an idle or armed frame, None when the frame is active
+            and needs full detection (e.g. batched across lanes by the caller)
+        """
+        self.motion_energy = self._measure_motion(frame)
+        moving = self.motion_energy >= self.arm_motion
+        self.motion_frames = self.motion_frames + 1 if moving else 0
+
+        if self.tracking:
+            self._set_state(ACTIVE)
+
+        if self.state == IDLE:
+            if self.motion_frames >= self.arm_frames:
+                self._set_state(ARMED)
+            else:
+                self.stats[IDLE] += 1
+                return self._empty_detections(frame)
+
+        if self.state == ARMED:
+            if self._person_run_due():
+                if defer_persons:
+                    return PERSONS_NEEDED
+                self._store_persons(self.detector.detect_persons(frame, imgsz=self.person_imgsz), frame.shape[0])
+            return self._armed_step()
+
+        return self._active_step()
+
+    def resume(self, person_detections, frame_height):
+        """
+        Finish a frame that advance(defer_persons=True) left at PERSONS_NEEDED
+
+        Args:
+            person_detections: detect_persons result for the frame (at person_imgsz)
+            frame_height: Height of the frame in pixels
+
+        Returns:
+            Same as advance()
+        """
+        self._store_persons(person_detections, frame_height)
+        return self._armed_step()
+
+    def _person_run_due(self):
+        """Person detection every armed_interval frames, the last result in between"""
+        return self.last_person_detections is None or self.armed_frame_index % self.armed_interval == 0
+
+    def _store_persons(self, detections, frame_height):
+        self.last_person_detections = detections
+        self.stats['person_runs'] += 1
+        self.batter_present = self._has_batter(detections, frame_height)
+
+    def _armed_step(self):
+        """Armed frame with its person detections in place - stay, go idle or go active"""
+        self.armed_frame_index += 1
+        detections = self.last_person_detections
+        moving = self.motion_energy >= self.arm_motion
+        swing_motion = self.motion_energy >= self.active_motion
+        # Without a person model, swing-level motion alone activates
+        batter_ok = self.batter_present or not self.detector.can_detect_persons()
+
+        if batter_ok and swing_motion:
+            self._set_state(ACTIVE)
+            return self._active_step()
+
+        self.quiet_frames = 0 if (moving or self.batter_present) else self.quiet_frames + 1
+        if self.quiet_frames >= self.armed_timeout_frames:
+            self._set_state(IDLE)
+        self.stats[ARMED] += 1
+        return detections
+
+    def _active_step(self):
+        """Active - everything at full rate"""
+        moving = self.motion_energy >= self.arm_motion
+        self.quiet_frames = 0 if (moving or self.tracking) else self.quiet_frames + 1
+        if self.quiet_frames >= self.active_cooldown_frames:
+            self._set_state(ARMED)
+        self.stats[ACTIVE] += 1
+        return None
+
+    def _has_batter(self, detections, frame_height):
+        for person in detections['persons']:
+            x1, y1, x2, y2 = person['bbox']
+            if (person['confidence'] >= self.min_batter_confidence and
+                    (y2 - y1) >= self.min_batter_height * frame_height):
+                return True
+        return False
+
+    def _measure_motion(self, frame):
+        """Share of moving pixels in a downscaled grayscale copy of the frame"""
+        h, w = frame.shape[:2]
+        scale = self.motion_width / w
+        small = cv2.resize(frame, (self.motion_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+        if self.background is not None:
+            mask = self.background.apply(small)
+        else:
+            gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), self.blur_kernel, 0)
+            if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+                self.prev_gray = gray
+                return 0.0
+            diff = cv2.absdiff(gray, self.prev_gray)
+            self.prev_gray = gray
+            _, mask = cv2.threshold(diff, self.diff_threshold, 255, cv2.THRESH_BINARY)
+
+        return cv2.countNonZero(mask) / mask.size
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+
+        self.transitions.append((time.time(), self.state, state))
+        del self.transitions[:-20]
+        self.stats['transitions'] += 1
+        self.state = state
+        self.quiet_frames = 0
+
+        if state == ARMED:
+            self.armed_frame_index = 0
+            self.last_person_detections = None
+            self.batter_present = False
+        elif state == ACTIVE and self.on_activate is not None:
+            self.on_activate()
+
+    def _empty_detections(self, frame):
+        if not self.detector.model_available:
+            return self.detector._empty_detections()
+        return self.detector._new_detections(frame.shape)
+
+    def reset(self):
+        """Back to idle with a fresh motion reference"""
+        self.prev_gray = None
+        self._set_state(IDLE)
+        self.motion_frames = 0
+
+    def get_stats(self):
+        total = self.stats[IDLE] + self.stats[ARMED] + self.stats[ACTIVE]
+        return dict(self.stats,
+                    state=self.state,
+                    motion_energy=self.motion_energy,
+                    active_share=self.stats[ACTIVE] / total if total else 0.0)
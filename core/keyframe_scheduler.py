@@ -0,0 +1,237 @@
+"""
+Keyframe scheduler - runs YOLO only on keyframes and propagates bat, ball
+and person boxes with sparse Lucas-Kanade optical flow on the frames in between
+
+Propagated detections live only in the scheduler: the YoloDetector may be
+shared by several streams, so it is never written to.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class KeyframeScheduler:
+    """Wraps YoloDetector.detect_objects with keyframe / optical-flow scheduling"""
+
+    def __init__(self, detector, max_interval=4, min_flow_confidence=0.5,
+                 motion_spike_px=25, max_points=20, fb_error_threshold=1.5):
+        """
+        Args:
+            detector: YoloDetector instance used on keyframes
+            max_interval: Maximum number of frames between two YOLO runs
+            min_flow_confidence: Re-detect when the share of well-tracked points drops below this
+            motion_spike_px: Re-detect when a box moves more than this between frames
+            max_points: Maximum feature points tracked per box
+            fb_error_threshold: Maximum forward-backward error (px) for a point to count as tracked
+        """
+        self.detector = detector
+        self.max_interval = max(1, max_interval)
+        self.min_flow_confidence = min_flow_confidence
+        self.motion_spike_px = motion_spike_px
+        self.max_points = max_points
+        self.fb_error_threshold = fb_error_threshold
+
+        self.lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+        )
+
+        # Propagation state
+        self.prev_gray = None
+        self.tracks = []  # [{'key': 'bats'|'balls'|'persons', 'detection': dict, 'points': Nx1x2}]
+        self.last_detections = None
+        self.frames_since_keyframe = 0
+        self.force_keyframe = True
+
+        # Statistics
+        self.stats = {
+            'keyframes': 0,
+            'propagated_frames': 0,
+            'redetect_interval': 0,
+            'redetect_low_confidence': 0,
+            'redetect_motion_spike': 0,
+            'person_tracks_dropped': 0
+        }
+
+    def reset(self):
+        """Drop propagation state so the next frame is a keyframe"""
+        self.prev_gray = None
+        self.tracks = []
+        self.last_detections = None
+        self.force_keyframe = True
+
+    def detect(self, frame):
+        """Return a detections dict for this frame, from YOLO or from optical flow"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self._needs_keyframe():
+            return self._run_keyframe(frame, gray)
+
+        start_time = time.time()
+        propagated, reason = self._propagate(gray)
+        if propagated is None:
+            self.stats[reason] += 1
+            return self._run_keyframe(frame, gray)
+
+        self.prev_gray = gray
+        self.frames_since_keyframe += 1
+        self.stats['propagated_frames'] += 1
+
+        return self._build_detections(propagated, (time.time() - start_time) * 1000)
+
+    def _needs_keyframe(self):
+        if self.force_keyframe or self.prev_gray is None or self.last_detections is None:
+            return True
+        if self.frames_since_keyframe + 1 >= self.max_interval:
+            self.stats['redetect_interval'] += 1
+            return True
+        return False
+
+    def _run_keyframe(self, frame, gray):
+        """Run full YOLO detection and seed flow points for every bat, ball and person box"""
+        detections = self.detector.detect_objects(frame)
+        detections['frame_info']['keyframe'] = True
+
+        self.tracks = []
+        for key in ('bats', 'balls', 'persons'):
+            for detection in detections[key]:
+                points = self._seed_points(gray, detection['bbox'])
+                if points is not None:
+                    self.tracks.append({
+                        'key': key,
+                        'detection': detection,
+                        'keyframe_confidence': detection['confidence'],
+                        'box': np.array(detection['bbox'], dtype=np.float32),
+                        'points': points
+                    })
+
+        self.prev_gray = gray
+        self.last_detections = detections
+        self.frames_since_keyframe = 0
+        self.force_keyframe = False
+        self.stats['keyframes'] += 1
+        return detections
+
+    def _seed_points(self, gray, bbox):
+        """Pick trackable points inside a box (falls back to a coarse grid on flat regions)"""
+        x1, y1, x2, y2 = map(int, bbox)
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return None
+
+        mask = np.zeros_like(gray)
+        mask[y1:y2, x1:x2] = 255
+        points = cv2.goodFeaturesToTrack(
+            gray, maxCorners=self.max_points, qualityLevel=0.01, minDistance=3, mask=mask
+        )
+
+        if points is None or len(points) < 3:
+            xs = np.linspace(x1, x2 - 1, 3)
+            ys = np.linspace(y1, y2 - 1, 3)
+            grid = np.array([(x, y) for y in ys for x in xs], dtype=np.float32)
+            points = grid.reshape(-1, 1, 2)
+
+        return points.astype(np.float32)
+
+    def _propagate(self, gray):
+        """
+        Move every tracked box by the median flow of its points
+
+        A bat or ball that cannot be followed forces a re-detect; a person that
+        cannot is dropped until the next keyframe (pose cropping and person
+        association fall back without it)
+
+        Returns:
+            (propagated, None) on success, or (None, reason) when a re-detect is needed
+        """
+        propagated = {'bats': [], 'balls': [], 'persons': []}
+        kept_tracks = []
+        h, w = gray.shape[:2]
+
+        for track in self.tracks:
+            points = track['points']
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+            back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, new_points, None, **self.lk_params)
+
+            fb_error = np.linalg.norm((points - back_points).reshape(-1, 2), axis=1)
+            good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_error_threshold)
+
+            flow_confidence = good.sum() / len(points)
+            reason = None
+            if flow_confidence < self.min_flow_confidence or good.sum() < 3:
+                reason = 'redetect_low_confidence'
+            else:
+                displacement = (new_points - points).reshape(-1, 2)[good]
+                dx, dy = np.median(displacement, axis=0)
+                if np.hypot(dx, dy) > self.motion_spike_px:
+                    reason = 'redetect_motion_spike'
+
+            if reason is not None:
+                if track['key'] != 'persons':
+                    return None, reason
+                self.stats['person_tracks_dropped'] += 1
+                continue
+
+            track['box'] = self._shift_box(track['box'], dx, dy, w, h)
+            detection = self._box_detection(track['detection'], track['box'])
+            detection['confidence'] = track['keyframe_confidence'] * flow_confidence
+            detection['flow_confidence'] = float(flow_confidence)
+
+            track['detection'] = detection
+            track['points'] = new_points[good].reshape(-1, 1, 2)
+            propagated[track['key']].append(detection)
+            kept_tracks.append(track)
+
+        self.tracks = kept_tracks
+        return propagated, None
+
+    def _shift_box(self, box, dx, dy, frame_width, frame_height):
+        """Move a float (x1, y1, x2, y2) box by (dx, dy), keeping it inside the frame"""
+        width = box[2] - box[0]
+        height = box[3] - box[1]
+        x1 = max(0.0, min(frame_width - width, box[0] + dx))
+        y1 = max(0.0, min(frame_height - height, box[1] + dy))
+        return np.array([x1, y1, x1 + width, y1 + height], dtype=np.float32)
+
+    def _box_detection(self, detection, box):
+        """Copy a detection dict with its box replaced (sub-pixel motion is kept in the track)"""
+        x1, y1, x2, y2 = (int(round(float(v))) for v in box)
+
+        shifted = dict(detection)
+        shifted['bbox'] = (x1, y1, x2, y2)
+        shifted['center'] = ((x1 + x2) // 2, (y1 + y2) // 2)
+        shifted['propagated'] = True
+        return shifted
+
+    def _build_detections(self, propagated, elapsed_ms):
+        """Assemble a detect_objects-compatible dict from propagated boxes"""
+        last = self.last_detections
+        persons = propagated['persons']
+
+        frame_info = dict(last['frame_info'])
+        frame_info.update({
+            'keyframe': False,
+            'total_detections': len(propagated['bats']) + len(propagated['balls']) + len(persons),
+            'bat_detections': len(propagated['bats']),
+            'ball_detections': len(propagated['balls']),
+            'person_detections': len(persons),
+            'detection_time_ms': elapsed_ms
+        })
+
+        return {
+            'bats': propagated['bats'],
+            'balls': propagated['balls'],
+            'persons': persons,
+            'raw_detections': propagated['bats'] + propagated['balls'] + persons,
+            'frame_info': frame_info,
+            'model_info': last['model_info']
+        }
+
+    def get_stats(self):
+        """Get keyframe / propagation counters"""
+        stats = dict(self.stats)
+        total = stats['keyframes'] + stats['propagated_frames']
+        stats['keyframe_ratio'] = stats['keyframes'] / total if total else 0
+        return stats
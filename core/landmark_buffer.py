@@ -0,0 +1,141 @@
+"""
+Fixed-size NumPy ring buffer for pose landmarks
+Stores frames x landmarks x (x, y, z, visibility) so history metrics are array ops
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class LandmarkRingBuffer:
+    """Ring buffer of pose landmark frames with timestamps and stability scores"""
+
+    def __init__(self, capacity=30, num_landmarks=33):
+        """
+        Args:
+            capacity: Number of frames kept
+            num_landmarks: Landmarks per frame (33 for MediaPipe Pose)
+        """
+        self.capacity = capacity
+        self.num_landmarks = num_landmarks
+
+        # Preallocated storage - appends only write into these
+        self.landmarks = np.zeros((capacity, num_landmarks, 4), dtype=np.float32)  # x, y, z (px), visibility
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.scores = np.zeros(capacity, dtype=np.int32)
+
+        self.head = 0   # Next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def append(self, landmarks, timestamp, score=0):
+        """
+        Add a frame
+
+        Args:
+            landmarks: (num_landmarks, 4) array-like of x, y, z, visibility
+                ((num_landmarks, 2) pixel positions are accepted too)
+            timestamp: Frame time in seconds
+            score: Stability score stored with the frame
+
+        Returns:
+            Slot index the frame was written to
+        """
+        slot = self.head
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.shape[1] == 4:
+            self.landmarks[slot] = landmarks
+        else:
+            self.landmarks[slot, :, :2] = landmarks[:, :2]
+            self.landmarks[slot, :, 2] = 0.0
+            self.landmarks[slot, :, 3] = 1.0
+        self.timestamps[slot] = timestamp
+        self.scores[slot] = score
+
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return slot
+
+    def set_score(self, slot, score):
+        self.scores[slot] = score
+
+    def _indices(self, n=None):
+        """Slot indices of the last n frames, oldest first"""
+        n = self.count if n is None else min(n, self.count)
+        return (self.head - n + np.arange(n)) % self.capacity
+
+    def latest(self, n=None):
+        """(n, num_landmarks, 4) array of the last n frames, oldest first"""
+        return self.landmarks[self._indices(n)]
+
+    def latest_timestamps(self, n=None):
+        return self.timestamps[self._indices(n)]
+
+    def mean_displacement(self, landmark_indices, window=3):
+        """
+        Mean frame-to-frame pixel movement of the given landmarks over the last
+        window frames, averaged over the landmarks (None with fewer than 2 frames)
+        """
+        points = self.latest(window)[:, landmark_indices, :2]
+        if len(points) < 2:
+            return None
+        steps = np.linalg.norm(np.diff(points, axis=0), axis=2)   # (window - 1, landmarks)
+        return float(steps.mean(axis=0).mean())
+
+    def velocities(self, window=2):
+        """
+        (num_landmarks, 2) pixel velocity in px/s from the last window frames
+        (zeros with fewer than 2 frames)
+        """
+        points = self.latest(window)[:, :, :2]
+        times = self.latest_timestamps(window)
+        if len(points) < 2 or times[-1] <= times[0]:
+            return np.zeros((self.num_landmarks, 2), dtype=np.float32)
+        return (points[-1] - points[0]) / (times[-1] - times[0])
+
+    def jitter(self, landmark_indices=None, window=10):
+        """
+        Per-landmark jitter in pixels - RMS of the second difference (acceleration
+        per frame) over the last window frames, which is ~0 for smooth motion
+        """
+        points = self.latest(window)[:, :, :2]
+        if landmark_indices is not None:
+            points = points[:, landmark_indices]
+        if len(points) < 3:
+            return np.zeros(points.shape[1], dtype=np.float32)
+        second_diff = np.diff(points, n=2, axis=0)
+        return np.sqrt((second_diff ** 2).sum(axis=2).mean(axis=0))
+
+
+class PoseHistoryView(Sequence):
+    """Read-only view of a LandmarkRingBuffer as the old list of pose_data dicts"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pose history index out of range")
+
+        slot = self.buffer._indices()[index]
+        return {
+            'is_detected': True,
+            'landmarks': [(int(x), int(y)) for x, y in self.buffer.landmarks[slot, :, :2]],
+            'stability_score': int(self.buffer.scores[slot]),
+            'timestamp': float(self.buffer.timestamps[slot])
+        }
@@ -0,0 +1,449 @@
+"""
+Multi-camera lane server - several cages in one process
+
+Every lane (camera or video source) keeps its own EnhancedSwingTracker and
+SwingDataManager session, but the YOLO models come from the process-wide
+model registry, so N lanes hold one bat model and one COCO model instead of
+N copies. Each tick the server takes the newest frame of every ready lane,
+runs one batched forward pass per model (YoloDetector.detect_batch) and then
+hands each lane its detections; pose and swing tracking for the lanes run
+concurrently on a thread pool.
+
+Under overload (more ready lanes than max_batch) the least recently served
+lanes go first, and camera lanes only ever hold their newest frame, so a
+slow tick costs every lane the same frame rate instead of starving one.
+
+Swings are started and stopped automatically from each lane's pose swing
+phase: a lane starts tracking when its batter loads and saves the swing once
+the batter has gone through contact and settled back into stance.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+
+from .inference_arbiter import PERSONS_NEEDED
+
+# Swing phases (see swing_kinematics.PHASES) that start / confirm a swing
+SWING_START_PHASES = ('load', 'stride', 'contact')
+SWING_CONTACT_PHASES = ('contact', 'follow_through')
+
+
+def parse_source(source):
+    """Camera index for digit strings, otherwise a video path or stream URL"""
+    source = str(source)
+    return int(source) if source.isdigit() else source
+
+
+class LaneSource(threading.Thread):
+    """Capture thread for one lane that holds only the newest frame"""
+
+    def __init__(self, source, name, frame_ready=None, realtime=None, width=None, height=None):
+        """
+        Args:
+            source: Camera index or video path / stream URL
+            name: Lane name (thread name and log prefix)
+            frame_ready: threading.Event set whenever a new frame arrives
+            realtime: Replace frames the server has not picked up yet (cameras).
+                With False the reader waits, so every frame of a file is analyzed.
+                Defaults to True for cameras and streams, False for files
+            width, height: Requested camera resolution
+        """
+        super().__init__(name=f"capture-{name}", daemon=True)
+        self.source = parse_source(source)
+        self.lane_name = name
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.realtime = (not self.is_file) if realtime is None else realtime
+        self.frame_ready = frame_ready or threading.Event()
+
+        self.capture = cv2.VideoCapture(self.source)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open lane source {source}")
+        if isinstance(self.source, int):
+            if width:
+                self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+        self._condition = threading.Condition()
+        self._packet = None
+        self.stop_event = threading.Event()
+        self.finished = False
+
+        # Counters
+        self.frames_read = 0
+        self.dropped = 0
+        self.read_failures = 0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            ret, frame = self.capture.read()
+            if not ret:
+                if self.is_file:
+                    break
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+
+            # Files use their own clock so swing timing does not depend on the tick rate
+            if self.is_file:
+                timestamp = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 or self.frames_read / self.fps
+            else:
+                timestamp = time.time()
+            self.frames_read += 1
+
+            with self._condition:
+                while not self.realtime and self._packet is not None and not self.stop_event.is_set():
+                    self._condition.wait(0.1)
+                if self._packet is not None:
+                    self.dropped += 1
+                self._packet = (self.frames_read, timestamp, frame)
+            self.frame_ready.set()
+
+        self.finished = True
+        self.frame_ready.set()
+
+    def has_frame(self):
+        return self._packet is not None
+
+    def take(self):
+        """Newest (frame id, timestamp, frame), or None if nothing arrived since the last take"""
+        with self._condition:
+            packet = self._packet
+            self._packet = None
+            self._condition.notify_all()
+        return packet
+
+    @property
+    def done(self):
+        """Source ended and its last frame was served"""
+        return self.finished and self._packet is None
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.is_alive():
+            self.join(timeout)
+        self.capture.release()
+
+
+class Lane:
+    """One cage: capture, tracker, session and automatic swing start / stop"""
+
+    def __init__(self, name, source, tracker, data_manager, auto_swing=True, max_swing_s=3.0):
+        """
+        Args:
+            name: Lane name, also the tracker's model registry key
+            source: LaneSource
+            tracker: EnhancedSwingTracker of this lane
+            data_manager: SwingDataManager holding this lane's session
+            auto_swing: Start and stop swings from the pose swing phase
+            max_swing_s: A tracked swing is closed after this long even if the
+                batter never settles (e.g. pose lost during the follow-through)
+        """
+        self.name = name
+        self.source = source
+        self.tracker = tracker
+        self.data_manager = data_manager
+        self.auto_swing = auto_swing
+        self.max_swing_s = max_swing_s
+
+        self.swing_start_time = None
+        self.swing_reached_contact = False
+        self.last_result = None
+        self.last_frame = None
+        self.last_served = 0.0
+
+        # Counters
+        self.frames = 0
+        self.swings = 0
+        self.discarded_swings = 0
+        self.latencies = deque(maxlen=30)
+        self.served_times = deque(maxlen=30)
+
+    def process(self, packet, detections):
+        """Run one frame through the lane's tracker and swing logic"""
+        frame_id, timestamp, frame = packet
+        start_time = time.perf_counter()
+
+        result = self.tracker.process_frame(frame, timestamp=timestamp, detections=detections)
+        if self.auto_swing:
+            self._update_swing(result, frame, timestamp)
+
+        self.frames += 1
+        self.last_result = result
+        self.last_frame = frame
+        self.latencies.append((time.perf_counter() - start_time) * 1000)
+        self.served_times.append(time.perf_counter())
+        return result
+
+    def _update_swing(self, result, frame, timestamp):
+        """Start tracking when the batter loads, finish once they settle after contact"""
+        pose_data = result['pose_data']
+        phase = pose_data['swing_phase'] if pose_data else None
+        tracker = self.tracker
+
+        if not tracker.is_tracking:
+            if phase in SWING_START_PHASES:
+                tracker.start_tracking_session(timestamp=timestamp)
+                self.swing_start_time = timestamp
+                self.swing_reached_contact = phase in SWING_CONTACT_PHASES
+            return
+
+        if phase in SWING_CONTACT_PHASES:
+            self.swing_reached_contact = True
+
+        timed_out = timestamp - self.swing_start_time > self.max_swing_s
+        if phase == 'stance' or timed_out:
+            self.finish_swing(frame)
+
+    def finish_swing(self, frame):
+        """Stop the tracked swing and save it to the lane's session if it was a real one"""
+        tracker = self.tracker
+        points = list(tracker.swing_path_points)
+
+        saved = False
+        if self.swing_reached_contact and tracker.stop_tracking_session():
+            from .swing_data_manager import SwingDataManager
+            from utils.drawing import draw_swing_summary
+
+            swing_data = SwingDataManager.swing_data_from_metrics(tracker.get_current_metrics())
+            path_points = [tuple(map(int, point)) for point in points]
+            label = f"{self.name} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            analyzed_frame = draw_swing_summary(frame.copy(), swing_data, path_points, label)
+
+            self.data_manager.add_swing_to_session(swing_data, analyzed_frame, path_points, source=self.name)
+            self.data_manager.save_current_session()
+            self.swings += 1
+            saved = True
+            print(f"[{self.name}] Swing {self.swings}: efficiency {swing_data['efficiency_score']}%")
+        else:
+            # Loaded but never swung, or too little bat movement
+            self.discarded_swings += 1
+
+        tracker.clear_current_swing()
+        tracker.is_tracking = False
+        self.swing_start_time = None
+        self.swing_reached_contact = False
+        return saved
+
+    def get_stats(self):
+        served = list(self.served_times)
+        fps = 0
+        if len(served) > 1 and served[-1] > served[0]:
+            fps = (len(served) - 1) / (served[-1] - served[0])
+
+        latencies = list(self.latencies)
+        return {
+            'frames': self.frames,
+            'fps': fps,
+            'avg_latency_ms': sum(latencies) / len(latencies) if latencies else 0,
+            'dropped': self.source.dropped,
+            'swings': self.swings,
+            'discarded_swings': self.discarded_swings,
+            'tracking': self.tracker.is_tracking,
+            'inference_state': self.last_result['inference_state'] if self.last_result else None
+        }
+
+
+class LaneServer:
+    """N lanes, one set of models, batched detection per tick"""
+
+    def __init__(self, sources, tracker_kwargs=None, output_dir="output", session_name=None,
+                 lane_names=None, max_batch=None, auto_swing=True, max_swing_s=3.0,
+                 camera_width=None, camera_height=None):
+        """
+        Args:
+            sources: Camera indices and / or video paths, one per lane
+            tracker_kwargs: EnhancedSwingTracker keyword arguments shared by every lane
+                (model_key is set per lane; keyframe scheduling does not apply to
+                batched frames)
+            output_dir: Each lane stores its sessions in output_dir/<lane name>
+            session_name: Session name prefix (the lane name is appended)
+            lane_names: Names for the lanes (default lane1, lane2, ...)
+            max_batch: Most lanes served per tick (default: all lanes)
+            auto_swing: Start and stop swings from the pose swing phase
+            max_swing_s: Longest a swing is tracked before it is closed
+            camera_width, camera_height: Requested camera resolution
+        """
+        from .enhanced_swing_tracker import EnhancedSwingTracker
+        from .swing_data_manager import SwingDataManager
+
+        tracker_kwargs = dict(tracker_kwargs or {})
+        if tracker_kwargs.get('enable_pose', True) is False and auto_swing:
+            print("⚠️ Automatic swing detection needs pose - lanes will only run detection")
+
+        lane_names = list(lane_names or [])
+        if len(set(lane_names)) != len(lane_names):
+            raise ValueError("Lane names must be unique")
+        lane_names += [f"lane{i + 1}" for i in range(len(lane_names), len(sources))]
+
+        self.frame_ready = threading.Event()
+        self.lanes = []
+        for name, source in zip(lane_names, sources):
+            print(f"🎥 Opening {name}: {source}")
+            lane_source = LaneSource(source, name, self.frame_ready, width=camera_width, height=camera_height)
+
+            # Same settings -> one shared YOLO detector; the pose analyzer is per lane
+            tracker = EnhancedSwingTracker(**dict(tracker_kwargs, model_key=name))
+
+            data_manager = SwingDataManager(base_dir=os.path.join(output_dir, name))
+            data_manager.start_new_session(f"{session_name} - {name}" if session_name else None)
+
+            self.lanes.append(Lane(name, lane_source, tracker, data_manager,
+                                   auto_swing=auto_swing, max_swing_s=max_swing_s))
+
+        self.max_batch = max(1, max_batch or len(self.lanes))
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.lanes)), thread_name_prefix="lane")
+        self.running = False
+
+        # Performance tracking
+        self.ticks = 0
+        self.deferred = 0
+        self.tick_times = deque(maxlen=30)
+        self.batch_sizes = deque(maxlen=30)
+
+    def start(self):
+        """Start every lane's capture thread"""
+        if self.running:
+            return
+        self.running = True
+        for lane in self.lanes:
+            lane.source.start()
+
+    def tick(self, timeout=0.1):
+        """
+        Serve one batch of lanes
+
+        Returns:
+            List of (lane, tracker result) for the lanes served this tick
+        """
+        if not self.frame_ready.wait(timeout):
+            return []
+        self.frame_ready.clear()
+        start_time = time.perf_counter()
+
+        # Least recently served first, so a full batch never starves the same lanes
+        ready = sorted((lane for lane in self.lanes if lane.source.has_frame()), key=lambda lane: lane.last_served)
+        selected = ready[:self.max_batch]
+        if len(ready) > len(selected):
+            self.deferred += len(ready) - len(selected)
+            self.frame_ready.set()  # The deferred lanes go first next tick
+
+        packets = []
+        for lane in selected:
+            packet = lane.source.take()
+            if packet is not None:
+                lane.last_served = start_time
+                packets.append((lane, packet))
+        if not packets:
+            return []
+
+        # Idle / armed lanes answer from their arbiter; the rest need full detection
+        detections = {}
+        person_batches = defaultdict(list)
+        batches = defaultdict(list)
+        for lane, packet in packets:
+            gated = lane.tracker.gate_frame(packet[2], defer_persons=True)
+            if gated is PERSONS_NEEDED:
+                person_batches[(id(lane.tracker.yolo_detector), lane.tracker.arbiter.person_imgsz)].append((lane, packet))
+            elif gated is not None:
+                detections[lane.name] = gated
+            else:
+                batches[id(lane.tracker.yolo_detector)].append((lane, packet))
+
+        # Armed lanes due for person detection - one small-input pass per shared detector
+        for (_, imgsz), group in person_batches.items():
+            detector = group[0][0].tracker.yolo_detector
+            frames = [packet[2] for _, packet in group]
+            for (lane, packet), person_detections in zip(group, detector.detect_persons_batch(frames, imgsz=imgsz)):
+                gated = lane.tracker.gate_persons(packet[2], person_detections)
+                if gated is not None:
+                    detections[lane.name] = gated
+                else:
+                    # A batter started swinging - this frame already needs full detection
+                    batches[id(lane.tracker.yolo_detector)].append((lane, packet))
+
+        # One forward pass per model for every lane that shares a detector
+        for group in batches.values():
+            detector = group[0][0].tracker.yolo_detector
+            frames = [packet[2] for _, packet in group]
+            for (lane, _), lane_detections in zip(group, detector.detect_batch(frames)):
+                detections[lane.name] = lane_detections
+
+        # Pose and swing tracking per lane, concurrently
+        futures = [(lane, self.executor.submit(lane.process, packet, detections[lane.name]))
+                   for lane, packet in packets]
+        results = []
+        for lane, future in futures:
+            try:
+                results.append((lane, future.result()))
+            except Exception as e:
+                print(f"[{lane.name}] Frame error: {e}")
+
+        self.ticks += 1
+        self.batch_sizes.append(len(packets))
+        self.tick_times.append((time.perf_counter() - start_time) * 1000)
+        return results
+
+    @property
+    def done(self):
+        """Every lane's source has ended (only happens with video files)"""
+        return all(lane.source.done for lane in self.lanes)
+
+    def run(self, on_results=None, duration=None):
+        """
+        Serve lanes until stopped, every source has ended or duration (s) has passed
+
+        Args:
+            on_results: Called with each tick's results; returning False stops the server
+        """
+        self.start()
+        end_time = time.time() + duration if duration else None
+        while self.running and not self.done:
+            if end_time and time.time() >= end_time:
+                break
+            results = self.tick()
+            if on_results is not None and on_results(results) is False:
+                break
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        """Stop the captures, close open swings, save every session and release the models"""
+        self.running = False
+        for lane in self.lanes:
+            lane.source.stop()
+
+        self.executor.shutdown(wait=True)
+        for lane in self.lanes:
+            try:
+                if lane.tracker.is_tracking and lane.last_frame is not None:
+                    lane.finish_swing(lane.last_frame)
+                session = lane.data_manager.current_session
+                lane.data_manager.save_current_session()
+                if session["swings"]:
+                    lane.data_manager.export_data(session["id"], "csv")
+            except Exception as e:
+                print(f"[{lane.name}] Could not save session: {e}")
+            lane.tracker.close()
+
+    def get_stats(self):
+        """Server-wide tick / batch counters plus every lane's stats"""
+        tick_times = list(self.tick_times)
+        batch_sizes = list(self.batch_sizes)
+        return {
+            'ticks': self.ticks,
+            'avg_tick_ms': sum(tick_times) / len(tick_times) if tick_times else 0,
+            'avg_batch_size': sum(batch_sizes) / len(batch_sizes) if batch_sizes else 0,
+            'deferred': self.deferred,
+            'lanes': {lane.name: lane.get_stats() for lane in self.lanes}
+        }
@@ -0,0 +1,217 @@
+"""
+Persistent model artifact cache
+
+Keeps ready-to-run model artifacts between launches so a lane restart does
+not repeat work:
+- a manifest of resolved model paths, trusted while the file is still there
+  so the model folders are not probed again (forget_paths() makes the next
+  launch re-probe, e.g. after a new INT8 model is written)
+- weights hashes, memoized by path, size and mtime so unchanged weights
+  are not re-hashed
+- ONNX Runtime models with the graph optimizations (Conv+BN fusion,
+  constant folding, layout transforms) already applied, keyed by weights
+  hash, backend, ONNX Runtime version and CPU architecture; these load
+  with optimization switched off
+
+The cache lives in ~/.cache/swingman/models unless SWINGMAN_MODEL_CACHE
+points elsewhere. Deleting the folder is always safe.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import threading
+
+MANIFEST_NAME = "manifest.json"
+
+
+def default_cache_dir():
+    return os.environ.get("SWINGMAN_MODEL_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "swingman", "models"
+    )
+
+
+class ModelCache:
+    """Model artifacts and resolved paths stored across launches"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+        self.stats = {'path_hits': 0, 'path_misses': 0, 'artifact_hits': 0, 'artifact_builds': 0}
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict):
+                manifest.setdefault('paths', {})
+                manifest.setdefault('hashes', {})
+                manifest.setdefault('artifacts', {})
+                return manifest
+        except Exception:
+            pass
+        return {'paths': {}, 'hashes': {}, 'artifacts': {}}
+
+    def _save_manifest(self):
+        """Write the manifest atomically - several worker processes may share the cache"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            print(f"⚠️ Could not write model cache manifest: {e}")
+
+    def resolve_path(self, candidates):
+        """
+        First existing path of an ordered candidate list, remembered across launches
+
+        A remembered path is trusted while it exists - only that one file is
+        checked. The candidates are probed again when it is gone, or after
+        forget_paths() (so a newly added higher-priority model is picked up).
+
+        Returns:
+            Absolute path or None
+        """
+        candidates = [os.path.abspath(c) for c in candidates]
+        lookup_key = "|".join(candidates)
+
+        with self._lock:
+            remembered = self.manifest['paths'].get(lookup_key)
+        if remembered in candidates and os.path.exists(remembered):
+            self.stats['path_hits'] += 1
+            return remembered
+
+        self.stats['path_misses'] += 1
+        path = next((c for c in candidates if os.path.exists(c)), None)
+        if path and path != remembered:
+            with self._lock:
+                self.manifest['paths'][lookup_key] = path
+                self._save_manifest()
+        return path
+
+    def forget_paths(self):
+        """Drop the remembered model paths so the next resolve_path() probes the folders again"""
+        with self._lock:
+            if self.manifest['paths']:
+                self.manifest['paths'] = {}
+                self._save_manifest()
+
+    def file_hash(self, path):
+        """SHA-256 of a file, recomputed only when its size or mtime changes"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        with self._lock:
+            entry = self.manifest['hashes'].get(path)
+        if entry and entry['signature'] == signature:
+            return entry['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+
+        with self._lock:
+            self.manifest['hashes'][path] = {'signature': signature, 'sha256': sha256}
+            self._save_manifest()
+        return sha256
+
+    def artifact_key(self, weights_path, backend, **variant):
+        """Cache key for an artifact built from weights_path (hash + backend + runtime)"""
+        parts = [self.file_hash(weights_path)[:16], backend, platform.machine() or 'cpu']
+        parts += [f"{name}{value}" for name, value in sorted(variant.items())]
+        return "-".join(parts)
+
+    def get_artifact(self, key, suffix, builder):
+        """
+        Path of a cached artifact, building it on a miss
+
+        Args:
+            key: artifact_key() of the artifact
+            suffix: File extension, e.g. '.onnx'
+            builder: builder(output_path) writes the artifact and returns extra
+                manifest info (dict) or None
+
+        Returns:
+            (artifact path, manifest info) - path is None if the build failed
+        """
+        path = os.path.join(self.cache_dir, key + suffix)
+        with self._lock:
+            info = self.manifest['artifacts'].get(key)
+        if info is not None and os.path.exists(path):
+            self.stats['artifact_hits'] += 1
+            return path, info
+
+        # Build into a temporary file so a crash never leaves a half-written artifact
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=suffix)
+            os.close(fd)
+            info = builder(tmp_path) or {}
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not build cached model {key}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None, None
+
+        self.stats['artifact_builds'] += 1
+        with self._lock:
+            self.manifest['artifacts'][key] = info
+            self._save_manifest()
+        return path, info
+
+    def optimized_onnx_model(self, onnx_path):
+        """
+        ONNX Runtime-optimized copy of an ONNX model (Conv+BN fusion, constant
+        folding, CPU layout transforms), built once and reused
+
+        Returns:
+            (path of the optimized model, class names dict or None) - the path
+            is None if onnxruntime is missing or optimization failed
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            return None, None
+
+        key = self.artifact_key(onnx_path, 'onnx', ort=ort.__version__)
+
+        def build(output_path):
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.optimized_model_filepath = output_path
+            session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+            # Keep the class names next to the artifact in case the metadata is not carried over
+            metadata = session.get_modelmeta().custom_metadata_map
+            return {'source': os.path.abspath(onnx_path), 'names': metadata.get('names')}
+
+        path, info = self.get_artifact(key, ".onnx", build)
+        names = (info or {}).get('names')
+        try:
+            names = ast.literal_eval(names) if names else None
+        except Exception:
+            names = None
+        return path, names
+
+    def clear(self):
+        """Delete every cached artifact and the manifest"""
+        with self._lock:
+            if os.path.isdir(self.cache_dir):
+                for filename in os.listdir(self.cache_dir):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+            self.manifest = {'paths': {}, 'hashes': {}, 'artifacts': {}}
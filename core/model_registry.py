@@ -0,0 +1,128 @@
+"""
+Process-wide registry of shared model instances
+
+Loading a YOLO detector or a MediaPipe graph is the slowest part of startup
+and each copy holds its own weights in memory. Components acquire models
+from the registry instead of constructing them; the first acquire builds the
+instance, later acquires with the same arguments get the same object, and
+the instance is closed when the last holder releases it.
+
+PoseAnalyzer (and a YoloDetector with roi_inference) keeps per-stream state,
+so give each camera its own key when several streams run in one process.
+"""
+
+import threading
+
+
+class ModelRegistry:
+    """Reference-counted, lazily constructed shared instances keyed by class and arguments"""
+
+    def __init__(self):
+        self._entries = {}   # key -> {'instance', 'refcount'}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(cls, key, args, kwargs):
+        # repr keeps unhashable arguments (lists, dicts) usable as part of the key
+        return (cls.__module__, cls.__qualname__, key, repr(args), repr(sorted(kwargs.items())))
+
+    def acquire(self, cls, *args, key=None, **kwargs):
+        """
+        Get the shared instance of cls for these arguments, constructing it on first use
+
+        Args:
+            cls: Model class, e.g. PoseAnalyzer or YoloDetector
+            key: Extra identity (e.g. a camera id) for instances that must not be shared
+            *args, **kwargs: Constructor arguments
+
+        Returns:
+            The shared instance - hand it back with release() when done
+        """
+        entry_key = self._make_key(cls, key, args, kwargs)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                # Built under the lock so two threads never load the same model twice
+                entry = {'instance': cls(*args, **kwargs), 'refcount': 0}
+                self._entries[entry_key] = entry
+            entry['refcount'] += 1
+            return entry['instance']
+
+    def release(self, instance):
+        """
+        Drop one reference to an acquired instance, closing it with the last one
+
+        Returns:
+            True if the instance was closed
+        """
+        with self._lock:
+            for entry_key, entry in self._entries.items():
+                if entry['instance'] is instance:
+                    break
+            else:
+                return False
+
+            entry['refcount'] -= 1
+            if entry['refcount'] > 0:
+                return False
+            del self._entries[entry_key]
+
+        close = getattr(instance, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                print(f"⚠️ Error closing {type(instance).__name__}: {e}")
+        return True
+
+    def refcount(self, instance):
+        with self._lock:
+            for entry in self._entries.values():
+                if entry['instance'] is instance:
+                    return entry['refcount']
+        return 0
+
+    def get_stats(self):
+        """{class name: number of live instances} and total references"""
+        with self._lock:
+            stats = {'instances': {}, 'references': 0}
+            for entry in self._entries.values():
+                name = type(entry['instance']).__name__
+                stats['instances'][name] = stats['instances'].get(name, 0) + 1
+                stats['references'] += entry['refcount']
+            return stats
+
+    def clear(self):
+        """Close every instance regardless of references (process shutdown)"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+
+        for entry in entries:
+            close = getattr(entry['instance'], 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+# The process-wide registry
+registry = ModelRegistry()
+
+
+def acquire_pose_analyzer(key=None, **kwargs):
+    """Shared PoseAnalyzer for these settings (kwargs as for PoseAnalyzer)"""
+    from .pose_analyzer import PoseAnalyzer
+    return registry.acquire(PoseAnalyzer, key=key, **kwargs)
+
+
+def acquire_yolo_detector(key=None, **kwargs):
+    """Shared YoloDetector for these settings (kwargs as for YoloDetector)"""
+    from .yolo_detector import YoloDetector
+    return registry.acquire(YoloDetector, key=key, **kwargs)
+
+
+def release(instance):
+    """Release an instance acquired from the process-wide registry"""
+    return registry.release(instance)
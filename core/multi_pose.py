@@ -0,0 +1,231 @@
+"""
+Multi-person pose tracking
+
+One PoseAnalyzer per tracked YOLO person box, so the batter, catcher and
+on-deck hitter each keep their own landmark stream instead of MediaPipe
+flipping between them. Person boxes are associated with tracks by IoU
+(Hungarian assignment) and the per-person crops are run concurrently on a
+thread pool - MediaPipe releases the GIL while a graph runs.
+
+The primary track (the batter) gets the full pose quality while a swing is
+tracked; everyone else runs on the analyzers' cheaper idle settings.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from scipy.optimize import linear_sum_assignment
+
+from .box_ops import iou_matrix
+from .pose_analyzer import PoseAnalyzer
+
+
+class PersonTrack:
+    """One tracked person with its own pose analyzer"""
+
+    def __init__(self, track_id, bbox, analyzer):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.analyzer = analyzer
+        self.misses = 0
+        self.age = 0
+        self.pose_data = None
+
+    @property
+    def area(self):
+        return _box_area(self.bbox)
+
+
+class MultiPersonPoseTracker:
+    """Stable person identities with an independent pose stream per person"""
+
+    def __init__(self, pose_options=None, max_people=4, min_confidence=0.4, min_iou=0.3, max_misses=10):
+        """
+        Args:
+            pose_options: PoseAnalyzer keyword arguments for every track
+            max_people: Tracks that get pose, largest boxes first (bounds the per-frame cost)
+            min_confidence: Person detections below this do not start a track
+            min_iou: Minimum box overlap to continue a track
+            max_misses: Frames a track survives without a matching person box
+        """
+        self.pose_options = pose_options or {}
+        self.max_people = max_people
+        self.min_confidence = min_confidence
+        self.min_iou = min_iou
+        self.max_misses = max_misses
+
+        self.tracks = {}
+        self.next_track_id = 1
+        self.primary_id = None
+
+        # Analyzers of dropped tracks are reset and reused - building a MediaPipe graph is slow
+        self.spare_analyzers = []
+        self.executor = ThreadPoolExecutor(max_workers=max_people, thread_name_prefix="pose")
+
+    def update(self, frame, persons, timestamp=None, active=True):
+        """
+        Associate person detections with tracks and run pose on every matched track
+
+        Args:
+            frame: BGR frame
+            persons: Person detections (dicts with 'bbox' and 'confidence')
+            timestamp: Frame time in seconds
+            active: Whether a swing is tracked (full pose quality for the primary track)
+
+        Returns:
+            {track_id: pose_data} for the tracks that were seen this frame; each
+            pose_data also carries 'track_id' and 'bbox'
+        """
+        persons = [p for p in persons if p['confidence'] >= self.min_confidence]
+        matched = self._associate(persons)
+        self._select_primary()
+
+        # Pose for all matched people at once
+        futures = {}
+        for track in matched:
+            track.analyzer.set_active(active and track.track_id == self.primary_id)
+            futures[track.track_id] = self.executor.submit(
+                track.analyzer.analyze_pose, frame, track.bbox, timestamp
+            )
+
+        poses = {}
+        for track in matched:
+            try:
+                pose_data = futures[track.track_id].result()
+            except Exception as e:
+                print(f"Pose error on person {track.track_id}: {e}")
+                continue
+            pose_data['track_id'] = track.track_id
+            pose_data['bbox'] = track.bbox
+            track.pose_data = pose_data
+            poses[track.track_id] = pose_data
+
+        return poses
+
+    def _associate(self, persons):
+        """Hungarian IoU matching; returns the tracks that matched a box this frame"""
+        track_list = list(self.tracks.values())
+        boxes = [tuple(map(int, p['bbox'])) for p in persons]
+
+        matched_tracks = []
+        unmatched_boxes = set(range(len(boxes)))
+        if track_list and boxes:
+            iou = iou_matrix([t.bbox for t in track_list], boxes)
+            rows, cols = linear_sum_assignment(-iou)
+            for row, col in zip(rows, cols):
+                if iou[row, col] < self.min_iou:
+                    continue
+                track = track_list[row]
+                track.bbox = boxes[col]
+                track.misses = 0
+                track.age += 1
+                matched_tracks.append(track)
+                unmatched_boxes.discard(col)
+
+        # Age out tracks that lost their person
+        for track in track_list:
+            if track not in matched_tracks:
+                track.misses += 1
+                track.pose_data = None
+                if track.misses > self.max_misses:
+                    self._drop_track(track.track_id)
+
+        # New people, largest first, while there is room
+        free_slots = self.max_people - len(self.tracks)
+        new_boxes = sorted(unmatched_boxes, key=lambda i: _box_area(boxes[i]), reverse=True)
+        for index in new_boxes[:max(0, free_slots)]:
+            track = PersonTrack(self.next_track_id, boxes[index], self._get_analyzer())
+            self.tracks[track.track_id] = track
+            self.next_track_id += 1
+            matched_tracks.append(track)
+
+        return matched_tracks
+
+    def _select_primary(self):
+        """Keep the current batter; otherwise pick the largest person (closest to the camera)"""
+        if self.primary_id in self.tracks:
+            return
+        self.primary_id = max(self.tracks, key=lambda tid: self.tracks[tid].area) if self.tracks else None
+
+    def set_primary(self, track_id):
+        """Choose the batter explicitly"""
+        if track_id in self.tracks:
+            self.primary_id = track_id
+
+    def set_primary_at(self, point):
+        """
+        Make the person whose box contains point (e.g. the detected bat center) the
+        batter; the largest such box wins. Returns True if the primary changed.
+        """
+        x, y = point
+        candidates = [t for t in self.tracks.values()
+                      if t.misses == 0 and t.bbox[0] <= x <= t.bbox[2] and t.bbox[1] <= y <= t.bbox[3]]
+        if not candidates:
+            return False
+        track_id = max(candidates, key=lambda t: t.area).track_id
+        changed = track_id != self.primary_id
+        self.primary_id = track_id
+        return changed
+
+    def get_primary_pose(self):
+        """pose_data of the primary track for the last frame (None when not seen)"""
+        track = self.tracks.get(self.primary_id)
+        return track.pose_data if track else None
+
+    def get_primary_analyzer(self):
+        track = self.tracks.get(self.primary_id)
+        return track.analyzer if track else None
+
+    def draw_poses(self, frame, poses):
+        """Draw every person's pose with their track id (the batter in green)"""
+        for track_id, pose_data in poses.items():
+            track = self.tracks.get(track_id)
+            if track is None or not pose_data['is_detected']:
+                continue
+            frame = track.analyzer.draw_pose(frame, pose_data)
+            x1, y1 = track.bbox[:2]
+            color = (0, 255, 0) if track_id == self.primary_id else (200, 200, 200)
+            label = f"Batter #{track_id}" if track_id == self.primary_id else f"#{track_id}"
+            cv2.putText(frame, label, (x1, max(15, y1 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return frame
+
+    def _get_analyzer(self):
+        if self.spare_analyzers:
+            analyzer = self.spare_analyzers.pop()
+            analyzer.reset()
+            return analyzer
+        return PoseAnalyzer(**self.pose_options)
+
+    def _drop_track(self, track_id):
+        track = self.tracks.pop(track_id)
+        self.spare_analyzers.append(track.analyzer)
+        if track_id == self.primary_id:
+            self.primary_id = None
+
+    def reset(self):
+        """Drop all tracks (analyzers are kept for reuse)"""
+        for track_id in list(self.tracks):
+            self._drop_track(track_id)
+
+    def close(self):
+        """Stop the worker threads and release every MediaPipe graph"""
+        self.executor.shutdown(wait=True)
+        for track in self.tracks.values():
+            track.analyzer.close()
+        for analyzer in self.spare_analyzers:
+            analyzer.close()
+        self.tracks.clear()
+        self.spare_analyzers.clear()
+
+    def get_stats(self):
+        return {
+            'tracks': len(self.tracks),
+            'primary_id': self.primary_id,
+            'spare_analyzers': len(self.spare_analyzers),
+            'next_track_id': self.next_track_id
+        }
+
+
+def _box_area(box):
+    x1, y1, x2, y2 = box
+    return max(0, x2 - x1) * max(0, y2 - y1)
@@ -0,0 +1,221 @@
+"""
+ONNX Runtime CPU backend for YOLOv8 detection models
+Native NumPy letterbox / decode / NMS so no PyTorch is needed at inference time
+"""
+
+import ast
+import os
+
+import cv2
+import numpy as np
+
+from .box_ops import nms
+
+
+def letterbox(image, new_shape=(640, 640), color=(114, 114, 114)):
+    """
+    Resize keeping aspect ratio and pad to new_shape (same as Ultralytics LetterBox)
+
+    Returns:
+        padded image, scale ratio, (pad_left, pad_top)
+    """
+    h, w = image.shape[:2]
+    ratio = min(new_shape[0] / h, new_shape[1] / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+
+    pad_w = (new_shape[1] - new_w) / 2
+    pad_h = (new_shape[0] - new_h) / 2
+
+    if (w, h) != (new_w, new_h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+
+    return image, ratio, (left, top)
+
+
+class OnnxBox:
+    """Single box view with the same indexing as an Ultralytics box (box.conf[0] etc.)"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+
+class OnnxBoxes:
+    """NumPy box container mirroring the parts of Ultralytics Boxes that we use"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        for i in range(len(self.conf)):
+            yield OnnxBox(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+
+class OnnxResult:
+    """Detection result for one image"""
+
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names
+
+
+class OnnxYoloModel:
+    """
+    YOLOv8 detection model running on ONNX Runtime's CPU execution provider
+
+    Called like an Ultralytics YOLO model: model(frame, conf=..., iou=...)
+    returns a list of results with .boxes.xyxy / .conf / .cls arrays.
+    """
+
+    def __init__(self, onnx_path, num_threads=None, imgsz=640, names=None, optimized=False):
+        """
+        Args:
+            onnx_path: Path to an exported YOLOv8 .onnx model
+            num_threads: Intra-op threads (None = one per CPU core)
+            imgsz: Input size used when the model has a dynamic input shape
+            names: Class names; read from the model metadata if not given
+            optimized: The model was already optimized by ONNX Runtime (ModelCache),
+                so graph optimization is skipped at load
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = (ort.GraphOptimizationLevel.ORT_DISABLE_ALL if optimized
+                                            else ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = num_threads or (os.cpu_count() or 1)
+        options.inter_op_num_threads = 1
+
+        self.path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_type = np.float16 if 'float16' in model_input.type else np.float32
+
+        # Static export (1, 3, H, W) fixes the input size; dynamic axes come back as strings
+        height, width = model_input.shape[2], model_input.shape[3]
+        self.dynamic_shape = not (isinstance(height, int) and isinstance(width, int))
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.imgsz = (imgsz, imgsz) if self.dynamic_shape else (height, width)
+
+        self.names = names if names else self._read_names()
+
+    def _read_names(self):
+        """Read class names from the metadata Ultralytics writes on export"""
+        try:
+            metadata = self.session.get_modelmeta().custom_metadata_map
+            return ast.literal_eval(metadata['names'])
+        except Exception:
+            return {}
+
+    def __call__(self, source, conf=0.25, iou=0.7, imgsz=None, verbose=False, max_det=300):
+        """Run detection on one BGR frame or a list of frames (one batched run with dynamic axes)"""
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        shape = self.imgsz
+        if imgsz is not None and self.dynamic_shape:
+            shape = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+
+        if len(frames) > 1 and self.dynamic_batch:
+            return self._predict_batch(frames, conf, iou, shape, max_det)
+        return [self._predict(frame, conf, iou, shape, max_det) for frame in frames]
+
+    def _preprocess(self, frame, shape):
+        image, ratio, pad = letterbox(frame, shape)
+        blob = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[np.newaxis]
+        blob = np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+        return blob.astype(self.input_type, copy=False), ratio, pad
+
+    def _predict(self, frame, conf, iou, shape, max_det):
+        blob, ratio, pad = self._preprocess(frame, shape)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return OnnxResult(self._postprocess(output[0], conf, iou, ratio, pad, frame.shape, max_det), self.names)
+
+    def _predict_batch(self, frames, conf, iou, shape, max_det):
+        """Letterbox every frame to the same shape and run them as one (N, 3, H, W) input"""
+        inputs = [self._preprocess(frame, shape) for frame in frames]
+        blob = np.concatenate([blob for blob, _, _ in inputs])
+        output = self.session.run(None, {self.input_name: blob})[0]
+
+        return [
+            OnnxResult(self._postprocess(prediction, conf, iou, ratio, pad, frame.shape, max_det), self.names)
+            for prediction, (_, ratio, pad), frame in zip(output, inputs, frames)
+        ]
+
+    def _postprocess(self, prediction, conf, iou, ratio, pad, frame_shape, max_det):
+        """Decode a (4 + num_classes, N) YOLOv8 head output into frame-space boxes"""
+        prediction = prediction.T.astype(np.float32, copy=False)
+        class_scores = prediction[:, 4:]
+
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        mask = scores >= conf
+
+        boxes_cxcywh = prediction[mask, :4]
+        scores = scores[mask]
+        class_ids = class_ids[mask]
+
+        boxes = np.empty_like(boxes_cxcywh)
+        boxes[:, 0] = boxes_cxcywh[:, 0] - boxes_cxcywh[:, 2] / 2
+        boxes[:, 1] = boxes_cxcywh[:, 1] - boxes_cxcywh[:, 3] / 2
+        boxes[:, 2] = boxes_cxcywh[:, 0] + boxes_cxcywh[:, 2] / 2
+        boxes[:, 3] = boxes_cxcywh[:, 1] + boxes_cxcywh[:, 3] / 2
+
+        # Class-aware NMS
+        keep = nms(boxes, scores, iou, max_detections=max_det, class_ids=class_ids)
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+        # Undo letterbox
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / ratio
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, frame_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, frame_shape[0])
+
+        return OnnxBoxes(boxes, scores.astype(np.float32), class_ids.astype(np.float32))
+
+
+def export_onnx(weights_path, imgsz=640, dynamic=True):
+    """
+    Export Ultralytics .pt weights to ONNX next to the weights file
+    (dynamic axes by default so ROI crops and batches can use other input sizes)
+
+    Returns:
+        Path to the .onnx file
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(weights_path)
+    return model.export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True, verbose=False)
+
+
+def resolve_onnx_path(weights_path, export_missing=True):
+    """
+    Find (or export) the .onnx model for a weights path
+
+    Returns:
+        Path to the .onnx file, or None if it does not exist and cannot be exported
+    """
+    if weights_path.endswith(".onnx"):
+        return weights_path if os.path.exists(weights_path) else None
+
+    onnx_path = os.path.splitext(weights_path)[0] + ".onnx"
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    if not export_missing:
+        return None
+
+    try:
+        return export_onnx(weights_path)
+    except Exception:
+        return None
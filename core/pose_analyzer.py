@@ -3,28 +3,75 @@ MediaPipe Pose integration for body posture analysis
 """
 import cv2
 import numpy as np
-import mediapipe as mp
-import math
-from collections import deque
+import time
+
+from .landmark_buffer import LandmarkRingBuffer, PoseHistoryView
+from .swing_kinematics import SwingKinematics
 
 class PoseAnalyzer:
-    def __init__(self):
-        """Initialize MediaPipe Pose detector"""
+    def __init__(self, crop_padding=0.25, crop_max_size=384, model_complexity=1, idle_model_complexity=0,
+                 stride=1, idle_stride=3, static_image_mode=False, smooth_landmarks=True):
+        """
+        Initialize MediaPipe Pose detector
+        
+        The analyzer starts active (full quality). The tracker calls set_active()
+        so that frames between swings use the cheaper idle settings.
+        
+        Args:
+            crop_padding: Padding around a person box, as a fraction of its size
+            crop_max_size: Person crops with a longer side than this are downscaled
+            model_complexity: MediaPipe model (0 lite, 1 full, 2 heavy) while active
+            idle_model_complexity: MediaPipe model while idle
+            stride: Run pose every Nth frame while active, extrapolating landmarks in between
+            idle_stride: Run pose every Nth frame while idle
+            static_image_mode: Detect on every processed frame instead of tracking landmarks
+            smooth_landmarks: MediaPipe temporal landmark smoothing
+        """
         print("Initializing MediaPipe Pose...")
         
-        # Initialize MediaPipe
+        for complexity in (model_complexity, idle_model_complexity):
+            if complexity not in (0, 1, 2):
+                raise ValueError(f"model_complexity must be 0, 1 or 2, got {complexity}")
+        
+        # Initialize MediaPipe (imported here - it is slow to import and only needed for pose)
+        import mediapipe as mp
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        # Configure pose detection
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        # Initialize pose history for stability tracking
-        self.pose_history = deque(maxlen=30)
+        # Pose quality policy - active while a swing is tracked, idle otherwise
+        self.static_image_mode = static_image_mode
+        self.smooth_landmarks = smooth_landmarks
+        self.active_settings = {'model_complexity': model_complexity, 'stride': max(1, stride)}
+        self.idle_settings = {'model_complexity': idle_model_complexity, 'stride': max(1, idle_stride)}
+        self.is_active = True
+        self.settings = self.active_settings
+        
+        # One MediaPipe graph per complexity, created on first use
+        self.pose_models = {}
+        self.pose = self._get_pose_model(model_complexity)
+        
+        # Stride state - last two inferred poses for landmark extrapolation
+        self.frame_index = 0
+        self.last_inference_index = None
+        self.last_inferred_pose = None
+        self.previous_inferred_pose = None
+        self.stats = {'inferred_frames': 0, 'extrapolated_frames': 0}
+        
+        # Landmark history for stability tracking - frames x 33 x (x, y, z, visibility)
+        self.landmark_buffer = LandmarkRingBuffer(capacity=30)
+        self.stability_window = 3          # Frames used for the stability score
+        self.stability_landmarks = [11, 12, 23, 24]  # Shoulders and hips
+        
+        # Streaming joint angles, angular velocities and swing phase
+        self.kinematics = SwingKinematics(capacity=self.landmark_buffer.capacity)
+        
+        # Person-box guided inference (analyze_pose with person_bbox)
+        self.crop_padding = crop_padding
+        self.crop_max_size = crop_max_size
+        self.min_crop_size = 32           # Smaller boxes use the full frame
+        self.min_crop_fill = 0.25         # Re-crop when the person shrinks below this share of the crop
+        self.last_crop = None
         
         # Key body landmarks for baseball swing analysis
         self.key_landmarks = {
@@ -49,40 +96,239 @@ class PoseAnalyzer:
         
         print("MediaPipe Pose initialized successfully!")
     
-    def analyze_pose(self, frame):
-        """Analyze pose in frame and return pose data"""
+    @property
+    def pose_history(self):
+        """Landmark history as a sequence of pose_data dicts (view of the ring buffer)"""
+        return PoseHistoryView(self.landmark_buffer)
+    
+    def analyze_pose(self, frame, person_bbox=None, timestamp=None):
+        """
+        Analyze pose in frame and return pose data
+        
+        Args:
+            person_bbox: (x1, y1, x2, y2) of the batter, e.g. the best YOLO person box.
+                Pose runs on a padded crop around it and landmarks are mapped back to
+                full-frame pixels. Without a box the full frame is used.
+            timestamp: Frame time in seconds for landmark velocities, defaults to now
+        """
+        self.frame_index += 1
+        if not self._should_infer():
+            self.stats['extrapolated_frames'] += 1
+            return self._extrapolate_pose()
+        
+        self.stats['inferred_frames'] += 1
+        self.last_inference_index = self.frame_index
+        
+        crop = self._get_pose_crop(frame.shape, person_bbox) if person_bbox is not None else None
+        self.last_crop = crop
+        
+        if crop is not None:
+            x1, y1, x2, y2 = crop
+            image = frame[y1:y2, x1:x2]
+            
+            # Downscale large crops - MediaPipe resizes to its own input size anyway
+            scale = self.crop_max_size / max(x2 - x1, y2 - y1)
+            if scale < 1:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            x1, y1 = 0, 0
+            x2, y2 = frame.shape[1], frame.shape[0]
+            image = frame
+        
         # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         results = self.pose.process(rgb_frame)
         
         if not results.pose_landmarks:
+            self.previous_inferred_pose = None
+            self.last_inferred_pose = None
             return {
                 'is_detected': False,
                 'landmarks': [],
-                'stability_score': 0
+                'stability_score': 0,
+                'angles': {},
+                'swing_phase': self.kinematics.phase,
+                'kinematics': None,
+                'crop': crop,
+                'extrapolated': False
             }
         
-        # Extract landmarks
-        landmarks = []
-        for landmark in results.pose_landmarks.landmark:
-            # Convert normalized coordinates to pixel coordinates
-            x = int(landmark.x * frame.shape[1])
-            y = int(landmark.y * frame.shape[0])
-            landmarks.append((x, y))
+        # Extract landmarks - normalized (crop) coordinates to full-frame pixels.
+        # z is relative to the hips on roughly the same scale as x, so it gets the x scale.
+        values = np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+                          dtype=np.float64)
+        values[:, 0] = np.trunc(values[:, 0] * (x2 - x1)) + x1
+        values[:, 1] = np.trunc(values[:, 1] * (y2 - y1)) + y1
+        values[:, 2] *= x2 - x1
+        landmarks = [(int(x), int(y)) for x, y in values[:, :2]]
         
         # Create pose data
         pose_data = {
             'is_detected': True,
             'landmarks': landmarks,
-            'stability_score': 0
+            'stability_score': 0,
+            'crop': crop,
+            'extrapolated': False
         }
         
         # Add to history and calculate stability
-        self.pose_history.append(pose_data)
+        timestamp = time.time() if timestamp is None else timestamp
+        slot = self.landmark_buffer.append(values, timestamp)
         pose_data['stability_score'] = self._calculate_stability_score(landmarks)
+        self.landmark_buffer.set_score(slot, pose_data['stability_score'])
         
+        # Swing biomechanics for this frame
+        kinematics = self.kinematics.update(values, timestamp)
+        pose_data['angles'] = kinematics['angles']
+        pose_data['swing_phase'] = kinematics['phase']
+        pose_data['kinematics'] = kinematics
+        
+        self.previous_inferred_pose = self.last_inferred_pose
+        self.last_inferred_pose = (self.frame_index, pose_data)
         return pose_data
     
+    def set_active(self, active):
+        """Switch between the active (swing tracked) and idle pose settings"""
+        active = bool(active)
+        if active == self.is_active:
+            return
+        
+        self.is_active = active
+        self.settings = self.active_settings if active else self.idle_settings
+        
+        complexity = self.settings['model_complexity']
+        if self.pose_models.get(complexity) is not self.pose:
+            self.pose = self._get_pose_model(complexity)
+            # A new graph has no landmarks to track from yet
+            self.last_inference_index = None
+    
+    def _get_pose_model(self, complexity):
+        """MediaPipe Pose graph for a model complexity (cached)"""
+        if complexity not in self.pose_models:
+            self.pose_models[complexity] = self.mp_pose.Pose(
+                static_image_mode=self.static_image_mode,
+                model_complexity=complexity,
+                smooth_landmarks=self.smooth_landmarks,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        return self.pose_models[complexity]
+    
+    def warmup(self):
+        """
+        Build the active and idle graphs and run a blank frame through each, so the
+        first real frames (and the first idle frame) do not pay for initialization
+        """
+        blank = np.zeros((256, 256, 3), dtype=np.uint8)
+        for settings in (self.active_settings, self.idle_settings):
+            self._get_pose_model(settings['model_complexity']).process(blank)
+    
+    def reset(self):
+        """Forget the landmark history, kinematics and stride state (e.g. for a new person)"""
+        self.frame_index = 0
+        self.last_inference_index = None
+        self.last_inferred_pose = None
+        self.previous_inferred_pose = None
+        self.last_crop = None
+        self.landmark_buffer.clear()
+        self.kinematics.reset()
+    
+    def close(self):
+        """Release the MediaPipe graphs"""
+        for pose in self.pose_models.values():
+            pose.close()
+        self.pose_models.clear()
+        self.pose = None
+    
+    def _should_infer(self):
+        """True on frames where pose is due according to the current stride"""
+        if self.last_inference_index is None:
+            return True
+        return self.frame_index - self.last_inference_index >= self.settings['stride']
+    
+    def _extrapolate_pose(self):
+        """
+        Pose for a skipped frame - the last inferred landmarks moved on at the
+        velocity between the last two inferences (held still without a previous one)
+        """
+        if self.last_inferred_pose is None:
+            return {'is_detected': False, 'landmarks': [], 'stability_score': 0, 'angles': {},
+                    'swing_phase': self.kinematics.phase, 'kinematics': None, 'crop': None, 'extrapolated': True}
+        
+        last_index, last_pose = self.last_inferred_pose
+        landmarks = np.array(last_pose['landmarks'], dtype=np.float32)
+        
+        if self.previous_inferred_pose is not None:
+            previous_index, previous_pose = self.previous_inferred_pose
+            gap = last_index - previous_index
+            # Only trust the velocity across one stride - older poses are stale
+            if 0 < gap <= self.settings['stride'] * 2:
+                velocity = (landmarks - np.array(previous_pose['landmarks'], dtype=np.float32)) / gap
+                landmarks = landmarks + velocity * (self.frame_index - last_index)
+        
+        return {
+            'is_detected': True,
+            'landmarks': [(int(x), int(y)) for x, y in landmarks],
+            'stability_score': last_pose['stability_score'],
+            'angles': last_pose['angles'],
+            'swing_phase': last_pose['swing_phase'],
+            'kinematics': last_pose['kinematics'],
+            'crop': last_pose['crop'],
+            'extrapolated': True
+        }
+    
+    def get_landmark_motion(self, window=10):
+        """
+        Velocity (px/s) and jitter (px) of the key landmarks over the landmark history
+        
+        Returns:
+            {landmark name: {'speed': float, 'jitter': float}}
+        """
+        indices = list(self.key_landmarks.values())
+        velocities = self.landmark_buffer.velocities()[indices]
+        jitter = self.landmark_buffer.jitter(indices, window)
+        
+        return {
+            name: {'speed': float(np.hypot(*velocities[i])), 'jitter': float(jitter[i])}
+            for i, name in enumerate(self.key_landmarks)
+        }
+    
+    def get_stats(self):
+        """Inference / extrapolation counters and the current pose settings"""
+        return dict(self.stats, active=self.is_active, **self.settings)
+    
+    def _get_pose_crop(self, frame_shape, person_bbox):
+        """
+        Padded crop around the person box
+        
+        Returns:
+            (x1, y1, x2, y2) in frame coordinates, or None to use the full frame
+        """
+        h, w = frame_shape[:2]
+        bx1, by1, bx2, by2 = map(int, person_bbox)
+        
+        # Keep the previous window while the batter stays inside it - MediaPipe's
+        # landmark tracking works in crop coordinates and a moving crop breaks it
+        if self.last_crop is not None:
+            cx1, cy1, cx2, cy2 = self.last_crop
+            inside = bx1 >= cx1 and by1 >= cy1 and bx2 <= cx2 and by2 <= cy2
+            fill = (bx2 - bx1) * (by2 - by1) / max(1, (cx2 - cx1) * (cy2 - cy1))
+            if inside and fill >= self.min_crop_fill:
+                return self.last_crop
+        
+        # Pad generously - arms and bat reach outside the person box during the swing
+        pad_x = int((bx2 - bx1) * self.crop_padding)
+        pad_y = int((by2 - by1) * self.crop_padding)
+        x1 = max(0, bx1 - pad_x)
+        y1 = max(0, by1 - pad_y)
+        x2 = min(w, bx2 + pad_x)
+        y2 = min(h, by2 + pad_y)
+        
+        if x2 - x1 < self.min_crop_size or y2 - y1 < self.min_crop_size:
+            return None
+        
+        return (x1, y1, x2, y2)
+    
     def draw_pose(self, frame, pose_data):
         """Draw pose landmarks and connections on frame"""
         if not pose_data or not pose_data['is_detected']:
@@ -131,133 +377,19 @@ class PoseAnalyzer:
         
         return normalized
     
-    def _calculate_swing_angles(self, landmarks):
-        """Calculate important angles for baseball swing analysis"""
-        angles = {}
-        
-        try:
-            lm = landmarks
-            
-            # 1. Shoulder angle (shoulder tilt/alignment)
-            left_shoulder = [lm[self.key_landmarks['left_shoulder']][0], 
-                           lm[self.key_landmarks['left_shoulder']][1]]
-            right_shoulder = [lm[self.key_landmarks['right_shoulder']][0], 
-                            lm[self.key_landmarks['right_shoulder']][1]]
-            
-            shoulder_angle = np.arctan2(
-                right_shoulder[1] - left_shoulder[1],
-                right_shoulder[0] - left_shoulder[0]
-            ) * 180 / np.pi
-            
-            angles['shoulder_tilt'] = abs(shoulder_angle)
-            
-            # 2. Hip angle (hip rotation indicator)
-            left_hip = [lm[self.key_landmarks['left_hip']][0], 
-                       lm[self.key_landmarks['left_hip']][1]]
-            right_hip = [lm[self.key_landmarks['right_hip']][0], 
-                        lm[self.key_landmarks['right_hip']][1]]
-            
-            hip_angle = np.arctan2(
-                right_hip[1] - left_hip[1],
-                right_hip[0] - left_hip[0]
-            ) * 180 / np.pi
-            
-            angles['hip_rotation'] = abs(hip_angle)
-            
-            # 3. Torso rotation (difference between shoulders and hips)
-            angles['torso_rotation'] = abs(angles['shoulder_tilt'] - angles['hip_rotation'])
-            
-            # 4. Batting stance width (distance between feet)
-            left_ankle = [lm[self.key_landmarks['left_ankle']][0], 
-                         lm[self.key_landmarks['left_ankle']][1]]
-            right_ankle = [lm[self.key_landmarks['right_ankle']][0], 
-                          lm[self.key_landmarks['right_ankle']][1]]
-            
-            stance_width = np.sqrt(
-                (right_ankle[0] - left_ankle[0])**2 + 
-                (right_ankle[1] - left_ankle[1])**2
-            )
-            
-            angles['stance_width'] = stance_width
-            
-        except Exception as e:
-            print(f"Error calculating angles: {e}")
-            # Return default angles if calculation fails
-            angles = {
-                'shoulder_tilt': 0,
-                'hip_rotation': 0,
-                'torso_rotation': 0,
-                'stance_width': 0
-            }
-        
-        return angles
-    
     def _calculate_stability_score(self, landmarks):
-        """Calculate pose stability score"""
-        if len(self.pose_history) < 2:
+        """Calculate pose stability score from the latest frames in the landmark buffer"""
+        if len(self.landmark_buffer) < 2:
             return 50  # Default to medium stability with not enough history
         
-        # Key points for stability (shoulders, hips)
-        key_indices = [11, 12, 23, 24]  # MediaPipe pose indices
-        
-        # Calculate movement of key points
-        total_movement = 0
-        num_valid_points = 0
-        
-        for idx in key_indices:
-            if idx < len(landmarks):
-                prev_poses = [pose['landmarks'][idx] for pose in list(self.pose_history)[-3:] 
-                            if pose['landmarks'] and idx < len(pose['landmarks'])]
-                
-                if len(prev_poses) > 1:
-                    movements = []
-                    for i in range(1, len(prev_poses)):
-                        dx = prev_poses[i][0] - prev_poses[i-1][0]
-                        dy = prev_poses[i][1] - prev_poses[i-1][1]
-                        movement = math.sqrt(dx*dx + dy*dy)
-                        movements.append(movement)
-                    
-                    if movements:
-                        avg_movement = sum(movements) / len(movements)
-                        total_movement += avg_movement
-                        num_valid_points += 1
-        
-        # Convert movement to stability score (inverse relationship)
-        if num_valid_points == 0:
-            return 50  # Default to medium stability if no valid points
-            
-        avg_movement = total_movement / num_valid_points
+        # Mean movement of the key points (shoulders, hips) between consecutive frames
+        avg_movement = self.landmark_buffer.mean_displacement(self.stability_landmarks, self.stability_window)
         max_movement = 50  # Lower threshold for maximum movement
         stability = max(0, min(100, 100 - (avg_movement / max_movement * 100)))
         
         # Smooth the stability score
         return int((stability + 50) / 2)  # Blend with medium stability to avoid extremes
     
-    def _determine_swing_phase(self, landmarks):
-        """Determine basic swing phase based on arm positions"""
-        try:
-            lm = landmarks
-            
-            # Get wrist and shoulder positions
-            left_wrist_y = lm[self.key_landmarks['left_wrist']][1]
-            right_wrist_y = lm[self.key_landmarks['right_wrist']][1]
-            left_shoulder_y = lm[self.key_landmarks['left_shoulder']][1]
-            right_shoulder_y = lm[self.key_landmarks['right_shoulder']][1]
-            
-            avg_wrist_y = (left_wrist_y + right_wrist_y) / 2
-            avg_shoulder_y = (left_shoulder_y + right_shoulder_y) / 2
-            
-            # Simple phase detection based on hand height relative to shoulders
-            if avg_wrist_y < avg_shoulder_y - 0.1:
-                return 'load_position'  # Hands high, loading
-            elif avg_wrist_y > avg_shoulder_y + 0.1:
-                return 'follow_through'  # Hands low, follow through
-            else:
-                return 'contact_zone'  # Hands near shoulder level, contact zone
-                
-        except:
-            return 'unknown'
-    
     def _draw_swing_specific_info(self, frame, pose_data):
         """Draw swing-specific information on frame"""
         if not pose_data['is_detected']:
@@ -289,25 +421,26 @@ class PoseAnalyzer:
         # Angles
         angles = pose_data['angles']
         if angles:
-            cv2.putText(frame, f"Shoulder Tilt: {angles.get('shoulder_tilt', 0):.1f}°", 
+            cv2.putText(frame, f"Shoulder Tilt: {angles.get('shoulder_tilt') or 0:.1f}°", 
                        (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
             y_offset += line_height
             
-            cv2.putText(frame, f"Hip Rotation: {angles.get('hip_rotation', 0):.1f}°", 
+            cv2.putText(frame, f"Hip Rotation: {angles.get('hip_rotation') or 0:.1f}°", 
                        (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
             y_offset += line_height
             
-            cv2.putText(frame, f"Torso Twist: {angles.get('torso_rotation', 0):.1f}°", 
+            cv2.putText(frame, f"Separation: {angles.get('hip_shoulder_separation') or 0:.1f}°", 
                        (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
             y_offset += line_height
         
         # Swing phase
         phase = pose_data['swing_phase']
         phase_color = {
-            'load_position': (0, 255, 255),  # Yellow
-            'contact_zone': (0, 255, 0),     # Green
-            'follow_through': (255, 0, 0),   # Blue
-            'unknown': (128, 128, 128)       # Gray
+            'stance': (128, 128, 128),       # Gray
+            'load': (0, 255, 255),           # Yellow
+            'stride': (0, 165, 255),         # Orange
+            'contact': (0, 255, 0),          # Green
+            'follow_through': (255, 0, 0)    # Blue
         }.get(phase, (255, 255, 255))
         
         cv2.putText(frame, f"Phase: {phase.replace('_', ' ').title()}", 
@@ -0,0 +1,79 @@
+"""
+Startup profiling - how long imports, model loads and warm-up take before the first frame
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Records timed startup phases (from any thread) and prints a report"""
+
+    def __init__(self, enabled=True, start=None):
+        """
+        Args:
+            enabled: When False every method is a cheap no-op
+            start: perf_counter() value of process start (defaults to now)
+        """
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        self.records = []   # (start offset s, duration s, thread name, phase name)
+        self.milestones = []
+        self._lock = threading.Lock()
+        self.reported = False
+
+    def _record(self, started, duration, name):
+        with self._lock:
+            self.records.append((started - self.start, duration, threading.current_thread().name, name))
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work"""
+        if not self.enabled:
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(started, time.perf_counter() - started, name)
+
+    def time_import(self, module_name):
+        """
+        Import a module under its own phase; a missing optional module is not
+        raised but recorded as "import X (missing)"
+        """
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        name = f"import {module_name}"
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            name += " (missing)"
+        finally:
+            self._record(started, time.perf_counter() - started, name)
+
+    def mark(self, name):
+        """Record a milestone as time since process start"""
+        if self.enabled:
+            with self._lock:
+                self.milestones.append((time.perf_counter() - self.start, name))
+
+    def report(self):
+        """Print every phase in start order, then the milestones"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+
+        print("\nStartup Profile:")
+        print("----------------")
+        print(f"{'start':>8}  {'duration':>9}  {'thread':<14} phase")
+        for offset, duration, thread, name in sorted(self.records):
+            print(f"{offset * 1000:7.0f}ms  {duration * 1000:8.0f}ms  {thread[:14]:<14} {name}")
+        for offset, name in self.milestones:
+            print(f"{offset * 1000:7.0f}ms  {'':>9}  {'':<14} ▶ {name}")
+        print()
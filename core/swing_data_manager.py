@@ -55,8 +55,25 @@ class SwingDataManager:
         self.current_session = self._create_new_session(name)
         return self.current_session["id"]
     
-    def add_swing_to_session(self, metrics, frame, path_points):
-        """Add a swing to the current session"""
+    @staticmethod
+    def swing_data_from_metrics(metrics):
+        """Convert tracker metrics (numpy types) to the plain values stored per swing"""
+        return {
+            "efficiency_score": int(metrics['efficiency_score']),
+            "power_score": int(metrics['power_score']),
+            "swing_speed": float(metrics['swing_speed']),
+            "path_consistency": int(metrics['path_consistency']),
+            "follow_through": int(metrics['follow_through']),
+            "pose_stability": int(metrics['pose_stability']),
+            "sweet_spot_contact": bool(metrics['sweet_spot_contact']),
+            "impact_point": tuple(map(int, metrics['impact_point'])) if metrics['impact_point'] else None,
+            "swing_phase": str(metrics['swing_phase']),
+            "hip_shoulder_separation": float(metrics['hip_shoulder_separation']),
+            "hip_lead_ms": float(metrics['hip_lead_ms']) if metrics['hip_lead_ms'] is not None else None
+        }
+    
+    def add_swing_to_session(self, metrics, frame, path_points, source=None):
+        """Add a swing to the current session (source: e.g. the video file it came from)"""
         if not self.current_session:
             return False
 
@@ -76,11 +93,16 @@ class SwingDataManager:
                 "pose_stability": metrics["pose_stability"],
                 "sweet_spot_contact": metrics["sweet_spot_contact"],
                 "impact_point": metrics["impact_point"],
+                "swing_phase": metrics.get("swing_phase"),
+                "hip_shoulder_separation": metrics.get("hip_shoulder_separation"),
+                "hip_lead_ms": metrics.get("hip_lead_ms"),
                 "path_length": len(path_points)
             },
             "has_image": True,
             "has_path": bool(path_points)
         }
+        if source:
+            swing_data["source"] = source
 
         # Save swing image
         session_dir = os.path.join(self.base_dir, self.current_session["id"])
@@ -284,7 +306,8 @@ class SwingDataManager:
                     "Swing ID", "Timestamp", "Efficiency Score", "Power Score",
                     "Swing Speed", "Path Consistency", "Follow Through",
                     "Pose Stability", "Sweet Spot Contact", "Impact Point X",
-                    "Impact Point Y", "Path Length"
+                    "Impact Point Y", "Path Length", "Swing Phase",
+                    "Hip-Shoulder Separation", "Hip Lead (ms)"
                 ])
                 
                 # Write data
@@ -303,7 +326,10 @@ class SwingDataManager:
                         data.get("sweet_spot_contact", ""),
                         impact_x,
                         impact_y,
-                        data["path_length"]
+                        data["path_length"],
+                        data.get("swing_phase", ""),
+                        data.get("hip_shoulder_separation", ""),
+                        data.get("hip_lead_ms", "")
                     ])
             return True
             
@@ -0,0 +1,312 @@
+"""
+Streaming swing kinematics from pose landmarks
+
+Per frame: joint angles, shoulder/hip tilt and rotation, hip-shoulder
+separation, angular velocities and a swing phase state machine
+(stance -> load -> stride -> contact -> follow_through). Each update only
+touches the newest frame, so the biomechanics are available while the
+swing is happening, without a second pass over the video.
+"""
+
+import numpy as np
+
+# MediaPipe Pose landmark indices
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Joint angles - (point, vertex, point)
+JOINT_NAMES = ('left_elbow', 'right_elbow', 'left_knee', 'right_knee', 'left_shoulder', 'right_shoulder')
+JOINT_TRIPLETS = np.array([
+    [11, 13, 15],  # Left shoulder - elbow - wrist
+    [12, 14, 16],  # Right shoulder - elbow - wrist
+    [23, 25, 27],  # Left hip - knee - ankle
+    [24, 26, 28],  # Right hip - knee - ankle
+    [23, 11, 13],  # Left hip - shoulder - elbow
+    [24, 12, 14],  # Right hip - shoulder - elbow
+])
+
+# Body lines (left, right) for tilt and rotation
+LINE_PAIRS = np.array([[LEFT_SHOULDER, RIGHT_SHOULDER], [LEFT_HIP, RIGHT_HIP]])
+
+# Column order of the angle arrays
+ANGLE_NAMES = JOINT_NAMES + ('shoulder_tilt', 'hip_tilt', 'shoulder_rotation', 'hip_rotation',
+                             'hip_shoulder_separation')
+ANGLE_INDEX = {name: i for i, name in enumerate(ANGLE_NAMES)}
+
+PHASES = ('stance', 'load', 'stride', 'contact', 'follow_through')
+
+
+def wrap_degrees(angles):
+    """Wrap angles (or angle differences) to [-180, 180)"""
+    return (np.asarray(angles) + 180.0) % 360.0 - 180.0
+
+
+def compute_angles(landmarks, min_visibility=0.5):
+    """
+    Swing angles in degrees for one frame or a stack of frames
+
+    Args:
+        landmarks: (..., 33, 4) array of x, y (px), z (px, same scale as x), visibility
+        min_visibility: Angles that use a landmark below this visibility are NaN
+
+    Returns:
+        (..., len(ANGLE_NAMES)) float64 array, columns in ANGLE_NAMES order
+    """
+    lm = np.asarray(landmarks, dtype=np.float64)
+
+    # Joint angles - angle at the vertex between the two limb segments
+    points = lm[..., JOINT_TRIPLETS, :2]                 # (..., joints, 3, 2)
+    v1 = points[..., 0, :] - points[..., 1, :]
+    v2 = points[..., 2, :] - points[..., 1, :]
+    cross = v1[..., 0] * v2[..., 1] - v1[..., 1] * v2[..., 0]
+    dot = (v1 * v2).sum(axis=-1)
+    joints = np.degrees(np.arctan2(np.abs(cross), dot))
+    joint_visible = (lm[..., JOINT_TRIPLETS, 3] >= min_visibility).all(axis=-1)
+    joints = np.where(joint_visible, joints, np.nan)
+
+    # Shoulder and hip lines - tilt from horizontal (image y points down, so a
+    # positive tilt means the right side is lower) and rotation from z depth
+    # (0 = square to the camera)
+    delta = lm[..., LINE_PAIRS[:, 1], :3] - lm[..., LINE_PAIRS[:, 0], :3]   # (..., 2, 3)
+    tilt = np.degrees(np.arctan2(delta[..., 1], np.abs(delta[..., 0])))
+    rotation = np.degrees(np.arctan2(delta[..., 2], delta[..., 0]))
+    line_visible = (lm[..., LINE_PAIRS, 3] >= min_visibility).all(axis=-1)
+    tilt = np.where(line_visible, tilt, np.nan)
+    rotation = np.where(line_visible, rotation, np.nan)
+
+    separation = wrap_degrees(rotation[..., 0] - rotation[..., 1])
+
+    return np.concatenate([joints, tilt, rotation, separation[..., None]], axis=-1)
+
+
+class SwingKinematics:
+    """Incremental per-frame kinematics and swing phase for one batter"""
+
+    def __init__(self, capacity=30, load_speed=0.5, stride_speed=0.8, swing_speed=3.0,
+                 release_ratio=0.6, settle_frames=5, min_visibility=0.5):
+        """
+        Speeds are in torso lengths per second (mid-shoulder to mid-hip distance),
+        so the thresholds do not depend on how far the batter is from the camera.
+
+        Args:
+            capacity: Frames of angle / velocity history kept
+            load_speed: Hand speed that starts the load from stance
+            stride_speed: Ankle speed that marks the stride
+            swing_speed: Hand speed that marks the swing into the contact zone
+            release_ratio: Follow-through starts once hand speed drops below this share of its peak
+            settle_frames: Quiet frames before returning to stance
+            min_visibility: Landmark visibility needed for an angle
+        """
+        self.capacity = capacity
+        self.load_speed = load_speed
+        self.stride_speed = stride_speed
+        self.swing_speed = swing_speed
+        self.release_ratio = release_ratio
+        self.settle_frames = settle_frames
+        self.min_visibility = min_visibility
+
+        # Ring buffers - angles (deg) and angular velocities (deg/s) per frame
+        self.angles = np.full((capacity, len(ANGLE_NAMES)), np.nan)
+        self.angular_velocities = np.full((capacity, len(ANGLE_NAMES)), np.nan)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.phases = np.zeros(capacity, dtype=np.int8)
+        self.head = 0
+        self.count = 0
+
+        self.last_landmarks = None
+        self.reset_swing()
+
+    def __len__(self):
+        return self.count
+
+    def reset(self):
+        """Forget the history and go back to stance"""
+        self.head = 0
+        self.count = 0
+        self.last_landmarks = None
+        self.reset_swing()
+
+    def reset_swing(self):
+        """Clear the per-swing state (phase, peaks and separation timing)"""
+        self.phase = 'stance'
+        self.phase_times = {}
+        self.quiet_frames = 0
+        self.peak_hand_speed = 0.0
+        self.peak_hip_velocity = 0.0
+        self.peak_hip_time = None
+        self.peak_shoulder_velocity = 0.0
+        self.peak_shoulder_time = None
+        self.max_separation = 0.0
+        self.max_separation_time = None
+
+    def update(self, landmarks, timestamp):
+        """
+        Add a frame and advance the phase state machine
+
+        Args:
+            landmarks: (33, 4) array of x, y (px), z (px), visibility
+            timestamp: Frame time in seconds
+
+        Returns:
+            Kinematics dict for this frame (see get_state)
+        """
+        # A copy - callers may reuse one buffer, and last_landmarks must keep this frame
+        landmarks = np.array(landmarks, dtype=np.float64)
+        angles = compute_angles(landmarks, self.min_visibility)
+
+        velocities = np.full(len(ANGLE_NAMES), np.nan)
+        hand_speed = ankle_speed = 0.0
+        if self.count:
+            previous = (self.head - 1) % self.capacity
+            dt = timestamp - self.timestamps[previous]
+            if dt > 0:
+                velocities = wrap_degrees(angles - self.angles[previous]) / dt
+                hand_speed, ankle_speed = self._segment_speeds(landmarks, dt)
+
+        slot = self.head
+        self.angles[slot] = angles
+        self.angular_velocities[slot] = velocities
+        self.timestamps[slot] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.last_landmarks = landmarks
+
+        self._update_separation(angles, velocities, timestamp)
+        self._update_phase(hand_speed, ankle_speed, timestamp)
+        self.phases[slot] = PHASES.index(self.phase)
+
+        return self.get_state(landmarks, hand_speed)
+
+    def _segment_speeds(self, landmarks, dt):
+        """Mean hand speed and fastest ankle speed in torso lengths per second"""
+        previous = self.last_landmarks
+        torso = self._torso_length(landmarks)
+        if previous is None or not torso:
+            return 0.0, 0.0
+
+        steps = np.hypot(*(landmarks[:, :2] - previous[:, :2]).T) / dt / torso
+        hand_speed = float(steps[[LEFT_WRIST, RIGHT_WRIST]].mean())
+        ankle_speed = float(steps[[LEFT_ANKLE, RIGHT_ANKLE]].max())
+        return hand_speed, ankle_speed
+
+    @staticmethod
+    def _torso_length(landmarks):
+        """Mid-shoulder to mid-hip distance in pixels"""
+        shoulders = landmarks[[LEFT_SHOULDER, RIGHT_SHOULDER], :2].mean(axis=0)
+        hips = landmarks[[LEFT_HIP, RIGHT_HIP], :2].mean(axis=0)
+        return float(np.hypot(*(shoulders - hips)))
+
+    def _update_separation(self, angles, velocities, timestamp):
+        """Track peak hip / shoulder rotation speed and separation within the swing"""
+        if self.phase == 'stance':
+            return
+
+        hip_velocity = abs(velocities[ANGLE_INDEX['hip_rotation']])
+        shoulder_velocity = abs(velocities[ANGLE_INDEX['shoulder_rotation']])
+        separation = abs(angles[ANGLE_INDEX['hip_shoulder_separation']])
+
+        # NaN comparisons are False, so frames with hidden landmarks are skipped
+        if hip_velocity > self.peak_hip_velocity:
+            self.peak_hip_velocity = float(hip_velocity)
+            self.peak_hip_time = timestamp
+        if shoulder_velocity > self.peak_shoulder_velocity:
+            self.peak_shoulder_velocity = float(shoulder_velocity)
+            self.peak_shoulder_time = timestamp
+        if separation > self.max_separation:
+            self.max_separation = float(separation)
+            self.max_separation_time = timestamp
+
+    def _update_phase(self, hand_speed, ankle_speed, timestamp):
+        """Phase state machine - phases only move forward until the swing settles"""
+        phase = self.phase
+        quiet = hand_speed < self.load_speed and ankle_speed < self.stride_speed
+        self.quiet_frames = self.quiet_frames + 1 if quiet else 0
+
+        if phase == 'stance':
+            if hand_speed >= self.load_speed:
+                phase = 'load'
+        elif phase in ('load', 'stride'):
+            if hand_speed >= self.swing_speed:
+                phase = 'contact'  # Some hitters have no visible stride
+            elif phase == 'load' and ankle_speed >= self.stride_speed:
+                phase = 'stride'
+            elif self.quiet_frames >= self.settle_frames:
+                phase = 'stance'  # Loaded but never swung
+        elif phase == 'contact':
+            if hand_speed < self.peak_hand_speed * self.release_ratio:
+                phase = 'follow_through'
+        elif phase == 'follow_through':
+            if self.quiet_frames >= self.settle_frames:
+                phase = 'stance'
+
+        if phase in ('contact', 'follow_through'):
+            self.peak_hand_speed = max(self.peak_hand_speed, hand_speed)
+
+        if phase != self.phase:
+            if phase == 'stance':
+                self.reset_swing()
+            else:
+                self.phase = phase
+                self.phase_times[phase] = timestamp
+
+    def get_separation_timing(self):
+        """
+        Hip-shoulder separation timing for the current swing
+
+        Returns:
+            Dict with peak rotation speeds (deg/s), their times, the hip lead in ms
+            (positive when the hips peak before the shoulders) and the maximum
+            separation angle
+        """
+        lead_ms = None
+        if self.peak_hip_time is not None and self.peak_shoulder_time is not None:
+            lead_ms = (self.peak_shoulder_time - self.peak_hip_time) * 1000.0
+
+        return {
+            'peak_hip_velocity': self.peak_hip_velocity,
+            'peak_hip_time': self.peak_hip_time,
+            'peak_shoulder_velocity': self.peak_shoulder_velocity,
+            'peak_shoulder_time': self.peak_shoulder_time,
+            'hip_lead_ms': lead_ms,
+            'max_separation': self.max_separation,
+            'max_separation_time': self.max_separation_time
+        }
+
+    def get_state(self, landmarks=None, hand_speed=0.0):
+        """Kinematics of the newest frame as plain Python values (None for hidden joints)"""
+        if not self.count:
+            return {'angles': {}, 'angular_velocities': {}, 'phase': self.phase}
+
+        slot = (self.head - 1) % self.capacity
+        angles = {name: _to_float(value) for name, value in zip(ANGLE_NAMES, self.angles[slot])}
+        velocities = {name: _to_float(value) for name, value in zip(ANGLE_NAMES, self.angular_velocities[slot])}
+
+        landmarks = self.last_landmarks if landmarks is None else landmarks
+        angles['stance_width'] = float(np.hypot(*(landmarks[RIGHT_ANKLE, :2] - landmarks[LEFT_ANKLE, :2])))
+
+        return {
+            'angles': angles,
+            'angular_velocities': velocities,
+            'hand_speed': hand_speed,
+            'phase': self.phase,
+            'phase_times': dict(self.phase_times),
+            'separation_timing': self.get_separation_timing()
+        }
+
+    def history(self, n=None):
+        """
+        Last n frames, oldest first
+
+        Returns:
+            (timestamps, angles, angular velocities, phase names)
+        """
+        n = self.count if n is None else min(n, self.count)
+        indices = (self.head - n + np.arange(n)) % self.capacity
+        phases = [PHASES[i] for i in self.phases[indices]]
+        return self.timestamps[indices], self.angles[indices], self.angular_velocities[indices], phases
+
+
+def _to_float(value):
+    return None if np.isnan(value) else float(value)
@@ -4,13 +4,44 @@ Handles bat detection at various distances with SPEED priority
 """
 
 import cv2
+import importlib.util
 import numpy as np
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .box_ops import nms, weighted_box_fusion
+from .detection_array import DetectionArray, to_numpy
+from .onnx_backend import OnnxYoloModel, resolve_onnx_path
+from .model_cache import ModelCache
 
 class YoloDetector:
-    def __init__(self, custom_bat_model_path=None):
-        """Initialize FAST detector optimized for real-time performance"""
+    def __init__(self, custom_bat_model_path=None, execution_mode='sequential', fused_model_path=None,
+                 roi_inference=False, backend='ultralytics', num_threads=None, warmup=True,
+                 model_cache=True):
+        """
+        Initialize FAST detector optimized for real-time performance
+        
+        Args:
+            custom_bat_model_path: Path to your trained bat detection model
+            execution_mode: 'sequential' runs the bat and COCO models back to back,
+                'parallel' dispatches both at once on dedicated worker threads
+            fused_model_path: Path to a single bat+ball+person model. When it loads,
+                it replaces both the bat model and the COCO model ('auto' searches
+                the default model folders for swingman_fused_detector.pt)
+            roi_inference: Run the bat model on a padded crop around the last
+                person/bat box at a smaller input size, falling back to the full frame
+            backend: 'ultralytics' (PyTorch) or 'onnx' (ONNX Runtime CPU, exports
+                missing .onnx files on first use). A .onnx model path always uses ONNX Runtime.
+            num_threads: Intra-op threads, e.g. 1 when one detector runs per core in a
+                process pool (None = backend default). ONNX Runtime applies it per
+                model session; PyTorch's setting is process-wide
+            warmup: Run a dummy frame through each model while loading. With False,
+                call warmup() later (e.g. on a background thread)
+            model_cache: Persistent artifact cache for resolved model paths and
+                pre-optimized ONNX models (True = default ModelCache, a ModelCache
+                instance, or False to disable)
+        """
         # Initialize storage
         self.last_detections = {
             'bats': [],
@@ -19,7 +50,8 @@ class YoloDetector:
             'raw_detections': [],
             'model_info': {
                 'bat_model': 'none',
-                'ball_model': 'none'
+                'ball_model': 'none',
+                'fused_model': 'none'
             }
         }
         
@@ -27,13 +59,45 @@ class YoloDetector:
         self.detection_times = []
         self.avg_fps = 0
         
-        # Try to import YOLO
+        # ROI inference around the last known batter / bat
+        self.roi_inference = roi_inference
+        self.roi_imgsz = 320               # Model input size for ROI crops
+        self.roi_padding = 0.5             # Padding as a fraction of the window size
+        self.roi_min_size = 160            # Minimum crop side in pixels
+        self.roi_max_area_ratio = 0.6      # Use the full frame if the crop would be larger
+        self.roi_stats = {'hits': 0, 'misses': 0, 'full_frame': 0}
+        
+        # Parallel execution - one single-thread executor per model
+        self.execution_mode = execution_mode
+        self.bat_executor = None
+        self.coco_executor = None
+        
+        # Inference backend
+        self.backend = backend
+        self.warmup_on_load = warmup
+        self.model_cache = ModelCache() if model_cache is True else (model_cache or None)
+        self.onnx_threads = num_threads
+        self.torch_threads = num_threads
+        if num_threads is not None:
+            self._set_torch_threads(num_threads)
+        elif execution_mode == 'parallel':
+            # Two models run at once and share the CPU
+            self.onnx_threads = max(1, (os.cpu_count() or 2) // 2)
+        
+        # Try to import YOLO (not needed if the ONNX backend has its models already)
         try:
             from ultralytics import YOLO
             self.YOLO = YOLO
             self.model_available = True
         except ImportError:
+            self.YOLO = None
             self.model_available = False
+        
+        if backend == 'onnx':
+            # Only check that it is installed - the runtime loads with the first model
+            self.model_available = importlib.util.find_spec("onnxruntime") is not None
+        
+        if not self.model_available:
             return
         
         # Initialize model variables
@@ -41,6 +105,8 @@ class YoloDetector:
         self.ball_model = None
         self.bat_model_available = False
         self.ball_model_available = False
+        self.fused_model = None
+        self.fused_model_available = False
         
         # Detection thresholds - Lower thresholds for more sensitivity
         self.bat_confidence_threshold = 0.1   # Reduced from 0.15
@@ -57,37 +123,108 @@ class YoloDetector:
         self.coco_person_id = 0
         self.coco_sports_ball_id = 32
         
-        # Load models
-        if self.model_available:
-            self._load_bat_model(custom_bat_model_path)
-            self._load_ball_model()
+        # Fused model class names (matched case-insensitively)
+        self.fused_bat_names = ('bat', 'baseball bat')
+        self.fused_ball_names = ('ball', 'baseball', 'sports ball')
+        self.fused_person_names = ('person', 'batter')
         
+        # Load models - one fused network if available, otherwise bat + COCO
+        if self.model_available:
+            if fused_model_path:
+                self._load_fused_model(fused_model_path)
+            if not self.fused_model_available:
+                self._load_bat_model(custom_bat_model_path)
+                self._load_ball_model()
+        
+        if self.execution_mode == 'parallel' and self.bat_model_available and self.ball_model_available:
+            self._start_parallel_workers()
+        
+    def _start_parallel_workers(self):
+        """
+        Create one worker thread per model
+        
+        torch.set_num_threads is process-wide, so it cannot be split per worker:
+        unless num_threads was given, the whole process gets half the cores, and
+        the two models running at once use about all of them
+        """
+        if self.torch_threads is None:
+            self.torch_threads = max(1, (os.cpu_count() or 2) // 2)
+            self._set_torch_threads(self.torch_threads)
+        
+        self.bat_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo-bat")
+        self.coco_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo-coco")
+    
+    @staticmethod
+    def _set_torch_threads(num_threads):
+        """Set PyTorch's intra-op thread count (process-wide, not per thread)"""
+        try:
+            import torch
+            torch.set_num_threads(num_threads)
+        except Exception:
+            pass
+    
+    def close(self):
+        """Shut down parallel workers"""
+        for executor in (self.bat_executor, self.coco_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.bat_executor = None
+        self.coco_executor = None
+        
+    def _create_model(self, model_path):
+        """Create a model for the configured backend (.onnx paths always use ONNX Runtime)"""
+        if self.backend == 'onnx' or model_path.endswith('.onnx'):
+            onnx_path = resolve_onnx_path(model_path, export_missing=self.YOLO is not None)
+            if onnx_path is None:
+                raise FileNotFoundError(f"No ONNX model for {model_path}")
+            
+            # Reuse the graph-optimized copy from earlier launches
+            if self.model_cache is not None:
+                optimized_path, names = self.model_cache.optimized_onnx_model(onnx_path)
+                if optimized_path:
+                    return OnnxYoloModel(optimized_path, num_threads=self.onnx_threads, names=names,
+                                         optimized=True)
+            return OnnxYoloModel(onnx_path, num_threads=self.onnx_threads)
+        
+        if self.YOLO is None:
+            raise ImportError("ultralytics is required for .pt models")
+        return self.YOLO(model_path)
+    
+    def _find_model_file(self, filenames):
+        """Search the default model folders for the first existing file"""
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        candidates = []
+        for filename in filenames:
+            candidates += [
+                os.path.join(script_dir, "..", "Models", filename),
+                os.path.join(script_dir, "Models", filename),
+                os.path.join(script_dir, "..", "models", filename),
+                os.path.join(script_dir, "models", filename),
+                filename
+            ]
+        
+        # The cache remembers the hit from the last launch
+        if self.model_cache is not None:
+            return self.model_cache.resolve_path(candidates)
+        return next((location for location in candidates if os.path.exists(location)), None)
+    
     def _load_bat_model(self, custom_bat_model_path):
         """Load custom bat model with speed optimization"""
         try:
             if custom_bat_model_path is None:
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                possible_locations = [
-                    os.path.join(script_dir, "..", "Models", "swingman_bat_detector.pt"),
-                    os.path.join(script_dir, "Models", "swingman_bat_detector.pt"),
-                    os.path.join(script_dir, "..", "models", "swingman_bat_detector.pt"),
-                    os.path.join(script_dir, "models", "swingman_bat_detector.pt"),
-                    "swingman_bat_detector.pt",
-                    "best.pt"
-                ]
-                
-                for location in possible_locations:
-                    if os.path.exists(location):
-                        custom_bat_model_path = location
-                        break
+                candidates = ["swingman_bat_detector.pt", "best.pt"]
+                if self.backend == 'onnx':
+                    # Prefer the INT8 model from tools/quantize_bat_model.py
+                    candidates = ["swingman_bat_detector_int8.onnx", "swingman_bat_detector.onnx"] + candidates
+                custom_bat_model_path = self._find_model_file(candidates)
             
             if custom_bat_model_path and os.path.exists(custom_bat_model_path):
                 # Load with performance optimization
-                self.bat_model = self.YOLO(custom_bat_model_path)
+                self.bat_model = self._create_model(custom_bat_model_path)
                 
                 # Warm up the model
-                dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                _ = self.bat_model(dummy_frame, conf=0.5, verbose=False)
+                if self.warmup_on_load:
+                    self._warmup_model(self.bat_model)
                 
                 self.bat_model_available = True
                 self.bat_model_path = custom_bat_model_path
@@ -102,19 +239,81 @@ class YoloDetector:
     def _load_ball_model(self):
         """Load COCO model (optional for speed)"""
         try:
-            self.ball_model = self.YOLO("yolov8n.pt")
+            self.ball_model = self._create_model("yolov8n.pt")
             
             # Warm up COCO model too
-            dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            _ = self.ball_model(dummy_frame, conf=0.5, verbose=False)
+            if self.warmup_on_load:
+                self._warmup_model(self.ball_model)
             
             self.ball_model_available = True
             self.ball_model_classes = self.ball_model.names
+            self.coco_ball_class_ids, self.coco_person_class_ids = self._coco_class_groups(self.ball_model.names)
             self.last_detections['model_info']['ball_model'] = "yolov8n.pt"
             
         except Exception:
             self.ball_model_available = False
     
+    def _load_fused_model(self, fused_model_path):
+        """Load a single multi-class bat/ball/person model"""
+        try:
+            if fused_model_path == 'auto':
+                fused_model_path = self._find_model_file(["swingman_fused_detector.pt"])
+            
+            if not fused_model_path or not os.path.exists(fused_model_path):
+                return
+            
+            model = self._create_model(fused_model_path)
+            classes = self._map_fused_classes(model.names)
+            if classes['bats'] is None:
+                # Not a fused model - it cannot replace the bat model
+                return
+            
+            # Warm up the model
+            if self.warmup_on_load:
+                self._warmup_model(model)
+            
+            self.fused_model = model
+            self.fused_model_path = fused_model_path
+            self.fused_model_classes = model.names
+            self.fused_class_ids = classes
+            self.fused_model_available = True
+            self.last_detections['model_info']['fused_model'] = os.path.basename(fused_model_path)
+            
+        except Exception:
+            self.fused_model_available = False
+    
+    @staticmethod
+    def _warmup_model(model):
+        """First inference allocates buffers and picks kernels - do it on a dummy frame"""
+        dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        _ = model(dummy_frame, conf=0.5, verbose=False)
+    
+    def warmup(self):
+        """Warm up every loaded model (for detectors created with warmup=False)"""
+        if not self.model_available:
+            return
+        for model, available in ((self.fused_model, self.fused_model_available),
+                                 (self.bat_model, self.bat_model_available),
+                                 (self.ball_model, self.ball_model_available)):
+            if available:
+                try:
+                    self._warmup_model(model)
+                except Exception as e:
+                    print(f"⚠️ Model warm-up failed: {e}")
+    
+    def _map_fused_classes(self, names):
+        """Map model class ids to the bats/balls/persons groups"""
+        classes = {'bats': None, 'balls': None, 'persons': None}
+        for class_id, class_name in names.items():
+            name = class_name.lower()
+            if name in self.fused_bat_names and classes['bats'] is None:
+                classes['bats'] = class_id
+            elif name in self.fused_ball_names and classes['balls'] is None:
+                classes['balls'] = class_id
+            elif name in self.fused_person_names and classes['persons'] is None:
+                classes['persons'] = class_id
+        return classes
+    
     def detect_objects(self, frame):
         """FAST single-pass detection optimized for speed"""
         start_time = time.time()
@@ -122,31 +321,32 @@ class YoloDetector:
         if not self.model_available:
             return self._empty_detections()
         
-        detections = {
-            'bats': [],
-            'balls': [],
-            'persons': [],
-            'raw_detections': [],
-            'frame_info': {
-                'width': frame.shape[1],
-                'height': frame.shape[0],
-                'total_detections': 0,
-                'bat_detections': 0,
-                'ball_detections': 0,
-                'person_detections': 0,
-                'detection_time_ms': 0,
-                'fps': 0
-            },
-            'model_info': self.last_detections['model_info'].copy()
-        }
+        detections = self._new_detections(frame.shape)
+        
+        # One forward pass fills bats, balls and persons
+        if self.fused_model_available:
+            try:
+                self._set_detection_groups(detections, self._detect_fused_fast(frame))
+            except Exception:
+                pass
+        
+        # Dispatch both models at once in parallel mode
+        bat_future = None
+        coco_future = None
+        if self.bat_executor is not None and self.coco_executor is not None:
+            if self.bat_model_available:
+                bat_future = self.bat_executor.submit(self._detect_bats_fast, frame)
+            if self.ball_model_available:
+                coco_future = self.coco_executor.submit(self._detect_balls_and_persons_fast, frame)
         
         # FAST bat detection - single pass only
         if self.bat_model_available:
             try:
-                bat_detections = self._detect_bats_fast(frame)
-                detections['bats'].extend(bat_detections)
-                detections['raw_detections'].extend(bat_detections)
-                detections['frame_info']['bat_detections'] = len(bat_detections)
+                if bat_future is not None:
+                    bat_detections = bat_future.result()
+                else:
+                    bat_detections = self._detect_bats_fast(frame)
+                self._set_detection_groups(detections, {'bats': bat_detections})
                 
             except Exception:
                 pass
@@ -154,18 +354,170 @@ class YoloDetector:
         # Ball and person detection with COCO model
         if self.ball_model_available:
             try:
-                ball_person_detections = self._detect_balls_and_persons_fast(frame)
-                detections['balls'].extend(ball_person_detections['balls'])
-                detections['persons'].extend(ball_person_detections['persons'])
-                detections['raw_detections'].extend(ball_person_detections['balls'] + ball_person_detections['persons'])
-                detections['frame_info']['ball_detections'] = len(ball_person_detections['balls'])
-                detections['frame_info']['person_detections'] = len(ball_person_detections['persons'])
+                if coco_future is not None:
+                    ball_person_detections = coco_future.result()
+                else:
+                    ball_person_detections = self._detect_balls_and_persons_fast(frame)
+                self._set_detection_groups(detections, ball_person_detections)
                 
             except Exception:
                 pass
         
+        return self._finish_detections(detections, (time.time() - start_time) * 1000)
+    
+    def detect_persons(self, frame, imgsz=320):
+        """
+        Person (and ball) detection only - one pass of the COCO or fused model at a
+        reduced input size, without the bat model. Used while waiting for a batter.
+        """
+        start_time = time.time()
+        
+        if not self.model_available:
+            return self._empty_detections()
+        
+        detections = self._new_detections(frame.shape)
+        try:
+            if self.fused_model_available:
+                groups = self._detect_fused_fast(frame, imgsz=imgsz)
+                groups.pop('bats', None)
+                self._set_detection_groups(detections, groups)
+            elif self.ball_model_available:
+                self._set_detection_groups(detections, self._detect_balls_and_persons_fast(frame, imgsz=imgsz))
+        except Exception:
+            pass
+        
+        return self._finish_detections(detections, (time.time() - start_time) * 1000)
+    
+    def detect_persons_batch(self, frames, imgsz=320):
+        """
+        detect_persons for several frames (e.g. every armed lane of a LaneServer
+        tick) with one forward pass of the COCO or fused model
+        
+        Returns:
+            List of detections dicts, one per frame, identical to detect_persons
+        """
+        frames = list(frames)
+        if not frames:
+            return []
+        
+        start_time = time.time()
+        
+        if not self.model_available:
+            return [self._empty_detections() for _ in frames]
+        
+        batch = [self._new_detections(frame.shape) for frame in frames]
+        try:
+            if self.fused_model_available:
+                for detections, groups in zip(batch, self._detect_fused_batch(frames, imgsz=imgsz)):
+                    groups.pop('bats', None)
+                    self._set_detection_groups(detections, groups)
+            elif self.ball_model_available:
+                for detections, groups in zip(batch, self._detect_balls_and_persons_batch(frames, imgsz=imgsz)):
+                    self._set_detection_groups(detections, groups)
+        except Exception:
+            pass
+        
+        # Batch time is shared evenly between its frames
+        frame_time = (time.time() - start_time) * 1000 / len(frames)
+        return [self._finish_detections(detections, frame_time) for detections in batch]
+    
+    def can_detect_persons(self):
+        return self.model_available and (self.fused_model_available or self.ball_model_available)
+    
+    def detect_batch(self, frames):
+        """
+        Detect objects in several frames with one forward pass per model
+        
+        Meant for frames from a file, where there is no latency to hide. ROI
+        inference does not apply - every frame in a batch is detected full-frame.
+        
+        Returns:
+            List of detections dicts, one per frame, identical to detect_objects
+        """
+        frames = list(frames)
+        if not frames:
+            return []
+        
+        start_time = time.time()
+        
+        if not self.model_available:
+            return [self._empty_detections() for _ in frames]
+        
+        batch = [self._new_detections(frame.shape) for frame in frames]
+        
+        if self.fused_model_available:
+            try:
+                for detections, fused_detections in zip(batch, self._detect_fused_batch(frames)):
+                    self._set_detection_groups(detections, fused_detections)
+            except Exception:
+                pass
+        
+        # Dispatch both models at once in parallel mode
+        bat_future = None
+        coco_future = None
+        if self.bat_executor is not None and self.coco_executor is not None:
+            if self.bat_model_available:
+                bat_future = self.bat_executor.submit(self._detect_bats_batch, frames)
+            if self.ball_model_available:
+                coco_future = self.coco_executor.submit(self._detect_balls_and_persons_batch, frames)
+        
+        if self.bat_model_available:
+            try:
+                bat_batch = bat_future.result() if bat_future is not None else self._detect_bats_batch(frames)
+                for detections, bat_detections in zip(batch, bat_batch):
+                    self._set_detection_groups(detections, {'bats': bat_detections})
+            except Exception:
+                pass
+        
+        if self.ball_model_available:
+            try:
+                if coco_future is not None:
+                    coco_batch = coco_future.result()
+                else:
+                    coco_batch = self._detect_balls_and_persons_batch(frames)
+                for detections, ball_person_detections in zip(batch, coco_batch):
+                    self._set_detection_groups(detections, ball_person_detections)
+            except Exception:
+                pass
+        
+        # Batch time is shared evenly between its frames
+        frame_time = (time.time() - start_time) * 1000 / len(frames)
+        return [self._finish_detections(detections, frame_time) for detections in batch]
+    
+    def _new_detections(self, frame_shape):
+        """Empty detections dict for one frame"""
+        return {
+            'bats': DetectionArray(),
+            'balls': DetectionArray(),
+            'persons': DetectionArray(),
+            'raw_detections': DetectionArray(),
+            'frame_info': {
+                'width': frame_shape[1],
+                'height': frame_shape[0],
+                'total_detections': 0,
+                'bat_detections': 0,
+                'ball_detections': 0,
+                'person_detections': 0,
+                'detection_time_ms': 0,
+                'fps': 0
+            },
+            'model_info': self.last_detections['model_info'].copy()
+        }
+    
+    @staticmethod
+    def _set_detection_groups(detections, groups):
+        """Store bats / balls / persons results and their frame_info counts"""
+        for key, group_detections in groups.items():
+            detections[key] = group_detections
+            detections['frame_info'][f"{key[:-1]}_detections"] = len(group_detections)
+    
+    def _finish_detections(self, detections, detection_time):
+        """Fill raw detections and timing, update the FPS average and last_detections"""
+        detections['raw_detections'] = DetectionArray.concatenate(
+            [detections['bats'], detections['balls'], detections['persons']]
+        )
+        
         # Performance tracking
-        detection_time = (time.time() - start_time) * 1000  # Convert to ms
         self.detection_times.append(detection_time)
         if len(self.detection_times) > 30:  # Keep last 30 measurements
             self.detection_times.pop(0)
@@ -182,135 +534,359 @@ class YoloDetector:
     
     def _detect_bats_fast(self, frame):
         """FAST single-pass bat detection with smart validation"""
-        bat_detections = []
-        frame_area = frame.shape[0] * frame.shape[1]
+        # ROI mode - small crop around the last batter / bat, full frame on a miss
+        if self.roi_inference:
+            roi = self._get_bat_roi(frame.shape)
+            if roi is not None:
+                bat_detections = self._run_bat_model(frame, roi)
+                if bat_detections:
+                    self.roi_stats['hits'] += 1
+                    return bat_detections
+                self.roi_stats['misses'] += 1
+            else:
+                self.roi_stats['full_frame'] += 1
+        
+        return self._run_bat_model(frame)
+    
+    def _get_bat_roi(self, frame_shape):
+        """
+        Padded window around the last bat and person boxes
+        
+        Returns:
+            (x1, y1, x2, y2) in frame coordinates, or None to use the full frame
+        """
+        last = self.last_detections
+        best_bat = self.get_best_bat_detection(last) if last.get('bats') else None
+        best_person = self.get_best_person_detection(last) if last.get('persons') else None
+        
+        boxes = [d['bbox'] for d in (best_bat, best_person) if d is not None]
+        if not boxes:
+            return None
+        
+        h, w = frame_shape[:2]
+        x1 = min(b[0] for b in boxes)
+        y1 = min(b[1] for b in boxes)
+        x2 = max(b[2] for b in boxes)
+        y2 = max(b[3] for b in boxes)
+        
+        # Pad by a fraction of the window size - the bat can sweep well outside the batter box
+        pad = int(max(x2 - x1, y2 - y1) * self.roi_padding)
+        size_x = max(self.roi_min_size, (x2 - x1) + 2 * pad)
+        size_y = max(self.roi_min_size, (y2 - y1) + 2 * pad)
+        center_x = (x1 + x2) // 2
+        center_y = (y1 + y2) // 2
+        
+        x1 = max(0, center_x - size_x // 2)
+        y1 = max(0, center_y - size_y // 2)
+        x2 = min(w, x1 + size_x)
+        y2 = min(h, y1 + size_y)
+        
+        # Not worth cropping if the window is most of the frame
+        if (x2 - x1) * (y2 - y1) > self.roi_max_area_ratio * w * h:
+            return None
         
+        return (x1, y1, x2, y2)
+    
+    def _run_bat_model(self, frame, roi=None):
+        """Run the bat model on the full frame or on an ROI crop, boxes in frame coordinates"""
+        try:
+            if roi is not None:
+                results = self.bat_model(
+                    frame[roi[1]:roi[3], roi[0]:roi[2]],
+                    conf=self.bat_confidence_threshold,
+                    iou=self.iou_threshold,
+                    imgsz=self.roi_imgsz,
+                    verbose=False
+                )
+            else:
+                results = self.bat_model(
+                    frame,
+                    conf=self.bat_confidence_threshold,
+                    iou=self.iou_threshold,
+                    verbose=False
+                )
+            
+            return self._bat_detections(results, frame.shape, roi)
+        
+        except Exception:
+            return DetectionArray()
+    
+    def _detect_bats_batch(self, frames):
+        """Full-frame bat detection for a batch of frames in one forward pass"""
         try:
             results = self.bat_model(
-                frame,
+                frames,
                 conf=self.bat_confidence_threshold,
                 iou=self.iou_threshold,
                 verbose=False
             )
-            
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        confidence = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        h, w = frame.shape[:2]
-                        x1 = max(0, min(w-1, x1))
-                        y1 = max(0, min(h-1, y1))
-                        x2 = max(x1+1, min(w, x2))
-                        y2 = max(y1+1, min(h, y2))
-                        
-                        width = x2 - x1
-                        height = y2 - y1
-                        area = width * height
-                        center_x = (x1 + x2) // 2
-                        center_y = (y1 + y2) // 2
-                        
-                        detection = {
-                            'class_id': class_id,
-                            'class_name': 'bat',
-                            'confidence': confidence,
-                            'bbox': (x1, y1, x2, y2),
-                            'center': (center_x, center_y),
-                            'width': width,
-                            'height': height,
-                            'area': area,
-                            'aspect_ratio': height / width if width > 0 else 0,
-                            'detection_type': 'bat_fast',
-                            'model_source': 'custom',
-                            'frame_area': frame_area,
-                            'area_ratio': area / frame_area
-                        }
-                        
-                        if self._is_valid_bat_fast(detection):
-                            bat_detections.append(detection)
+            return [self._bat_detections([result], frame.shape) for result, frame in zip(results, frames)]
         
         except Exception:
-            pass
-        
-        return bat_detections
+            return [DetectionArray() for _ in frames]
     
-    def _is_valid_bat_fast(self, detection):
-        """ULTRA FAST validation - minimal checks for speed"""
-        confidence = detection['confidence']
-        area = detection['area']
-        area_ratio = detection['area_ratio']
-        width = detection['width']
-        height = detection['height']
-        
-        if (confidence >= 0.08 and           # Reduced from 0.1
-            area >= self.min_bat_area and 
-            area_ratio <= self.max_area_ratio and 
-            width >= self.min_bat_dimension and 
-            height >= self.min_bat_dimension):
-            return True
-        return False
-    
-    def _detect_balls_and_persons_fast(self, frame):
-        """FAST ball and person detection - single pass"""
-        ball_detections = []
-        person_detections = []
-        
+    def _bat_detections(self, results, frame_shape, roi=None):
+        """Decode and validate bat model results for one frame"""
+        h, w = frame_shape[:2]
+        frame_area = h * w
+        offset = np.array([roi[0], roi[1], roi[0], roi[1]]) if roi is not None else 0
+        
+        xyxy, confidence, class_ids = self._decode_results(results)
+        xyxy = self._clamp_boxes(xyxy + offset, w, h)
+        keep = self._valid_bat_mask(xyxy, confidence, frame_area)
+        
+        return DetectionArray.from_arrays(xyxy[keep], confidence[keep], class_ids[keep], {
+            'class_name': 'bat',
+            'detection_type': 'bat_roi' if roi is not None else 'bat_fast',
+            'model_source': 'custom',
+            'frame_area': frame_area
+        })
+    
+    def _decode_results(self, results):
+        """
+        Pull every box out of the model results as NumPy arrays in one go
+        
+        Returns:
+            (N, 4) int xyxy (truncated like int()), (N,) float32 confidences, (N,) int class ids
+        """
+        xyxy, confidence, class_ids = [], [], []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            xyxy.append(to_numpy(boxes.xyxy).reshape(-1, 4))
+            confidence.append(to_numpy(boxes.conf).reshape(-1))
+            class_ids.append(to_numpy(boxes.cls).reshape(-1))
+        
+        if not xyxy:
+            return (np.empty((0, 4), dtype=np.int64),
+                    np.empty(0, dtype=np.float32),
+                    np.empty(0, dtype=np.int64))
+        
+        return (np.concatenate(xyxy).astype(np.int64),
+                np.concatenate(confidence).astype(np.float32),
+                np.concatenate(class_ids).astype(np.int64))
+    
+    @staticmethod
+    def _clamp_boxes(xyxy, w, h):
+        """Clamp (N, 4) boxes into the frame, keeping them at least 1 px wide and high"""
+        x1 = np.clip(xyxy[:, 0], 0, w - 1)
+        y1 = np.clip(xyxy[:, 1], 0, h - 1)
+        x2 = np.maximum(x1 + 1, np.minimum(w, xyxy[:, 2]))
+        y2 = np.maximum(y1 + 1, np.minimum(h, xyxy[:, 3]))
+        return np.stack([x1, y1, x2, y2], axis=1)
+    
+    def _valid_bat_mask(self, xyxy, confidence, frame_area):
+        """ULTRA FAST validation - minimal checks for speed, one boolean per box"""
+        width = xyxy[:, 2] - xyxy[:, 0]
+        height = xyxy[:, 3] - xyxy[:, 1]
+        area = width * height
+        
+        return ((confidence.astype(np.float64) >= 0.08) &    # Reduced from 0.1
+                (area >= self.min_bat_area) &
+                (area / frame_area <= self.max_area_ratio) &
+                (width >= self.min_bat_dimension) &
+                (height >= self.min_bat_dimension))
+    
+    def _coco_class_groups(self, names):
+        """COCO class ids counted as balls / persons (matched by id or name)"""
+        ball_ids = {self.coco_sports_ball_id}
+        person_ids = {self.coco_person_id}
+        for class_id, class_name in names.items():
+            name = class_name.lower()
+            if 'ball' in name:
+                ball_ids.add(int(class_id))
+            if name == 'person':
+                person_ids.add(int(class_id))
+        return np.array(sorted(ball_ids)), np.array(sorted(person_ids))
+    
+    def _detect_balls_and_persons_fast(self, frame, imgsz=None):
+        """FAST ball and person detection - single pass (imgsz: optional smaller model input)"""
         try:
             results = self.ball_model(
                 frame,
                 conf=0.1,
                 iou=self.iou_threshold,
-                verbose=False
+                verbose=False,
+                **({'imgsz': imgsz} if imgsz else {})
             )
-            
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        confidence = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        class_name = self.ball_model_classes.get(class_id, f'class_{class_id}')
-                        
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        center_x = (x1 + x2) // 2
-                        center_y = (y1 + y2) // 2
-                        width = x2 - x1
-                        height = y2 - y1
-                        
-                        detection = {
-                            'class_id': class_id,
-                            'class_name': class_name,
-                            'confidence': confidence,
-                            'bbox': (x1, y1, x2, y2),
-                            'center': (center_x, center_y),
-                            'width': width,
-                            'height': height,
-                            'area': width * height,
-                            'aspect_ratio': height / width if width > 0 else 0,
-                            'model_source': 'coco'
-                        }
-                        
-                        # Check for ball
-                        is_ball = (class_id == self.coco_sports_ball_id or 
-                                'ball' in class_name.lower() or
-                                'sports ball' in class_name.lower())
-                            
-                        # Check for person
-                        is_person = (class_id == self.coco_person_id or 
-                                   class_name.lower() == 'person')
-                        
-                        if is_ball and confidence >= self.ball_confidence_threshold:
-                            detection['detection_type'] = 'coco_ball'
-                            ball_detections.append(detection)
-                        elif is_person and confidence >= self.person_confidence_threshold:
-                            detection['detection_type'] = 'coco_person'
-                            person_detections.append(detection)
+            return self._ball_person_detections(results)
         
         except Exception:
-            pass
+            return {'balls': DetectionArray(), 'persons': DetectionArray()}
+    
+    def _detect_balls_and_persons_batch(self, frames, imgsz=None):
+        """Ball and person detection for a batch of frames in one forward pass"""
+        try:
+            results = self.ball_model(
+                frames,
+                conf=0.1,
+                iou=self.iou_threshold,
+                verbose=False,
+                **({'imgsz': imgsz} if imgsz else {})
+            )
+            return [self._ball_person_detections([result]) for result in results]
+        
+        except Exception:
+            return [{'balls': DetectionArray(), 'persons': DetectionArray()} for _ in frames]
+    
+    def _ball_person_detections(self, results):
+        """Split COCO model results for one frame into balls and persons"""
+        xyxy, confidence, class_ids = self._decode_results(results)
+        confidence64 = confidence.astype(np.float64)
         
-        return {'balls': ball_detections, 'persons': person_detections}
+        # A box that is both counts as a ball, like the if/elif order always did
+        is_ball = np.isin(class_ids, self.coco_ball_class_ids) & (confidence64 >= self.ball_confidence_threshold)
+        is_person = (np.isin(class_ids, self.coco_person_class_ids) &
+                     (confidence64 >= self.person_confidence_threshold) & ~is_ball)
+        
+        return {
+            'balls': DetectionArray.from_arrays(xyxy[is_ball], confidence[is_ball], class_ids[is_ball], {
+                'class_names': self.ball_model_classes,
+                'detection_type': 'coco_ball',
+                'model_source': 'coco'
+            }),
+            'persons': DetectionArray.from_arrays(xyxy[is_person], confidence[is_person], class_ids[is_person], {
+                'class_names': self.ball_model_classes,
+                'detection_type': 'coco_person',
+                'model_source': 'coco'
+            })
+        }
+    
+    def _detect_fused_fast(self, frame, imgsz=None):
+        """FAST single-pass bat, ball and person detection with the fused model"""
+        try:
+            results = self.fused_model(
+                frame,
+                conf=self._fused_confidence_threshold(),
+                iou=self.iou_threshold,
+                verbose=False,
+                **({'imgsz': imgsz} if imgsz else {})
+            )
+            return self._fused_detections(results, frame.shape)
+        
+        except Exception:
+            return {'bats': DetectionArray(), 'balls': DetectionArray(), 'persons': DetectionArray()}
+    
+    def _detect_fused_batch(self, frames, imgsz=None):
+        """Fused model detection for a batch of frames in one forward pass"""
+        try:
+            results = self.fused_model(
+                frames,
+                conf=self._fused_confidence_threshold(),
+                iou=self.iou_threshold,
+                verbose=False,
+                **({'imgsz': imgsz} if imgsz else {})
+            )
+            return [self._fused_detections([result], frame.shape) for result, frame in zip(results, frames)]
+        
+        except Exception:
+            return [{'bats': DetectionArray(), 'balls': DetectionArray(), 'persons': DetectionArray()}
+                    for _ in frames]
+    
+    def _fused_confidence_threshold(self):
+        return min(self.bat_confidence_threshold,
+                   self.ball_confidence_threshold,
+                   self.person_confidence_threshold)
+    
+    def _fused_detections(self, results, frame_shape):
+        """Split fused model results for one frame into bats, balls and persons"""
+        h, w = frame_shape[:2]
+        frame_area = h * w
+        group_ids = self.fused_class_ids
+        
+        xyxy, confidence, class_ids = self._decode_results(results)
+        xyxy = self._clamp_boxes(xyxy, w, h)
+        confidence64 = confidence.astype(np.float64)
+        
+        is_bat = (class_ids == group_ids['bats']) & self._valid_bat_mask(xyxy, confidence, frame_area)
+        is_ball = ((class_ids == self._fused_group_id('balls')) &
+                   (confidence64 >= self.ball_confidence_threshold))
+        is_person = ((class_ids == self._fused_group_id('persons')) &
+                     (confidence64 >= self.person_confidence_threshold))
+        
+        return {
+            'bats': DetectionArray.from_arrays(xyxy[is_bat], confidence[is_bat], class_ids[is_bat], {
+                'class_name': 'bat',
+                'detection_type': 'bat_fast',
+                'model_source': 'fused',
+                'frame_area': frame_area
+            }),
+            'balls': DetectionArray.from_arrays(xyxy[is_ball], confidence[is_ball], class_ids[is_ball], {
+                'class_names': self.fused_model_classes,
+                'detection_type': 'fused_ball',
+                'model_source': 'fused'
+            }),
+            'persons': DetectionArray.from_arrays(xyxy[is_person], confidence[is_person], class_ids[is_person], {
+                'class_names': self.fused_model_classes,
+                'detection_type': 'fused_person',
+                'model_source': 'fused'
+            })
+        }
+    
+    def _fused_group_id(self, group):
+        """Fused model class id for a group, -1 if the model has no such class"""
+        class_id = self.fused_class_ids[group]
+        return -1 if class_id is None else class_id
+    
+    def merge_detections(self, arrays, iou_threshold=None, method='nms'):
+        """
+        Merge detections of the same frame from several models or ROI passes
+
+        Args:
+            arrays: DetectionArrays (boxes in frame coordinates)
+            iou_threshold: Overlap at which boxes of the same class are merged
+                (default: the detector's NMS threshold)
+            method: 'nms' keeps the best box of each overlapping set, 'wbf'
+                (weighted box fusion) averages the set weighted by confidence
+
+        Returns:
+            DetectionArray sorted by confidence
+        """
+        merged = DetectionArray.concatenate(arrays)
+        if len(merged) == 0:
+            return merged
+        if iou_threshold is None:
+            iou_threshold = self.iou_threshold
+
+        labels = self._class_labels(merged)
+        if method == 'wbf':
+            boxes, scores, clusters = weighted_box_fusion(merged.xyxy, merged.confidence, iou_threshold,
+                                                          num_sources=len(arrays), class_ids=labels)
+            # Each fused box keeps the class and metadata of its best member
+            records = merged.records[[members[0] for members in clusters]]
+            boxes = np.round(boxes).astype(np.int32)
+            for i, name in enumerate(('x1', 'y1', 'x2', 'y2')):
+                records[name] = boxes[:, i]
+            records['confidence'] = scores
+        else:
+            keep = nms(merged.xyxy, merged.confidence, iou_threshold, class_ids=labels)
+            records = merged.records[keep]
+
+        return DetectionArray(records, merged.groups)
+
+    @staticmethod
+    def _class_labels(detections):
+        """Integer label per detection so equal class names match across models"""
+        records = detections.records
+        pairs, inverse = np.unique(np.stack([records['group'], records['class_id']], axis=1).astype(np.int64),
+                                   axis=0, return_inverse=True)
+        names = {}
+        pair_labels = []
+        for group_index, class_id in pairs:
+            group = detections.groups[group_index]
+            name = group.get('class_name') or group.get('class_names', {}).get(int(class_id), f'class_{class_id}')
+            pair_labels.append(names.setdefault(name, len(names)))
+        return np.asarray(pair_labels, dtype=np.int64)[inverse.reshape(-1)]
+
+    @staticmethod
+    def _best_detection(candidates, min_confidence):
+        """Highest-confidence detection at or above min_confidence"""
+        if isinstance(candidates, DetectionArray):
+            return candidates.best(min_confidence)
+        
+        valid = [d for d in candidates if d['confidence'] >= min_confidence]
+        return max(valid, key=lambda x: x['confidence']) if valid else None
     
     def get_best_bat_detection(self, detections=None, min_confidence=0.08):  # Reduced from 0.1
         """FAST best bat selection"""
@@ -321,10 +897,7 @@ class YoloDetector:
             return None
         
         # Simple max confidence selection for speed
-        valid_bats = [bat for bat in detections['bats'] 
-                     if bat['confidence'] >= min_confidence]
-        
-        return max(valid_bats, key=lambda x: x['confidence']) if valid_bats else None
+        return self._best_detection(detections['bats'], min_confidence)
     
     def get_best_ball_detection(self, detections=None, min_confidence=0.1):  # Reduced from 0.15
         """FAST best ball selection"""
@@ -334,10 +907,7 @@ class YoloDetector:
         if not detections or not detections['balls']:
             return None
         
-        valid_balls = [ball for ball in detections['balls'] 
-                      if ball['confidence'] >= min_confidence]
-        
-        return max(valid_balls, key=lambda x: x['confidence']) if valid_balls else None
+        return self._best_detection(detections['balls'], min_confidence)
     
     def get_best_person_detection(self, detections=None, min_confidence=0.2):
         """FAST best person selection"""
@@ -347,10 +917,7 @@ class YoloDetector:
         if not detections or not detections['persons']:
             return None
         
-        valid_persons = [person for person in detections['persons'] 
-                        if person['confidence'] >= min_confidence]
-        
-        return max(valid_persons, key=lambda x: x['confidence']) if valid_persons else None
+        return self._best_detection(detections['persons'], min_confidence)
     
     def draw_detections(self, frame, detections):
         """Draw detections with clean layout"""
@@ -396,11 +963,11 @@ class YoloDetector:
                 'bat_detections': 0, 'ball_detections': 0, 'person_detections': 0,
                 'detection_time_ms': 0, 'fps': 0
             },
-            'model_info': {'bat_model': 'none', 'ball_model': 'none'}
+            'model_info': {'bat_model': 'none', 'ball_model': 'none', 'fused_model': 'none'}
         }
     
     def is_available(self):
-        return self.bat_model_available or self.ball_model_available
+        return self.fused_model_available or self.bat_model_available or self.ball_model_available
     
     def get_performance_stats(self):
         """Get current performance statistics"""
@@ -409,7 +976,11 @@ class YoloDetector:
             'avg_detection_time_ms': sum(self.detection_times) / len(self.detection_times) if self.detection_times else 0,
             'recent_detection_times': self.detection_times[-10:],  # Last 10 measurements
             'bat_model_available': self.bat_model_available,
-            'ball_model_available': self.ball_model_available
+            'ball_model_available': self.ball_model_available,
+            'fused_model_available': self.fused_model_available,
+            'roi_stats': dict(self.roi_stats),
+            'backend': self.backend,
+            'execution_mode': 'parallel' if self.bat_executor is not None else 'sequential'
         }
 
 def test_fast_detector():
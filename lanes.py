@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Swingman - Multi-Lane Server
+Runs several cages (cameras or video sources) in one process with one set of models
+
+    python lanes.py 0 1 2 3 4 5 --names cage1 cage2 cage3 cage4 cage5 cage6 --inference-gating
+"""
+
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from core.lane_server import LaneServer
+
+
+def compose_grid(lanes, tile_width=480):
+    """Tile every lane's latest annotated frame into one image"""
+    tiles = []
+    for lane in lanes:
+        frame = lane.last_result['frame'] if lane.last_result else None
+        if frame is None:
+            tile = np.zeros((tile_width * 9 // 16, tile_width, 3), dtype=np.uint8)
+        else:
+            h, w = frame.shape[:2]
+            tile = cv2.resize(frame, (tile_width, int(h * tile_width / w)), interpolation=cv2.INTER_AREA)
+
+        state = "SWING" if lane.tracker.is_tracking else (lane.last_result or {}).get('inference_state', '')
+        cv2.putText(tile, f"{lane.name} {state} swings: {lane.swings}", (10, 25),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        tiles.append(tile)
+
+    # Same tile height everywhere, then rows of up to 3 tiles
+    tile_height = max(tile.shape[0] for tile in tiles)
+    tiles = [cv2.copyMakeBorder(t, 0, tile_height - t.shape[0], 0, 0, cv2.BORDER_CONSTANT) for t in tiles]
+    columns = min(3, len(tiles))
+    tiles += [np.zeros_like(tiles[0])] * (-len(tiles) % columns)
+    rows = [np.hstack(tiles[i:i + columns]) for i in range(0, len(tiles), columns)]
+    return np.vstack(rows)
+
+
+def print_stats(stats):
+    print(f"\nTicks: {stats['ticks']}  tick: {stats['avg_tick_ms']:.1f}ms  "
+          f"batch: {stats['avg_batch_size']:.1f} lanes  deferred: {stats['deferred']}")
+    for name, lane in stats['lanes'].items():
+        print(f"  {name:<10} {lane['fps']:5.1f} fps  {lane['avg_latency_ms']:6.1f}ms  "
+              f"dropped {lane['dropped']:<5} swings {lane['swings']:<3} {lane['inference_state'] or ''}")
+
+
+def main():
+    """Entry point for the lane server"""
+    parser = argparse.ArgumentParser(description="Swingman - Multi-camera lane server")
+    parser.add_argument("sources", nargs="+", help="Camera indices and/or video files, one per lane")
+    parser.add_argument("--names", nargs="+", default=None, help="Lane names (default lane1, lane2, ...)")
+    parser.add_argument("--output-dir", type=str, default="output",
+                        help="Directory for output files (one sub-directory per lane)")
+    parser.add_argument("--session-name", type=str, help="Optional session name prefix")
+    parser.add_argument("--max-batch", type=int, default=None,
+                        help="Most lanes detected per tick (default: all lanes)")
+    parser.add_argument("--camera-size", type=str, default=None, help="Requested camera resolution (WxH)")
+    parser.add_argument("--max-swing-seconds", type=float, default=3.0,
+                        help="Close a tracked swing after this long")
+    parser.add_argument("--no-auto-swing", action="store_true",
+                        help="Do not start and stop swings from the pose swing phase")
+    parser.add_argument("--show", action="store_true", help="Show all lanes in one window")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="Seconds between lane statistics printouts (0 = off)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--parallel-models", action="store_true",
+                        help="Run the bat and COCO YOLO models concurrently")
+    parser.add_argument("--fused-model", type=str, default=None,
+                        help="Single bat+ball+person model to use instead of the bat and COCO models "
+                             "('auto' to search the model folders)")
+    parser.add_argument("--backend", choices=["ultralytics", "onnx"], default="ultralytics",
+                        help="YOLO inference backend")
+    parser.add_argument("--no-pose", action="store_true", help="Skip MediaPipe pose analysis")
+    parser.add_argument("--pose-crop", action="store_true",
+                        help="Run pose on a crop around the detected batter instead of the full frame")
+    parser.add_argument("--multi-person-pose", action="store_true",
+                        help="Track pose for every detected person and follow the batter holding the bat")
+    parser.add_argument("--pose-complexity", type=int, choices=[0, 1, 2], default=1,
+                        help="MediaPipe pose model while a swing is tracked (0 lite, 1 full, 2 heavy)")
+    parser.add_argument("--pose-idle-stride", type=int, default=3,
+                        help="Run pose every Nth frame between swings")
+    parser.add_argument("--inference-gating", action="store_true",
+                        help="Between swings run only a motion gate / person detection instead of full YOLO + pose")
+
+    args = parser.parse_args()
+
+    if args.names and len(args.names) > len(args.sources):
+        parser.error("More lane names than sources")
+
+    camera_width = camera_height = None
+    if args.camera_size:
+        camera_width, camera_height = map(int, args.camera_size.split('x'))
+
+    tracker_kwargs = {
+        'enable_pose': not args.no_pose,
+        'yolo_execution_mode': 'parallel' if args.parallel_models else 'sequential',
+        'fused_model_path': args.fused_model,
+        'inference_backend': args.backend,
+        'pose_person_crop': args.pose_crop,
+        'multi_person_pose': args.multi_person_pose,
+        'inference_gating': args.inference_gating,
+        'pose_options': {
+            'model_complexity': args.pose_complexity,
+            'idle_stride': args.pose_idle_stride
+        }
+    }
+
+    try:
+        server = LaneServer(args.sources, tracker_kwargs, output_dir=args.output_dir,
+                            session_name=args.session_name, lane_names=args.names,
+                            max_batch=args.max_batch, auto_swing=not args.no_auto_swing,
+                            max_swing_s=args.max_swing_seconds,
+                            camera_width=camera_width, camera_height=camera_height)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    last_stats = time.time()
+
+    def on_results(results):
+        nonlocal last_stats
+        if args.stats_interval and time.time() - last_stats >= args.stats_interval:
+            print_stats(server.get_stats())
+            last_stats = time.time()
+
+        if args.show:
+            if results:
+                cv2.imshow("Swingman Lanes", compose_grid(server.lanes))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                return False
+        return True
+
+    print(f"Serving {len(server.lanes)} lanes (Ctrl+C to stop)")
+    try:
+        server.run(on_results=on_results, duration=args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Closes open swings and saves every lane's session
+        server.close()
+        if args.show:
+            cv2.destroyAllWindows()
+
+    print_stats(server.get_stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
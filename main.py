@@ -4,6 +4,9 @@ Swingman - Enhanced Baseball Swing Analysis Tool
 A clean, modular implementation for easy porting to iOS/Swift
 """
 
+import time
+STARTUP_TIME = time.perf_counter()  # Reference point for --profile-startup
+
 import os
 import sys
 import cv2
@@ -11,7 +14,9 @@ import argparse
 from datetime import datetime
 import numpy as np
 import json
+import threading
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Force OpenCV to use xcb backend for Wayland compatibility
 os.environ['QT_QPA_PLATFORM'] = 'xcb'
@@ -19,10 +24,10 @@ os.environ['QT_QPA_PLATFORM'] = 'xcb'
 from core.enhanced_swing_tracker import EnhancedSwingTracker
 from core.swing_data_manager import SwingDataManager
 from core.heatmap_generator import HeatmapGenerator
-from core.pose_analyzer import PoseAnalyzer
+from core.frame_pipeline import FramePipeline
+from core.startup_profiler import StartupProfiler
 from utils.drawing import (
-    draw_logo, draw_instructions, draw_statistics,
-    draw_tracking_box, draw_pose_info
+    draw_instructions, draw_tracking_box, draw_pose_info, draw_swing_summary
 )
 from utils.json_encoder import NumpyEncoder, convert_numpy_types
 
@@ -38,33 +43,86 @@ class SwingmanApp:
 
     def setup_components(self):
         """Initialize all core components"""
-        # Core tracking and analysis
-        self.tracker = EnhancedSwingTracker(enable_pose=True)
-        self.pose_analyzer = PoseAnalyzer()
+        self.profiler = StartupProfiler(enabled=self.args.profile_startup, start=STARTUP_TIME)
+        self.profiler.mark("main.py imported")
+        
+        # Core tracking and analysis - models load and warm up on a background
+        # thread while the window and camera open (see wait_for_models)
+        self.tracker = None
+        self.pose_analyzer = None
+        self.model_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-load")
+        self.tracker_future = self.model_loader.submit(self._load_tracker)
+        
+        with self.profiler.phase("session setup"):
+            # Data management
+            self.data_manager = SwingDataManager(base_dir=self.args.output_dir)
+            self.session_id = self.data_manager.start_new_session(self.args.session_name)
+            
+            # Heatmap generation
+            self.heatmap_generator = HeatmapGenerator(output_dir=self.args.output_dir)
         
-        # Data management
-        self.data_manager = SwingDataManager(base_dir=self.args.output_dir)
-        self.session_id = self.data_manager.start_new_session(self.args.session_name)
+        print(f"Started new session: {self.session_id}")
+
+    def _load_tracker(self):
+        """Build and warm up the tracker (runs on the model-load thread)"""
+        if self.profiler.enabled:
+            # Heavy imports on their own lines of the report
+            for module in ('torch', 'ultralytics', 'mediapipe'):
+                self.profiler.time_import(module)
+        
+        with self.profiler.phase("load models"):
+            tracker = EnhancedSwingTracker(
+                enable_pose=True,
+                yolo_execution_mode='parallel' if self.args.parallel_models else 'sequential',
+                fused_model_path=self.args.fused_model,
+                keyframe_interval=self.args.keyframe_interval,
+                roi_inference=self.args.roi_inference,
+                inference_backend=self.args.backend,
+                pose_person_crop=self.args.pose_crop,
+                multi_person_pose=self.args.multi_person_pose,
+                inference_gating=self.args.inference_gating,
+                bat_cascade=not self.args.no_bat_cascade,
+                pose_options={
+                    'model_complexity': self.args.pose_complexity,
+                    'idle_stride': self.args.pose_idle_stride
+                },
+                warmup=False
+            )
+        
+        with self.profiler.phase("warm up models"):
+            tracker.warmup()
+        return tracker
+
+    def wait_for_models(self):
+        """Block until the background model load has finished"""
+        if self.tracker is not None:
+            return
         
-        # Heatmap generation
-        self.heatmap_generator = HeatmapGenerator(output_dir=self.args.output_dir)
+        if not self.tracker_future.done():
+            print("Waiting for models to load...")
+        with self.profiler.phase("wait for models"):
+            self.tracker = self.tracker_future.result()
+        self.model_loader.shutdown()
         
-        print(f"Started new session: {self.session_id}")
+        # Pose results for drawing and metrics come from the tracker's analyzer
+        self.pose_analyzer = self.tracker.pose_analyzer
 
     def setup_window(self):
         """Setup OpenCV window and camera"""
         self.window_name = "Swingman - Bat Tracker"
-        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
-        
-        # Parse window size
-        try:
-            width, height = map(int, self.args.window_size.split("x"))
-            cv2.resizeWindow(self.window_name, width, height)
-        except:
-            cv2.resizeWindow(self.window_name, 1280, 720)
+        with self.profiler.phase("open window"):
+            cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+            
+            # Parse window size
+            try:
+                width, height = map(int, self.args.window_size.split("x"))
+                cv2.resizeWindow(self.window_name, width, height)
+            except:
+                cv2.resizeWindow(self.window_name, 1280, 720)
         
         # Setup camera
-        self.setup_camera()
+        with self.profiler.phase("open camera"):
+            self.setup_camera()
         
         # Mouse callback
         cv2.setMouseCallback(self.window_name, self.on_mouse)
@@ -94,27 +152,41 @@ class SwingmanApp:
         self.fps = 0
         self.start_time = cv2.getTickCount()
         self.mouse_position = (0, 0)
+        
+        # Tracker state is shared between the inference worker and the UI thread
+        self.tracker_lock = threading.RLock()
+        self.pipeline = None
 
     def on_mouse(self, event, x, y, flags, param):
-        """Handle mouse events"""
+        """
+        Handle mouse events
+        
+        Runs on the display thread: plain moves only store the position (the
+        inference stage hands it to the tracker), so they never wait for the
+        tracker lock that inference holds for a whole frame
+        """
         self.mouse_position = (x, y)
         
         # Start tracking on left click
-        if event == cv2.EVENT_LBUTTONDOWN and not self.tracker.is_tracking:
-            print(f"Starting tracking at ({x}, {y})")
-            self.tracker.start_tracking_session()
+        if event == cv2.EVENT_LBUTTONDOWN:
+            with self.tracker_lock:
+                if not self.tracker.is_tracking:
+                    print(f"Starting tracking at ({x}, {y})")
+                    self.tracker.start_tracking_session()
+                    self.tracker.update_current_position(x, y)
         
-        # Update current position while tracking
-        if self.tracker.is_tracking:
-            self.tracker.update_current_position(x, y)
-            
         # Stop tracking on right click
-        if event == cv2.EVENT_RBUTTONDOWN and self.tracker.is_tracking:
-            self.stop_tracking()
+        elif event == cv2.EVENT_RBUTTONDOWN:
+            with self.tracker_lock:
+                if self.tracker.is_tracking:
+                    self.stop_tracking()
 
     def update_fps(self):
         """Calculate FPS"""
         self.frame_count += 1
+        if self.frame_count == 1:
+            self.profiler.mark("first frame")
+            self.profiler.report()
         if self.frame_count % 30 == 0:
             end_time = cv2.getTickCount()
             self.fps = self.frame_count * cv2.getTickFrequency() / (end_time - self.start_time)
@@ -123,9 +195,18 @@ class SwingmanApp:
 
     def process_frame(self, frame):
         """Process a single frame"""
-        # Get all detection and tracking data
-        results = self.tracker.process_frame(frame.copy())
-        
+        return self.render_frame(self.infer_frame(frame))
+
+    def infer_frame(self, frame, timestamp=None):
+        """Run detection and tracking on a frame (inference stage); timestamp is the capture time"""
+        with self.tracker_lock:
+            if self.tracker.is_tracking:
+                # Latest mouse position from on_mouse (the tracker's last fallback point)
+                self.tracker.update_current_position(*self.mouse_position)
+            return self.tracker.process_frame(frame.copy(), timestamp=timestamp)
+
+    def render_frame(self, results):
+        """Draw overlays for one set of tracker results (render stage)"""
         # Start with the frame that has detections
         processed_frame = results['frame'].copy()
         
@@ -167,6 +248,22 @@ class SwingmanApp:
             stability = pose_data.get('stability_score', 0)
             cv2.putText(processed_frame, f"Stability: {stability}%", (padding + 10, y_pos),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, self._get_score_color(stability), 1)
+            y_pos += 25
+            
+            # Streaming kinematics - phase and hip-shoulder separation
+            phase = pose_data.get('swing_phase', 'stance')
+            cv2.putText(processed_frame, f"Phase: {phase.replace('_', ' ').title()}", (padding + 10, y_pos),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            y_pos += 25
+            separation = (pose_data.get('angles') or {}).get('hip_shoulder_separation')
+            if separation is not None:
+                cv2.putText(processed_frame, f"Separation: {separation:.0f} deg", (padding + 10, y_pos),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                y_pos += 25
+            lead_ms = metrics.get('hip_lead_ms')
+            if lead_ms is not None:
+                cv2.putText(processed_frame, f"Hip Lead: {lead_ms:.0f} ms", (padding + 10, y_pos),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
         # Create semi-transparent overlay for swing panel
         panel_height = 200
@@ -222,6 +319,16 @@ class SwingmanApp:
             cv2.putText(processed_frame, f"FPS: {self.fps:.1f}", (10, processed_frame.shape[0] - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
+        # Per-stage pipeline counters
+        if self.pipeline:
+            stats = self.pipeline.get_stats()
+            stage_text = " | ".join(
+                f"{name[:3]} {stats[name]['fps']:.0f}fps q{stats[name]['queue_depth']}"
+                for name in ("capture", "inference", "render")
+            )
+            cv2.putText(processed_frame, stage_text, (10, processed_frame.shape[0] - 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+        
         return processed_frame
 
     def _draw_swing_path(self, frame, swing_path, impact_point):
@@ -309,9 +416,11 @@ class SwingmanApp:
         if key == 'q':
             self.running = False
         elif key == 's' and self.tracker.is_tracking:
-            self.stop_tracking()
+            with self.tracker_lock:
+                self.stop_tracking()
         elif key == 'r':
-            self.reset_tracking()
+            with self.tracker_lock:
+                self.reset_tracking()
         elif key == 'h':
             self.show_heatmap()
         elif key == 'n':
@@ -321,10 +430,16 @@ class SwingmanApp:
 
     def stop_tracking(self):
         """Stop tracking and analyze swing"""
-        # Get final frame detections
-        ret, frame = self.capture.read()
-        if not ret:
-            return
+        # Get final frame detections (the capture thread owns the camera while the pipeline runs)
+        if self.pipeline and self.pipeline.running:
+            frame = self.pipeline.latest_frame
+            if frame is None:
+                return
+            frame = frame.copy()
+        else:
+            ret, frame = self.capture.read()
+            if not ret:
+                return
             
         # Force swing analysis if we have enough points
         if len(self.tracker.swing_path_points) >= 2:  # Use very lenient minimum
@@ -343,52 +458,14 @@ class SwingmanApp:
                 
                 if metrics:
                     # Convert numpy types to Python native types
-                    swing_data = {
-                        "efficiency_score": int(metrics['efficiency_score']),
-                        "power_score": int(metrics['power_score']),
-                        "swing_speed": float(metrics['swing_speed']),
-                        "path_consistency": int(metrics['path_consistency']),
-                        "follow_through": int(metrics['follow_through']),
-                        "pose_stability": int(metrics['pose_stability']),
-                        "sweet_spot_contact": bool(metrics['sweet_spot_contact']),
-                        "impact_point": tuple(map(int, metrics['impact_point'])) if metrics['impact_point'] else None
-                    }
+                    swing_data = SwingDataManager.swing_data_from_metrics(metrics)
                     
                     # Convert path points to tuples of integers
                     path_points = [tuple(map(int, point)) for point in points]
                     
-                    # Create a copy of the frame for visualization
-                    analyzed_frame = frame.copy()
-                    
-                    # Draw swing path
-                    if path_points:
-                        # Draw path line
-                        for i in range(1, len(path_points)):
-                            cv2.line(analyzed_frame, path_points[i-1], path_points[i], (0, 255, 0), 2)
-                        
-                        # Draw impact point if exists
-                        if swing_data["impact_point"]:
-                            cv2.circle(analyzed_frame, swing_data["impact_point"], 5, (0, 0, 255), -1)
-                            cv2.circle(analyzed_frame, swing_data["impact_point"], 8, (0, 0, 255), 2)
-                    
-                    # Draw metrics panel
-                    metrics_panel = {
-                        "Efficiency": f"{swing_data['efficiency_score']}%",
-                        "Power": f"{swing_data['power_score']}%",
-                        "Speed": f"{swing_data['swing_speed']:.1f}",
-                        "Consistency": f"{swing_data['path_consistency']}%",
-                        "Follow Through": f"{swing_data['follow_through']}%",
-                        "Pose Stability": f"{swing_data['pose_stability']}%"
-                    }
-                    
-                    # Draw logo and metrics
-                    draw_logo(analyzed_frame)
-                    draw_statistics(analyzed_frame, metrics_panel)
-                    
-                    # Add timestamp
+                    # Draw swing path, metrics and timestamp on a copy of the frame
                     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    cv2.putText(analyzed_frame, timestamp, (10, analyzed_frame.shape[0] - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    analyzed_frame = draw_swing_summary(frame.copy(), swing_data, path_points, timestamp)
                 
                     # Add to data manager with the analyzed frame
                     self.data_manager.add_swing_to_session(swing_data, analyzed_frame, path_points)
@@ -469,11 +546,23 @@ class SwingmanApp:
 
     def cleanup(self):
         """Clean up resources"""
+        if self.pipeline:
+            self.pipeline.stop()
+        
         self.data_manager.save_current_session()
         if self.heatmap_generator.normalized_impacts:
             self.heatmap_generator.save_session()
         
-        # Close camera
+        # Where the tracked bat positions came from
+        if self.tracker.bat_cascade and self.tracker.bat_cascade.frames:
+            cascade_stats = self.tracker.bat_cascade.get_stats()
+            print(f"\nBat detection cascade ({cascade_stats['frames']} tracked frames, {cascade_stats['misses']} misses):")
+            for stage, stats in cascade_stats['stages'].items():
+                print(f"  {stage:<5} hit rate {stats['hit_rate'] * 100:5.1f}%  avg {stats['avg_ms']:5.1f}ms  "
+                      f"over budget {stats['over_budget']}")
+        
+        # Release the shared models (stops detector workers) and close camera
+        self.tracker.close()
         self.capture.release()
         
         # Close all windows
@@ -495,6 +584,43 @@ class SwingmanApp:
         print("  e - Export session data")
         print("=======================================\n")
         
+        self.wait_for_models()
+        
+        if self.args.single_thread:
+            self.run_single_thread()
+        else:
+            self.run_pipeline()
+        
+        self.cleanup()
+
+    def run_pipeline(self):
+        """Run capture, inference and rendering on separate threads"""
+        self.pipeline = FramePipeline(
+            self.capture,
+            process_fn=self.infer_frame,
+            render_fn=self.render_frame,
+            queue_size=self.args.queue_size
+        )
+        self.pipeline.start()
+        
+        while self.running:
+            # Display the next rendered frame, if one is ready
+            processed_frame = self.pipeline.get_display_frame(timeout=0.01)
+            if processed_frame is not None:
+                cv2.imshow(self.window_name, processed_frame)
+                
+                # Update FPS counter
+                self.update_fps()
+            
+            # Handle keyboard input
+            key = cv2.waitKey(1)
+            if key != -1:
+                self.handle_keypress(key)
+        
+        self.pipeline.stop()
+
+    def run_single_thread(self):
+        """Run capture, inference and rendering one after another"""
         while self.running:
             # Read frame
             ret, frame = self.capture.read()
@@ -515,8 +641,6 @@ class SwingmanApp:
             key = cv2.waitKey(1)
             if key != -1:
                 self.handle_keypress(key)
-        
-        self.cleanup()
 
 def main():
     """Entry point for the application"""
@@ -525,6 +649,34 @@ def main():
     parser.add_argument("--window-size", type=str, default="1280x720", help="Window size (WxH)")
     parser.add_argument("--output-dir", type=str, default="output", help="Directory for output files")
     parser.add_argument("--session-name", type=str, help="Optional name for the session")
+    parser.add_argument("--queue-size", type=int, default=2, help="Frames buffered between pipeline stages")
+    parser.add_argument("--single-thread", action="store_true",
+                        help="Run capture, inference and rendering on one thread")
+    parser.add_argument("--parallel-models", action="store_true",
+                        help="Run the bat and COCO YOLO models concurrently")
+    parser.add_argument("--fused-model", type=str, default=None,
+                        help="Single bat+ball+person model to use instead of the bat and COCO models "
+                             "('auto' to search the model folders)")
+    parser.add_argument("--keyframe-interval", type=int, default=1,
+                        help="Run YOLO every Nth frame and track boxes with optical flow in between")
+    parser.add_argument("--roi-inference", action="store_true",
+                        help="Detect the bat in a crop around the last batter/bat box")
+    parser.add_argument("--backend", choices=["ultralytics", "onnx"], default="ultralytics",
+                        help="YOLO inference backend")
+    parser.add_argument("--pose-crop", action="store_true",
+                        help="Run pose on a crop around the detected batter instead of the full frame")
+    parser.add_argument("--multi-person-pose", action="store_true",
+                        help="Track pose for every detected person and follow the batter holding the bat")
+    parser.add_argument("--pose-complexity", type=int, choices=[0, 1, 2], default=1,
+                        help="MediaPipe pose model while a swing is tracked (0 lite, 1 full, 2 heavy)")
+    parser.add_argument("--pose-idle-stride", type=int, default=3,
+                        help="Run pose every Nth frame between swings")
+    parser.add_argument("--inference-gating", action="store_true",
+                        help="Between swings run only a motion gate / person detection instead of full YOLO + pose")
+    parser.add_argument("--no-bat-cascade", action="store_true",
+                        help="Do not fall back to CV line detection / pose when the YOLO bat is weak or missing")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import, model load and warm-up times up to the first frame")
     
     args = parser.parse_args()
     
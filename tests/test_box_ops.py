@@ -0,0 +1,166 @@
+"""
+Tests for core/box_ops.py and the detectors built on it
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.box_ops import iou_matrix, nms, soft_nms, weighted_box_fusion
+from core.detection_array import DetectionArray
+from core.hybrid_bat_detector import AdvancedBatDetector
+from core.yolo_detector import YoloDetector
+
+
+def reference_overlap(bbox1, bbox2):
+    """Pairwise IoU as AdvancedBatDetector._calculate_overlap computed it"""
+    x1_1, y1_1, x2_1, y2_1 = bbox1
+    x1_2, y1_2, x2_2, y2_2 = bbox2
+    x_left, y_top = max(x1_1, x1_2), max(y1_1, y1_2)
+    x_right, y_bottom = min(x2_1, x2_2), min(y2_1, y2_2)
+    if x_right < x_left or y_bottom < y_top:
+        return 0.0
+    intersection = (x_right - x_left) * (y_bottom - y_top)
+    union = (x2_1 - x1_1) * (y2_1 - y1_1) + (x2_2 - x1_2) * (y2_2 - y1_2) - intersection
+    return intersection / union if union > 0 else 0
+
+
+def reference_filter(detections):
+    """The per-pair loop _filter_and_rank_detections ran before box_ops"""
+    filtered = sorted((d for d in detections if d['confidence'] > 0.3),
+                      key=lambda x: x['confidence'], reverse=True)
+    final_detections = []
+    for detection in filtered:
+        if not any(reference_overlap(detection['bbox'], kept['bbox']) > 0.4 for kept in final_detections):
+            final_detections.append(detection)
+        if len(final_detections) >= 3:
+            break
+    return final_detections
+
+
+def random_detections(rng, count):
+    detections = []
+    for index in range(count):
+        x1, y1 = rng.randint(0, 200), rng.randint(0, 200)
+        detections.append({
+            'bbox': (x1, y1, x1 + rng.randint(0, 80), y1 + rng.randint(0, 80)),
+            # Repeated values exercise the tie order and the strict > 0.3 cut
+            'confidence': rng.choice([0.3, 0.5, 0.7, round(rng.random(), 2)]),
+            'index': index
+        })
+    return detections
+
+
+def test_filter_matches_pairwise_loop():
+    detector = AdvancedBatDetector()
+    rng = random.Random(0)
+    for _ in range(3000):
+        detections = random_detections(rng, rng.randint(0, 40))
+        expected = [d['index'] for d in reference_filter(detections)]
+        actual = [d['index'] for d in detector._filter_and_rank_detections(list(detections))]
+        assert actual == expected
+
+
+def test_filter_empty_inputs():
+    detector = AdvancedBatDetector()
+    assert detector._filter_and_rank_detections([]) == []
+    assert detector._filter_and_rank_detections([{'bbox': (0, 0, 10, 10), 'confidence': 0.3}]) == []
+
+
+def test_iou_matrix_matches_pairwise():
+    rng = random.Random(1)
+    boxes = []
+    for _ in range(40):
+        x1, y1 = rng.randint(0, 100), rng.randint(0, 100)
+        boxes.append((x1, y1, x1 + rng.randint(0, 50), y1 + rng.randint(0, 50)))
+
+    matrix = iou_matrix(boxes, boxes)
+    assert matrix.shape == (40, 40)
+    for i, a in enumerate(boxes):
+        for j, b in enumerate(boxes):
+            assert abs(matrix[i, j] - reference_overlap(a, b)) < 1e-12
+
+
+def test_nms_empty_and_class_aware():
+    assert len(nms(np.empty((0, 4)), [])) == 0
+    assert iou_matrix(np.empty((0, 4)), [(0, 0, 1, 1)]).shape == (0, 1)
+
+    boxes = [(0, 0, 10, 10), (1, 1, 10, 10), (0, 0, 10, 10)]
+    scores = [0.9, 0.8, 0.7]
+    assert nms(boxes, scores, 0.5).tolist() == [0]
+    assert nms(boxes, scores, 0.5, class_ids=[0, 0, 1]).tolist() == [0, 2]
+    assert nms(boxes, scores, 0.9, max_detections=1).tolist() == [0]
+
+
+def test_soft_nms_decays_overlaps():
+    boxes = [(0, 0, 10, 10), (1, 1, 10, 10), (50, 50, 60, 60)]
+    keep, scores = soft_nms(boxes, [0.9, 0.8, 0.7])
+    assert keep.tolist() == [0, 2, 1]
+    assert scores[1] == 0.7  # No overlap - untouched
+    assert scores[2] < 0.8
+
+    # Linear decay drops a full overlap entirely
+    keep, _ = soft_nms([(0, 0, 10, 10), (0, 0, 10, 10)], [0.9, 0.8], method='linear')
+    assert keep.tolist() == [0]
+
+    keep, scores = soft_nms(np.empty((0, 4)), [])
+    assert len(keep) == 0 and len(scores) == 0
+
+
+def test_weighted_box_fusion():
+    boxes = [(0, 0, 10, 10), (2, 2, 12, 12), (50, 50, 60, 60)]
+    fused, scores, clusters = weighted_box_fusion(boxes, [0.9, 0.3, 0.5], iou_threshold=0.4, num_sources=2)
+    np.testing.assert_allclose(fused[0], [0.5, 0.5, 10.5, 10.5])
+    np.testing.assert_allclose(scores, [0.6, 0.25])
+    assert [c.tolist() for c in clusters] == [[0, 1], [2]]
+
+    fused, scores, clusters = weighted_box_fusion(np.empty((0, 4)), [])
+    assert fused.shape == (0, 4) and len(scores) == 0 and clusters == []
+
+
+def make_detector():
+    """YoloDetector without loading any model - merge_detections only needs the NMS threshold"""
+    detector = YoloDetector.__new__(YoloDetector)
+    detector.iou_threshold = 0.4
+    return detector
+
+
+def merge_inputs():
+    full_frame = DetectionArray.from_arrays(
+        np.array([[0, 0, 10, 40], [100, 100, 120, 160]]), np.array([0.6, 0.3], np.float32), np.array([0, 0]),
+        {'class_name': 'bat', 'detection_type': 'bat_fast', 'model_source': 'custom'})
+    roi = DetectionArray.from_arrays(
+        np.array([[1, 1, 11, 41], [0, 0, 10, 40]]), np.array([0.8, 0.5], np.float32), np.array([0, 32]),
+        {'class_name': None, 'class_names': {0: 'bat', 32: 'sports ball'},
+         'detection_type': 'bat_roi', 'model_source': 'custom'})
+    return [full_frame, roi]
+
+
+def test_merge_detections_nms():
+    merged = make_detector().merge_detections(merge_inputs())
+    assert isinstance(merged, DetectionArray)
+    # The two 'bat' boxes overlap across models; the ball on the same spot is another class
+    assert [(d['bbox'], d['class_name'], d['detection_type']) for d in merged] == [
+        ((1, 1, 11, 41), 'bat', 'bat_roi'),
+        ((0, 0, 10, 40), 'sports ball', 'bat_roi'),
+        ((100, 100, 120, 160), 'bat', 'bat_fast'),
+    ]
+
+
+def test_merge_detections_wbf():
+    merged = make_detector().merge_detections(merge_inputs(), method='wbf')
+    assert [(d['bbox'], d['class_name']) for d in merged] == [
+        ((1, 1, 11, 41), 'bat'),
+        ((0, 0, 10, 40), 'sports ball'),
+        ((100, 100, 120, 160), 'bat'),
+    ]
+    # Found by both sources vs. by one of two
+    np.testing.assert_allclose(merged.confidence, [0.7, 0.25, 0.15], rtol=1e-6)
+
+
+def test_merge_detections_empty():
+    assert len(make_detector().merge_detections([DetectionArray(), DetectionArray()])) == 0
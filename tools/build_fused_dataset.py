@@ -0,0 +1,170 @@
+"""
+Build the fused bat + ball + person dataset used to train swingman_fused_detector.pt
+
+Bat boxes come from the existing bat dataset; person and ball boxes are
+pseudo-labelled with the COCO yolov8n.pt model (classes 0 and 32) so the
+fused model does not learn that people in the cage are background.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+import yaml
+
+# Output class ids - must match runs/detect/swingman_fused_detection/data.yaml
+FUSED_BAT_ID = 0
+FUSED_BALL_ID = 1
+FUSED_PERSON_ID = 2
+
+# COCO class ids used for pseudo-labels
+COCO_PERSON_ID = 0
+COCO_SPORTS_BALL_ID = 32
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def resolve_split_dir(data_yaml_path, data, split):
+    """Resolve a split's image folder the way Ultralytics / Roboflow exports lay it out"""
+    split_path = data.get(split)
+    if not split_path:
+        return None
+
+    yaml_dir = os.path.dirname(os.path.abspath(data_yaml_path))
+    base_dir = data.get('path') or yaml_dir
+
+    candidates = [
+        split_path if os.path.isabs(split_path) else os.path.join(base_dir, split_path),
+        os.path.join(yaml_dir, split_path.replace('../', '', 1)),
+    ]
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+def get_bat_class_ids(names):
+    """Class ids in the source dataset that are bats"""
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+    return {int(class_id) for class_id, name in names.items() if 'bat' in str(name).lower()}
+
+
+def read_bat_labels(label_path, bat_class_ids):
+    """Read YOLO-format labels and keep only bat boxes, remapped to the fused bat id"""
+    lines = []
+    if not os.path.isfile(label_path):
+        return lines
+
+    with open(label_path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5 and int(float(parts[0])) in bat_class_ids:
+                lines.append(f"{FUSED_BAT_ID} {' '.join(parts[1:5])}")
+    return lines
+
+
+def pseudo_label(model, image_path, person_conf, ball_conf):
+    """Get person / ball labels for one image from the COCO model"""
+    lines = []
+    results = model(image_path, conf=min(person_conf, ball_conf), verbose=False)
+
+    for result in results:
+        if result.boxes is None:
+            continue
+        for box in result.boxes:
+            class_id = int(box.cls[0])
+            confidence = float(box.conf[0])
+            x_center, y_center, width, height = box.xywhn[0].tolist()
+
+            if class_id == COCO_PERSON_ID and confidence >= person_conf:
+                fused_id = FUSED_PERSON_ID
+            elif class_id == COCO_SPORTS_BALL_ID and confidence >= ball_conf:
+                fused_id = FUSED_BALL_ID
+            else:
+                continue
+
+            lines.append(f"{fused_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}")
+    return lines
+
+
+def build_split(model, image_dir, output_dir, split, bat_class_ids, person_conf, ball_conf):
+    """Copy one split's images and write merged label files"""
+    label_dir = image_dir.replace(os.sep + 'images', os.sep + 'labels')
+    out_image_dir = os.path.join(output_dir, split, 'images')
+    out_label_dir = os.path.join(output_dir, split, 'labels')
+    os.makedirs(out_image_dir, exist_ok=True)
+    os.makedirs(out_label_dir, exist_ok=True)
+
+    counts = {'images': 0, 'bats': 0, 'persons_balls': 0}
+    for filename in sorted(os.listdir(image_dir)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+
+        image_path = os.path.join(image_dir, filename)
+        stem = os.path.splitext(filename)[0]
+
+        bat_lines = read_bat_labels(os.path.join(label_dir, stem + '.txt'), bat_class_ids)
+        extra_lines = pseudo_label(model, image_path, person_conf, ball_conf)
+
+        shutil.copy2(image_path, os.path.join(out_image_dir, filename))
+        with open(os.path.join(out_label_dir, stem + '.txt'), 'w') as f:
+            f.write('\n'.join(bat_lines + extra_lines))
+
+        counts['images'] += 1
+        counts['bats'] += len(bat_lines)
+        counts['persons_balls'] += len(extra_lines)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the fused bat/ball/person training dataset")
+    parser.add_argument("--bat-data", required=True, help="data.yaml of the bat dataset")
+    parser.add_argument("--output", required=True, help="Output dataset directory")
+    parser.add_argument("--coco-model", default="yolov8n.pt", help="COCO model used for pseudo-labels")
+    parser.add_argument("--person-conf", type=float, default=0.5, help="Minimum person pseudo-label confidence")
+    parser.add_argument("--ball-conf", type=float, default=0.4, help="Minimum ball pseudo-label confidence")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    with open(args.bat_data, 'r') as f:
+        bat_data = yaml.safe_load(f)
+
+    bat_class_ids = get_bat_class_ids(bat_data.get('names', {}))
+    if not bat_class_ids:
+        print(f"No bat class found in {args.bat_data}")
+        return 1
+
+    model = YOLO(args.coco_model)
+    os.makedirs(args.output, exist_ok=True)
+
+    for split, out_split in (('train', 'train'), ('val', 'valid'), ('test', 'test')):
+        image_dir = resolve_split_dir(args.bat_data, bat_data, split)
+        if image_dir is None:
+            print(f"Skipping {split}: no images found")
+            continue
+
+        counts = build_split(model, image_dir, args.output, out_split,
+                             bat_class_ids, args.person_conf, args.ball_conf)
+        print(f"{split}: {counts['images']} images, {counts['bats']} bat boxes, "
+              f"{counts['persons_balls']} person/ball pseudo-labels")
+
+    fused_data = {
+        'path': os.path.abspath(args.output),
+        'train': 'train/images',
+        'val': 'valid/images',
+        'test': 'test/images',
+        'names': {FUSED_BAT_ID: 'bat', FUSED_BALL_ID: 'ball', FUSED_PERSON_ID: 'person'}
+    }
+    with open(os.path.join(args.output, 'data.yaml'), 'w') as f:
+        yaml.safe_dump(fused_data, f, sort_keys=False)
+
+    print(f"Fused dataset written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
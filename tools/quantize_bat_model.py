@@ -0,0 +1,284 @@
+"""
+Static INT8 post-training quantization for the bat detector
+
+Exports swingman_bat_detector.pt to ONNX, calibrates activation ranges on
+frames from recorded sessions or the training dataset, writes a QDQ INT8
+model and reports mAP drift and CPU latency against the FP32 model.
+
+    python tools/quantize_bat_model.py --weights Models/swingman_bat_detector.pt
+    python tools/quantize_bat_model.py --weights Models/swingman_bat_detector.pt \\
+        --calibration output/recordings --num-calibration 300
+
+The resulting swingman_bat_detector_int8.onnx is picked up by
+YoloDetector(backend='onnx') or can be passed as the bat model path.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.model_cache import ModelCache
+from core.onnx_backend import OnnxYoloModel, export_onnx, letterbox
+from tools.build_fused_dataset import resolve_split_dir, IMAGE_EXTENSIONS
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+
+def read_training_data_yaml(run_dir):
+    """Get the dataset data.yaml referenced by a training run's args.yaml"""
+    args_path = os.path.join(run_dir, 'args.yaml')
+    if not os.path.isfile(args_path):
+        return None
+
+    with open(args_path, 'r') as f:
+        return yaml.safe_load(f).get('data')
+
+
+def collect_calibration_frames(sources, num_frames, video_stride=10):
+    """
+    Sample BGR frames from image folders, image files and videos
+
+    Returns:
+        List of at most num_frames frames, spread evenly over all sources
+    """
+    image_paths = []
+    video_paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for filename in sorted(os.listdir(source)):
+                path = os.path.join(source, filename)
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    image_paths.append(path)
+                elif filename.lower().endswith(VIDEO_EXTENSIONS):
+                    video_paths.append(path)
+        elif source.lower().endswith(IMAGE_EXTENSIONS):
+            image_paths.append(source)
+        elif source.lower().endswith(VIDEO_EXTENSIONS):
+            video_paths.append(source)
+
+    frames = []
+    if image_paths:
+        step = max(1, len(image_paths) // num_frames)
+        for path in image_paths[::step]:
+            frame = cv2.imread(path)
+            if frame is not None:
+                frames.append(frame)
+
+    for path in video_paths:
+        capture = cv2.VideoCapture(path)
+        index = 0
+        while len(frames) < num_frames * 2:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            if index % video_stride == 0:
+                frames.append(frame)
+            index += 1
+        capture.release()
+
+    if len(frames) > num_frames:
+        keep = np.linspace(0, len(frames) - 1, num_frames).astype(int)
+        frames = [frames[i] for i in keep]
+    return frames
+
+
+def make_calibration_reader(frames, input_name, imgsz):
+    """Wrap preprocessed frames in an ONNX Runtime CalibrationDataReader"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            if frame is None:
+                return None
+            image, _, _ = letterbox(frame, (imgsz, imgsz))
+            blob = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[np.newaxis]
+            return {input_name: np.ascontiguousarray(blob, dtype=np.float32) / 255.0}
+
+    return FrameCalibrationReader()
+
+
+def get_head_nodes_to_exclude(onnx_path):
+    """
+    Detection-head post-processing nodes (DFL, box decode, sigmoid, concat)
+
+    Quantizing these costs accuracy for almost no speed, so they stay FP32.
+    """
+    import onnx
+
+    model = onnx.load(onnx_path)
+    head_prefixes = [node.name.split('/')[1] for node in model.graph.node
+                     if node.name.startswith('/model.') and node.op_type == 'Conv']
+    if not head_prefixes:
+        return []
+
+    head_prefix = f"/{head_prefixes[-1]}/"
+    return [node.name for node in model.graph.node
+            if node.name.startswith(head_prefix) and node.op_type != 'Conv']
+
+
+def quantize_model(fp32_path, int8_path, frames, imgsz, exclude_head=True):
+    """Run static QDQ INT8 quantization with MinMax calibration"""
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+
+    input_name = onnx.load(fp32_path).graph.input[0].name
+    reader = make_calibration_reader(frames, input_name, imgsz)
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=get_head_nodes_to_exclude(fp32_path) if exclude_head else []
+    )
+
+    # Keep the class names / stride metadata Ultralytics wrote on export
+    fp32_model = onnx.load(fp32_path)
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+
+
+def evaluate_map(model_path, data_yaml, imgsz):
+    """Validate a model on the dataset with Ultralytics, returns mAP50 / mAP50-95"""
+    from ultralytics import YOLO
+
+    metrics = YOLO(model_path, task='detect').val(
+        data=data_yaml, imgsz=imgsz, batch=1, device='cpu', plots=False, verbose=False
+    )
+    return {'map50': float(metrics.box.map50), 'map50_95': float(metrics.box.map)}
+
+
+def benchmark_latency(model_path, frames, runs, num_threads):
+    """Median / p90 CPU latency in ms over the calibration frames"""
+    model = OnnxYoloModel(model_path, num_threads=num_threads)
+
+    # Warm-up
+    for frame in frames[:3]:
+        model(frame, conf=0.1)
+
+    timings = []
+    for i in range(runs):
+        frame = frames[i % len(frames)]
+        start_time = time.perf_counter()
+        model(frame, conf=0.1)
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    return {'median_ms': float(np.median(timings)), 'p90_ms': float(np.percentile(timings, 90))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization for the bat detector")
+    parser.add_argument("--weights", default="Models/swingman_bat_detector.pt", help="FP32 .pt or .onnx bat model")
+    parser.add_argument("--output", default=None, help="Output INT8 .onnx path")
+    parser.add_argument("--calibration", nargs="*", default=[],
+                        help="Image folders, images or videos used for calibration "
+                             "(default: training images from --run-dir)")
+    parser.add_argument("--run-dir", default="runs/detect/swingman_bat_detection2",
+                        help="Training run whose args.yaml points to the dataset")
+    parser.add_argument("--num-calibration", type=int, default=200, help="Number of calibration frames")
+    parser.add_argument("--imgsz", type=int, default=640, help="Calibration / validation input size")
+    parser.add_argument("--benchmark-runs", type=int, default=100, help="Timed inferences per model")
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--quantize-head", action="store_true", help="Also quantize the detection head")
+    parser.add_argument("--skip-map", action="store_true", help="Skip mAP evaluation")
+    args = parser.parse_args()
+
+    # 1. FP32 ONNX model
+    if args.weights.endswith('.onnx'):
+        fp32_path = args.weights
+    else:
+        print(f"Exporting {args.weights} to ONNX...")
+        fp32_path = export_onnx(args.weights, imgsz=args.imgsz)
+    int8_path = args.output or fp32_path.replace('.onnx', '_int8.onnx')
+
+    # 2. Calibration frames
+    data_yaml = read_training_data_yaml(args.run_dir)
+    sources = list(args.calibration)
+    if not sources and data_yaml and os.path.isfile(data_yaml):
+        with open(data_yaml, 'r') as f:
+            data = yaml.safe_load(f)
+        train_dir = resolve_split_dir(data_yaml, data, 'train')
+        if train_dir:
+            sources.append(train_dir)
+
+    frames = collect_calibration_frames(sources, args.num_calibration)
+    if not frames:
+        print("No calibration frames found - pass --calibration with images or videos")
+        return 1
+    print(f"Calibrating on {len(frames)} frames")
+
+    # 3. Quantize
+    quantize_model(fp32_path, int8_path, frames, args.imgsz, exclude_head=not args.quantize_head)
+    print(f"INT8 model written to {int8_path}")
+
+    # Remembered model paths would keep the detector on the FP32 model
+    ModelCache().forget_paths()
+
+    # 4. Report
+    report = {
+        'fp32_model': fp32_path,
+        'int8_model': int8_path,
+        'calibration_frames': len(frames),
+        'size_mb': {
+            'fp32': os.path.getsize(fp32_path) / 1e6,
+            'int8': os.path.getsize(int8_path) / 1e6
+        },
+        'latency': {
+            'fp32': benchmark_latency(fp32_path, frames, args.benchmark_runs, args.threads),
+            'int8': benchmark_latency(int8_path, frames, args.benchmark_runs, args.threads)
+        }
+    }
+    report['latency']['speedup'] = report['latency']['fp32']['median_ms'] / max(report['latency']['int8']['median_ms'], 1e-6)
+
+    if not args.skip_map and data_yaml and os.path.isfile(data_yaml):
+        fp32_map = evaluate_map(fp32_path, data_yaml, args.imgsz)
+        int8_map = evaluate_map(int8_path, data_yaml, args.imgsz)
+        report['map'] = {
+            'fp32': fp32_map,
+            'int8': int8_map,
+            'drift_map50': int8_map['map50'] - fp32_map['map50'],
+            'drift_map50_95': int8_map['map50_95'] - fp32_map['map50_95']
+        }
+
+    report_path = os.path.splitext(int8_path)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\nQuantization Report:")
+    print("--------------------")
+    print(f"Size: {report['size_mb']['fp32']:.1f} MB -> {report['size_mb']['int8']:.1f} MB")
+    print(f"Latency (median): {report['latency']['fp32']['median_ms']:.1f} ms -> "
+          f"{report['latency']['int8']['median_ms']:.1f} ms ({report['latency']['speedup']:.2f}x)")
+    if 'map' in report:
+        print(f"mAP50: {report['map']['fp32']['map50']:.3f} -> {report['map']['int8']['map50']:.3f} "
+              f"(drift {report['map']['drift_map50']:+.3f})")
+        print(f"mAP50-95: {report['map']['fp32']['map50_95']:.3f} -> {report['map']['int8']['map50_95']:.3f} "
+              f"(drift {report['map']['drift_map50_95']:+.3f})")
+    else:
+        print("mAP: skipped (no dataset found)")
+    print(f"Report saved to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
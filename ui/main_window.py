@@ -316,13 +316,17 @@ class MainWindow:
         # Store original frame
         original_frame = frame.copy()
         
+        # Tracking and impact detection share one preprocessing pass over the clean frame
+        from core.frame_context import FrameContext
+        context = FrameContext(original_frame)
+        
         # Add mouse position tracking for better interaction
         if hasattr(self, 'mouse_position'):
             cv2.circle(frame, self.mouse_position, 5, (0, 255, 255), -1)
         
         # Update tracking
         if self.tracker.is_tracking:
-            success, box = self.tracker.update_tracking(frame)
+            success, box = self.tracker.update_tracking(context)
             
             if success:
                 # Get current tracking point
@@ -346,7 +350,7 @@ class MainWindow:
                     # Check for impact if not in analysis mode
                     if not self.analysis_mode:
                         has_impact, impact_point = self.impact_detector.detect_impact(
-                            frame, current_point)
+                            context, current_point)
                         
                         if has_impact:
                             print("Impact detected!")
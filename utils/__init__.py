@@ -2,6 +2,7 @@ from .drawing import (
     draw_logo,
     draw_instructions,
     draw_statistics,
+    draw_swing_summary,
     draw_tracking_box,
     draw_pose_info
 )
@@ -80,6 +80,38 @@ def draw_statistics(frame, metrics):
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
         y += line_height
 
+def draw_swing_summary(frame, swing_data, path_points, caption):
+    """Draw the swing path, impact point, logo and metrics panel for a saved swing image"""
+    # Draw swing path
+    if path_points:
+        # Draw path line
+        for i in range(1, len(path_points)):
+            cv2.line(frame, path_points[i-1], path_points[i], (0, 255, 0), 2)
+        
+        # Draw impact point if exists
+        if swing_data["impact_point"]:
+            cv2.circle(frame, swing_data["impact_point"], 5, (0, 0, 255), -1)
+            cv2.circle(frame, swing_data["impact_point"], 8, (0, 0, 255), 2)
+    
+    # Draw metrics panel
+    metrics_panel = {
+        "Efficiency": f"{swing_data['efficiency_score']}%",
+        "Power": f"{swing_data['power_score']}%",
+        "Speed": f"{swing_data['swing_speed']:.1f}",
+        "Consistency": f"{swing_data['path_consistency']}%",
+        "Follow Through": f"{swing_data['follow_through']}%",
+        "Pose Stability": f"{swing_data['pose_stability']}%"
+    }
+    
+    # Draw logo and metrics
+    draw_logo(frame)
+    draw_statistics(frame, metrics_panel)
+    
+    # Caption (timestamp or source video) in the bottom-left corner
+    cv2.putText(frame, caption, (10, frame.shape[0] - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return frame
+
 def draw_tracking_box(frame):
     """Draw tracking zone box"""
     h, w = frame.shape[:2]